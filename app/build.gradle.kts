@@ -61,14 +61,28 @@ android {
 }
 
 val generateSubtypes by tasks.registering(Exec::class) {
+    description =
+        "Generates assets/subtypes/generated.json (packaged). Compiled layouts and the asset bundle under " +
+        "build/generated/layoutAssets are build outputs only: that directory is not an assets source dir."
     // Write generated subtypes directly into src/main/assets so it is always packaged into the APK.
     // (Unreleased project workflow; avoid relying on build/generated assets at runtime.)
     val outFile = project.layout.projectDirectory.file("src/main/assets/subtypes/generated.json")
+    // Compiled layout geometry + hit-test tables (<layoutId>.myblayout), see generate_subtypes.compile_layout.
+    // Kept under build/generated and out of the asset source sets: nothing reads it at runtime yet.
+    val compiledLayoutsDir = layout.buildDirectory.dir("generated/layoutAssets/layouts_compiled")
+    // Pre-parsed bundle of layouts/themes/toolbars/symbols/subtypes (MYBASB01), see generate_subtypes.AssetBundleWriter.
+    // Also build output only (not packaged) until a runtime loader consumes it.
+    val bundleFile = layout.buildDirectory.file("generated/layoutAssets/bundle/assets.mybundle")
 
     inputs.file(project.rootDir.resolve("scripts/generate_subtypes.py"))
     inputs.dir(project.layout.projectDirectory.dir("src/main/assets/layouts"))
     inputs.dir(project.layout.projectDirectory.dir("src/main/assets/dictionary/meta"))
+    inputs.dir(project.layout.projectDirectory.dir("src/main/assets/themes"))
+    inputs.dir(project.layout.projectDirectory.dir("src/main/assets/toolbars"))
+    inputs.dir(project.layout.projectDirectory.dir("src/main/assets/symbols"))
     outputs.file(outFile)
+    outputs.dir(compiledLayoutsDir)
+    outputs.file(bundleFile)
 
     // convertDictionaries writes `base.mybdict` into assets/dictionary; keep ordering explicit.
     dependsOn(convertDictionaries)
@@ -81,6 +95,16 @@ val generateSubtypes by tasks.registering(Exec::class) {
         project.layout.projectDirectory.dir("src/main/assets/dictionary/meta").asFile.absolutePath,
         "--output",
         outFile.asFile.absolutePath,
+        "--compiled-layouts-dir",
+        compiledLayoutsDir.get().asFile.absolutePath,
+        "--bundle-output",
+        bundleFile.get().asFile.absolutePath,
+        "--themes-dir",
+        project.layout.projectDirectory.dir("src/main/assets/themes").asFile.absolutePath,
+        "--toolbars-dir",
+        project.layout.projectDirectory.dir("src/main/assets/toolbars").asFile.absolutePath,
+        "--symbols-dir",
+        project.layout.projectDirectory.dir("src/main/assets/symbols").asFile.absolutePath,
         "--fail-on-empty",
     )
 }
@@ -150,6 +174,29 @@ val convertDictionaries by tasks.registering(Exec::class) {
     )
 }
 
+val compileEmojiIndex by tasks.registering(Exec::class) {
+    description = "Compiles build/generated/emojiAssets/emoji/emoji.mybemoji (build output only, not packaged)."
+    // Binary emoji search index (MYBEMJ01) so emoji search does not need to parse emoji.json.
+    // Run manually for now: emoji.json has no names/keywords yet and no runtime code reads the index,
+    // so it stays out of preBuild and out of the packaged assets.
+    val inFile = project.layout.projectDirectory.file("src/main/assets/emoji/emoji.json")
+    val outFile = layout.buildDirectory.file("generated/emojiAssets/emoji/emoji.mybemoji")
+
+    inputs.file(project.rootDir.resolve("scripts/emoji_tool.py"))
+    inputs.file(inFile)
+    outputs.file(outFile)
+
+    commandLine(
+        "python",
+        project.rootDir.resolve("scripts/emoji_tool.py").absolutePath,
+        "compile",
+        "--input",
+        inFile.asFile.absolutePath,
+        "--output",
+        outFile.get().asFile.absolutePath,
+    )
+}
+
 tasks.named("preBuild").configure {
     dependsOn(generateSubtypes)
     dependsOn(convertDictionaries)
@@ -2,15 +2,28 @@
 from __future__ import annotations
 
 import argparse
+import bisect
+import bz2
+import contextlib
 import dataclasses
+import gzip
+import heapq
+import io
+import itertools
 import json
+import lzma
+import math
+import os
+import random
 import struct
 import sys
+import tarfile
 import time
+import zipfile
 import zlib
 from collections import defaultdict
-from pathlib import Path
-from typing import Iterable, Protocol
+from pathlib import Path, PurePosixPath
+from typing import BinaryIO, Iterable, Iterator, Protocol, TextIO
 
 
 @dataclasses.dataclass(frozen=True, slots=True)
@@ -20,12 +33,186 @@ class DictionaryEntry:
     weight: int = 0
 
 
+SOURCE_MEMBER_SEPARATOR = "::"
+SOURCE_READ_BUFFER_SIZE = 1 << 20
+_COMPRESSION_SUFFIXES = (".gz", ".xz", ".bz2", ".zst")
+
+
+def _split_source(path: Path) -> tuple[Path, str | None]:
+    """`bundle.tar.gz::cn_dicts/base.dict.yaml` -> (archive path, member name); plain files have no member."""
+    text = str(path)
+    if SOURCE_MEMBER_SEPARATOR in text:
+        archive, member = text.split(SOURCE_MEMBER_SEPARATOR, 1)
+        return Path(archive), member
+    return path, None
+
+
+def _strip_compression_suffix(name: str) -> tuple[str, str | None]:
+    lower = name.lower()
+    if lower.endswith(".tgz"):
+        return name[:-4] + ".tar", ".gz"
+    for suffix in _COMPRESSION_SUFFIXES:
+        if lower.endswith(suffix):
+            return name[: -len(suffix)], suffix
+    return name, None
+
+
+def _source_name(path: Path) -> str:
+    """Name used for format detection: the archive member or file name, without a compression suffix."""
+    archive, member = _split_source(path)
+    name = PurePosixPath(member).name if member is not None else archive.name
+    return _strip_compression_suffix(name)[0]
+
+
+def _check_source(path: Path) -> None:
+    """
+    Cheap up-front check of a source path, so bad inputs fail before encoding starts: the file exists, a member
+    is given exactly for .tar/.zip bundles, and zip members are looked up in the central directory.
+    A missing tar member can only be found by scanning the stream; `_open_source_text` reports it on first open.
+    """
+    archive, member = _split_source(path)
+    if not archive.is_file():
+        raise SystemExit(f"Input not found: {path}")
+    is_zip = archive.name.lower().endswith(".zip")
+    is_tar = _strip_compression_suffix(archive.name)[0].lower().endswith(".tar")
+    if not (is_zip or is_tar):
+        if member is not None:
+            raise SystemExit(f"{archive}: not a .tar/.zip bundle, cannot read member {member}")
+        return
+    if member is None:
+        kind = "zip" if is_zip else "tar"
+        raise SystemExit(f"{archive}: {kind} sources need a member (<archive>{SOURCE_MEMBER_SEPARATOR}<member>)")
+    if is_zip:
+        try:
+            with zipfile.ZipFile(archive) as zf:
+                zf.getinfo(_normalize_member(member))
+        except KeyError:
+            raise SystemExit(f"{archive}: member not found: {member}") from None
+        except zipfile.BadZipFile as e:
+            raise SystemExit(f"Cannot read input: {path}: {e}") from None
+
+
+def _open_decompressed(stream: BinaryIO, codec: str | None) -> BinaryIO:
+    if codec is None:
+        return stream
+    if codec == ".gz":
+        return gzip.GzipFile(fileobj=stream, mode="rb")
+    if codec == ".xz":
+        return lzma.LZMAFile(stream)
+    if codec == ".bz2":
+        return bz2.BZ2File(stream)
+    if codec == ".zst":
+        try:
+            import zstandard
+        except ImportError:
+            raise SystemExit("Reading .zst sources requires the 'zstandard' package (pip install zstandard)") from None
+        return zstandard.ZstdDecompressor().stream_reader(stream, read_size=SOURCE_READ_BUFFER_SIZE)
+    raise ValueError(f"Unknown compression: {codec}")
+
+
+class _StreamReader(io.RawIOBase):
+    """Forward-only raw adapter so any decoded stream (incl. streaming tar members) can sit under one BufferedReader."""
+
+    def __init__(self, stream: BinaryIO) -> None:
+        self._stream = stream
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        data = self._stream.read(len(buffer))
+        buffer[: len(data)] = data
+        return len(data)
+
+
+def _normalize_member(name: str) -> str:
+    name = name.replace("\\", "/")
+    while name.startswith("./"):
+        name = name[2:]
+    return name.lstrip("/")
+
+
+@contextlib.contextmanager
+def _open_source_text(path: Path) -> Iterator[TextIO]:
+    """
+    Opens a source dictionary for streaming UTF-8 reading, without temp files.
+
+    Accepts plain files, `.gz/.xz/.bz2/.zst` compressed files (`.zst` needs the optional `zstandard` package),
+    and members of `.tar[.gz|.xz|.bz2|.zst]` / `.tgz` / `.zip` bundles as `<archive>::<member>`.
+    A member may itself be compressed (e.g. `bundle.zip::base.dict.yaml.gz`); a missing member exits with a CLI error.
+    """
+    archive, member = _split_source(path)
+    with contextlib.ExitStack() as stack:
+        stream: BinaryIO = stack.enter_context(archive.open("rb", buffering=SOURCE_READ_BUFFER_SIZE))
+        if archive.name.lower().endswith(".zip"):
+            if member is None:
+                raise ValueError(f"{archive}: zip sources need a member (<archive>{SOURCE_MEMBER_SEPARATOR}<member>)")
+            zf = stack.enter_context(zipfile.ZipFile(stream))
+            try:
+                stream = stack.enter_context(zf.open(_normalize_member(member)))
+            except KeyError:
+                raise SystemExit(f"{archive}: member not found: {member}") from None
+        else:
+            inner_name, codec = _strip_compression_suffix(archive.name)
+            stream = stack.enter_context(_open_decompressed(stream, codec))
+            if inner_name.lower().endswith(".tar"):
+                if member is None:
+                    raise ValueError(f"{archive}: tar sources need a member (<archive>{SOURCE_MEMBER_SEPARATOR}<member>)")
+                # Stream mode ("r|"): members are read in order from the decompressed stream, no seeking.
+                tf = stack.enter_context(tarfile.open(fileobj=stream, mode="r|"))
+                target = _normalize_member(member)
+                for info in tf:
+                    if info.isfile() and _normalize_member(info.name) == target:
+                        stream = stack.enter_context(tf.extractfile(info))
+                        break
+                else:
+                    raise SystemExit(f"{archive}: member not found: {member}")
+            elif member is not None:
+                raise ValueError(f"{archive}: not a .tar/.zip bundle, cannot read member {member}")
+        if member is not None:
+            stream = stack.enter_context(_open_decompressed(stream, _strip_compression_suffix(member)[1]))
+        buffered = io.BufferedReader(_StreamReader(stream), buffer_size=SOURCE_READ_BUFFER_SIZE)
+        yield stack.enter_context(io.TextIOWrapper(buffered, encoding="utf-8", errors="replace"))
+
+
+@dataclasses.dataclass(slots=True)
+class EntryBatch:
+    """
+    Columnar batch of parsed entries: parallel `words` / `codes` / `weights` lists.
+
+    Lets later stages work column-wise instead of on one `DictionaryEntry` object per line,
+    and pickles cheaply if chunks are handed to worker processes.
+    """
+
+    words: list[str] = dataclasses.field(default_factory=list)
+    codes: list[str] = dataclasses.field(default_factory=list)
+    weights: list[int] = dataclasses.field(default_factory=list)
+
+    def __len__(self) -> int:
+        return len(self.words)
+
+    def append(self, word: str, code: str, weight: int) -> None:
+        self.words.append(word)
+        self.codes.append(code)
+        self.weights.append(weight)
+
+    def entries(self) -> Iterable[DictionaryEntry]:
+        return map(DictionaryEntry, self.words, self.codes, self.weights)
+
+
+ENTRY_BATCH_SIZE = 8192
+
+
 class DictionaryFormatParser(Protocol):
     format_id: str
 
     def parse(self, path: Path) -> Iterable[DictionaryEntry]:
         ...
 
+    def parse_batches(self, path: Path, *, batch_size: int = ENTRY_BATCH_SIZE) -> Iterable[EntryBatch]:
+        """Same entries as `parse`, in order, as columnar batches of at most `batch_size` rows."""
+        ...
+
 
 class RimeDictYamlParser:
     """
@@ -38,7 +225,13 @@ class RimeDictYamlParser:
     format_id = "rime_dict_yaml"
 
     def parse(self, path: Path) -> Iterable[DictionaryEntry]:
-        with path.open("r", encoding="utf-8", errors="replace") as f:
+        for batch in self.parse_batches(path):
+            yield from map(DictionaryEntry, batch.words, batch.codes, batch.weights)
+
+    def parse_batches(self, path: Path, *, batch_size: int = ENTRY_BATCH_SIZE) -> Iterable[EntryBatch]:
+        batch = EntryBatch()
+        words, codes, weights = batch.words, batch.codes, batch.weights
+        with _open_source_text(path) as f:
             in_body = False
             for raw in f:
                 line = raw.strip("\n")
@@ -73,7 +266,15 @@ class RimeDictYamlParser:
                     except ValueError:
                         weight = 0
 
-                yield DictionaryEntry(word=word, code=code, weight=weight)
+                words.append(word)
+                codes.append(code)
+                weights.append(weight)
+                if len(words) >= batch_size:
+                    yield batch
+                    batch = EntryBatch()
+                    words, codes, weights = batch.words, batch.codes, batch.weights
+        if batch:
+            yield batch
 
 
 class RimeTableTxtParser:
@@ -87,7 +288,13 @@ class RimeTableTxtParser:
     format_id = "rime_table_txt"
 
     def parse(self, path: Path) -> Iterable[DictionaryEntry]:
-        with path.open("r", encoding="utf-8", errors="replace") as f:
+        for batch in self.parse_batches(path):
+            yield from map(DictionaryEntry, batch.words, batch.codes, batch.weights)
+
+    def parse_batches(self, path: Path, *, batch_size: int = ENTRY_BATCH_SIZE) -> Iterable[EntryBatch]:
+        batch = EntryBatch()
+        words, codes, weights = batch.words, batch.codes, batch.weights
+        with _open_source_text(path) as f:
             for raw in f:
                 line = raw.strip("\n")
                 s = line.strip()
@@ -113,7 +320,419 @@ class RimeTableTxtParser:
                     except ValueError:
                         weight = 0
 
-                yield DictionaryEntry(word=word, code=code, weight=weight)
+                words.append(word)
+                codes.append(code)
+                weights.append(weight)
+                if len(words) >= batch_size:
+                    yield batch
+                    batch = EntryBatch()
+                    words, codes, weights = batch.words, batch.codes, batch.weights
+        if batch:
+            yield batch
+
+
+class PayloadSectionBuilder(Protocol):
+    tag: bytes
+
+    def build(self, codes: list[str], grouped: dict[str, list[DictionaryEntry]]) -> bytes:
+        """
+        Builds one optional payload section.
+
+        `codes` is the sorted code index order; `grouped[code]` lists entries in stored order.
+        """
+        ...
+
+
+_MASK64 = 0xFFFFFFFFFFFFFFFF
+
+
+def _code_hash64(key: bytes, seed: int) -> int:
+    """FNV-1a 64 over UTF-8 bytes; the seed is folded into the offset basis."""
+    h = 0xCBF29CE484222325 ^ (seed & _MASK64)
+    for b in key:
+        h ^= b
+        h = (h * 0x100000001B3) & _MASK64
+    return h
+
+
+def _mix64(z: int) -> int:
+    # splitmix64 finalizer
+    z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & _MASK64
+    z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & _MASK64
+    return z ^ (z >> 31)
+
+
+def _mph_slot(h: int, displacement: int, key_count: int) -> int:
+    return _mix64(h ^ ((displacement * 0x9E3779B97F4A7C15) & _MASK64)) % key_count
+
+
+class CodeHashSectionBuilder:
+    """
+    Minimal perfect hash over canonical codes (hash-and-displace, CHD style).
+
+    Section "MPH1" (little-endian):
+      u32 key_count (== code_count)
+      u32 bucket_count
+      u32 seed
+      u32 reserved = 0
+      i32 displacement[bucket_count]
+      u32 slot_to_code_index[key_count]
+
+    Lookup:
+      h = fnv1a64(code_utf8, seed)
+      d = displacement[mix64(h) % bucket_count]
+      slot = -d - 1 if d < 0 else mix64(h ^ d * 0x9E3779B97F4A7C15) % key_count
+      i = slot_to_code_index[slot]; verify code_index[i] == code (one compare).
+    """
+
+    tag = b"MPH1"
+
+    def __init__(self, *, keys_per_bucket: int = 4, max_seeds: int = 8, max_displacement: int = 1 << 20) -> None:
+        self.keys_per_bucket = max(1, keys_per_bucket)
+        self.max_seeds = max(1, max_seeds)
+        self.max_displacement = max_displacement
+
+    def build(self, codes: list[str], grouped: dict[str, list[DictionaryEntry]]) -> bytes:
+        keys = [c.encode("utf-8") for c in codes]
+        for seed in range(self.max_seeds):
+            table = self._try_build(keys, seed)
+            if table is not None:
+                bucket_count, displacement, slot_to_index = table
+                out = bytearray(struct.pack("<IIII", len(keys), bucket_count, seed, 0))
+                out += struct.pack(f"<{bucket_count}i", *displacement)
+                out += struct.pack(f"<{len(keys)}I", *slot_to_index)
+                return bytes(out)
+        raise RuntimeError(f"Cannot build minimal perfect hash for {len(keys)} codes (tried {self.max_seeds} seeds)")
+
+    def _try_build(self, keys: list[bytes], seed: int) -> tuple[int, list[int], list[int]] | None:
+        n = len(keys)
+        bucket_count = max(1, -(-n // self.keys_per_bucket))
+        hashes = [_code_hash64(k, seed) for k in keys]
+        buckets: list[list[int]] = [[] for _ in range(bucket_count)]
+        for i, h in enumerate(hashes):
+            buckets[_mix64(h) % bucket_count].append(i)
+
+        displacement = [0] * bucket_count
+        slot_to_index = [0] * n
+        occupied = bytearray(n)
+        order = sorted(range(bucket_count), key=lambda b: -len(buckets[b]))
+
+        pos = 0
+        for pos, b in enumerate(order):
+            members = buckets[b]
+            if len(members) <= 1:
+                break
+            for d in range(self.max_displacement):
+                slots = [_mph_slot(hashes[i], d, n) for i in members]
+                if len(set(slots)) == len(slots) and not any(occupied[s] for s in slots):
+                    break
+            else:
+                # Identical 64-bit hashes (or a pathological bucket): retry with another seed.
+                return None
+            displacement[b] = d
+            for i, s in zip(members, slots, strict=True):
+                occupied[s] = 1
+                slot_to_index[s] = i
+        else:
+            pos = len(order)
+
+        # Singleton buckets take the remaining free slots directly (encoded as -slot-1).
+        free = (s for s in range(n) if not occupied[s])
+        for b in order[pos:]:
+            members = buckets[b]
+            if not members:
+                break
+            s = next(free)
+            displacement[b] = -s - 1
+            occupied[s] = 1
+            slot_to_index[s] = members[0]
+        return bucket_count, displacement, slot_to_index
+
+
+class HotCodeMapSectionBuilder:
+    """
+    Maps hot payload code indices to the full payload code index (both sorted by code).
+
+    Section "HCX1" (little-endian):
+      u32 full_code_index[code_count]
+    """
+
+    tag = b"HCX1"
+
+    def __init__(self, full_codes: list[str]) -> None:
+        self.full_codes = full_codes
+
+    def build(self, codes: list[str], grouped: dict[str, list[DictionaryEntry]]) -> bytes:
+        out = bytearray()
+        for code in codes:
+            i = bisect.bisect_left(self.full_codes, code)
+            if i >= len(self.full_codes) or self.full_codes[i] != code:
+                raise RuntimeError(f"hot code not in full payload: {code!r}")
+            out += struct.pack("<I", i)
+        return bytes(out)
+
+
+class TypoVariantSectionBuilder:
+    """
+    Precomputed typo-tolerance index (SymSpell style, keyboard-aware) over canonical codes.
+
+    For each code, variants within `max_distance` edits are generated, where one edit is either
+    substituting a key with a layout neighbor (see `_load_key_adjacency`) or omitting a key.
+    At most `fan_out` variants are kept per code (0 = all): closest first, and within one distance the
+    budget is dealt round-robin over key positions, so long codes keep typos at every position rather
+    than only the first few keys. A mistyped code is resolved with one binary search.
+
+    Variant strings are not stored: a record names the real code plus the edits that turn it into the
+    variant, and the reader rebuilds variant bytes from the code table while searching.
+
+    Section "TYP1" (little-endian):
+      u32 record_count
+      u32 max_distance
+      u32 record_size (= 4 + 2 * max_distance)
+      u32 reserved = 0
+      record[record_count] (sorted by (variant bytes, distance, -best entry weight, code_index)):
+        u32 posting: (distance << 24) | code_index
+        u16 edit[max_distance]: the first `distance` are applied in order to the code:
+          bit 15: 0 = substitute, 1 = delete
+          bits 8..14: position (codes are edited in their first 128 keys only)
+          bits 0..7: replacement byte (substitute only; layout keys are ASCII a-z)
+    """
+
+    tag = b"TYP1"
+    MAX_CODE_INDEX = (1 << 24) - 1
+    EDIT_DELETE = 1 << 15
+    MAX_EDIT_POSITION = 0x7F
+
+    def __init__(self, adjacency: dict[str, str], *, max_distance: int = 1, fan_out: int = 16) -> None:
+        self.adjacency = adjacency
+        self.max_distance = max(1, min(max_distance, 0xFF))
+        self.fan_out = max(0, fan_out)
+
+    @classmethod
+    def apply_edits(cls, code: bytes, edits: Iterable[int]) -> bytes:
+        for edit in edits:
+            pos = (edit >> 8) & cls.MAX_EDIT_POSITION
+            if edit & cls.EDIT_DELETE:
+                code = code[:pos] + code[pos + 1 :]
+            else:
+                code = code[:pos] + bytes((edit & 0xFF,)) + code[pos + 1 :]
+        return code
+
+    def _single_edits(self, base: str) -> list[list[tuple[str, int]]]:
+        """Per key position: [(edited string, edit)] (neighbor substitutions, then the omission)."""
+        out: list[list[tuple[str, int]]] = []
+        for i, ch in enumerate(base[: self.MAX_EDIT_POSITION + 1]):
+            at: list[tuple[str, int]] = []
+            for sub in self.adjacency.get(ch, ""):
+                if len(sub) == 1 and ord(sub) < 0x80:
+                    at.append((base[:i] + sub + base[i + 1 :], (i << 8) | ord(sub)))
+            if len(base) > 1:
+                at.append((base[:i] + base[i + 1 :], self.EDIT_DELETE | (i << 8)))
+            out.append(at)
+        return out
+
+    def variants(self, code: str) -> list[tuple[str, int, tuple[int, ...]]]:
+        """[(variant, distance, edits)] for one code, closest first, capped at `fan_out` (0 = no cap)."""
+        out: list[tuple[str, int, tuple[int, ...]]] = []
+        seen = {code}
+        frontier: list[tuple[str, tuple[int, ...]]] = [(code, ())]
+        for distance in range(1, self.max_distance + 1):
+            # Bucket this distance's candidates by the position of the last edit, then deal round-robin.
+            by_position: list[list[tuple[str, tuple[int, ...]]]] = []
+            for base, edits in frontier:
+                for i, at in enumerate(self._single_edits(base)):
+                    while len(by_position) <= i:
+                        by_position.append([])
+                    by_position[i].extend((v, edits + (edit,)) for v, edit in at)
+            frontier = []
+            for item in itertools.chain.from_iterable(itertools.zip_longest(*by_position)):
+                if item is None or item[0] in seen:
+                    continue
+                v, edits = item
+                seen.add(v)
+                frontier.append((v, edits))
+                out.append((v, distance, edits))
+                if self.fan_out and len(out) >= self.fan_out:
+                    return out
+        return out
+
+    def build(self, codes: list[str], grouped: dict[str, list[DictionaryEntry]]) -> bytes:
+        if len(codes) > self.MAX_CODE_INDEX:
+            raise RuntimeError(f"TYP1 supports at most {self.MAX_CODE_INDEX} codes (got {len(codes)})")
+        records: list[tuple[bytes, int, int, int, tuple[int, ...]]] = []
+        for index, code in enumerate(codes):
+            best = max((e.weight for e in grouped[code]), default=0)
+            for variant, distance, edits in self.variants(code):
+                records.append((variant.encode("utf-8"), distance, -best, index, edits))
+        records.sort()
+
+        record = struct.Struct(f"<I{self.max_distance}H")
+        out = bytearray(struct.pack("<IIII", len(records), self.max_distance, record.size, 0))
+        pad = (0,) * self.max_distance
+        for _variant, distance, _w, index, edits in records:
+            out += record.pack((distance << 24) | index, *(edits + pad)[: self.max_distance])
+        return bytes(out)
+
+
+class SwipeSignatureSectionBuilder:
+    """
+    Swipe (gesture) path signatures for every entry, grouped by (first key, last key).
+
+    An entry's signature is its canonical code with consecutive repeated keys collapsed ("hello" -> "helo"),
+    i.e. the keys a swipe must pass through in order. A swipe key sequence `s` is resolved by range-scanning
+    the (s[0], s[-1]) group, best weight first, for signatures that are a subsequence of `s`;
+    `path_length` (center-to-center distance in key widths, from the layout) allows a cheap length filter.
+
+    Section "SWP1" (little-endian):
+      u32 group_count
+      u32 record_count
+      u32 reserved[2] = 0
+      group_table[group_count] (sorted by (first, last)):
+        u8 first_key (ASCII), u8 last_key (ASCII), u16 reserved
+        u32 first_record
+        u32 record_count
+      record[record_count] (per group: -weight, then entry_index):
+        u32 entry_index (payload entry table)
+        u32 signature_offset (into signature_blob)
+        u16 path_length_q8 (key widths * 256, saturated)
+        u16 reserved
+      signature_blob: NUL-terminated ASCII signatures (interned)
+    """
+
+    tag = b"SWP1"
+
+    def __init__(self, key_centers: dict[str, tuple[float, float]], *, per_group: int = 0) -> None:
+        self.key_centers = key_centers
+        self.per_group = max(0, per_group)
+
+    @staticmethod
+    def signature(code: str) -> str:
+        out: list[str] = []
+        for ch in code:
+            if not out or out[-1] != ch:
+                out.append(ch)
+        return "".join(out)
+
+    def path_length(self, signature: str) -> float:
+        points = [self.key_centers[ch] for ch in signature]
+        return sum(math.dist(a, b) for a, b in zip(points, points[1:]))
+
+    def build(self, codes: list[str], grouped: dict[str, list[DictionaryEntry]]) -> bytes:
+        groups: dict[tuple[str, str], list[tuple[int, int, str]]] = defaultdict(list)
+        entry_index = 0
+        for code in codes:
+            entries = grouped[code]
+            if code and all(ch in self.key_centers for ch in code):
+                sig = self.signature(code)
+                for j, e in enumerate(entries):
+                    groups[(sig[0], sig[-1])].append((-e.weight, entry_index + j, sig))
+            entry_index += len(entries)
+
+        group_table = bytearray()
+        records = bytearray()
+        blob = bytearray()
+        sig_offsets: dict[str, tuple[int, int]] = {}
+        record_count = 0
+        for (first, last), items in sorted(groups.items()):
+            items.sort()
+            if self.per_group:
+                items = items[: self.per_group]
+            group_table += struct.pack("<BBHII", ord(first), ord(last), 0, record_count, len(items))
+            for _neg_weight, index, sig in items:
+                interned = sig_offsets.get(sig)
+                if interned is None:
+                    length_q8 = min(0xFFFF, round(self.path_length(sig) * 256))
+                    interned = sig_offsets[sig] = (len(blob), length_q8)
+                    blob += sig.encode("ascii") + b"\0"
+                records += struct.pack("<IIHH", index, interned[0], interned[1], 0)
+            record_count += len(items)
+
+        header = struct.pack("<IIII", len(groups), record_count, 0, 0)
+        return header + bytes(group_table) + bytes(records) + bytes(blob)
+
+
+def _load_letter_keys(layout_path: Path) -> list[tuple[str, int, float, float, int, int]]:
+    """
+    Letter keys (`primaryCode` a-z) of a layout with their `gridPosition` geometry:
+    [(letter, grid_row, center, width, start_col, end_col)], center/width as a fraction of the row's column count.
+    """
+    obj = json.loads(layout_path.read_text(encoding="utf-8"))
+    keys: list[tuple[str, int, float, float, int, int]] = []
+    for row in obj.get("rows") or []:
+        row_keys = row.get("keys") or []
+        grid = [k["ui"]["gridPosition"] for k in row_keys if (k.get("ui") or {}).get("gridPosition")]
+        if not grid:
+            continue
+        col_count = max(int(g["startCol"]) + int(g.get("spanCols", 1)) for g in grid)
+        for k in row_keys:
+            gp = (k.get("ui") or {}).get("gridPosition")
+            code = k.get("primaryCode")
+            if gp is None or not isinstance(code, int) or not (ord("a") <= code <= ord("z")):
+                continue
+            start, span = int(gp["startCol"]), int(gp.get("spanCols", 1))
+            center = (start + span / 2.0) / col_count
+            keys.append((chr(code), int(gp.get("startRow", 0)), center, span / col_count, start, start + span))
+    return keys
+
+
+def _load_key_adjacency(layout_path: Path) -> dict[str, str]:
+    """
+    Derives letter-key adjacency from a layout's `gridPosition` (e.g. `assets/layouts/qwerty.json`).
+
+    Keys are neighbors in the same grid row when their columns touch, and in adjacent rows when their
+    horizontal centers are at most one key width apart. Values are neighbor letters in sorted order.
+    """
+    keys = _load_letter_keys(layout_path)
+    adjacency: dict[str, set[str]] = defaultdict(set)
+    for a_ch, a_row, a_center, a_width, a_start, a_end in keys:
+        for b_ch, b_row, b_center, b_width, b_start, b_end in keys:
+            if a_ch == b_ch:
+                continue
+            if a_row == b_row:
+                near = a_end == b_start or b_end == a_start
+            else:
+                near = abs(a_row - b_row) == 1 and abs(a_center - b_center) <= max(a_width, b_width) + 1e-9
+            if near:
+                adjacency[a_ch].add(b_ch)
+    return {ch: "".join(sorted(n)) for ch, n in sorted(adjacency.items())}
+
+
+def _load_key_centers(layout_path: Path) -> dict[str, tuple[float, float]]:
+    """Letter-key centers in key units: x in widths of the narrowest letter key, y in grid rows."""
+    keys = _load_letter_keys(layout_path)
+    unit = min((width for _ch, _row, _center, width, _s, _e in keys), default=1.0)
+    return {ch: (center / unit, row + 0.5) for ch, row, center, _width, _s, _e in keys}
+
+
+PAYLOAD_CHUNK_SIZE = 1 << 20
+
+
+def _coalesce_chunks(parts: Iterable[bytes], size: int) -> Iterator[bytes]:
+    """Joins small byte strings into chunks of roughly `size` bytes (the last one may be shorter)."""
+    buf: list[bytes] = []
+    pending = 0
+    for part in parts:
+        if not part:
+            continue
+        buf.append(part)
+        pending += len(part)
+        if pending >= size:
+            yield b"".join(buf)
+            buf.clear()
+            pending = 0
+    if buf:
+        yield b"".join(buf)
+
+
+def _fsync_dir(path: Path) -> None:
+    """Fsyncs directory `path` so a preceding `os.replace` into it survives a crash (POSIX only; no-op elsewhere)."""
+    if os.name != "posix":
+        return
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
 
 
 class MyBoardDictPayloadV1Writer:
@@ -140,13 +759,48 @@ class MyBoardDictPayloadV1Writer:
         i32 weight
       code_blob: NUL-terminated utf-8 strings
       word_blob: NUL-terminated utf-8 strings
+
+    Optional extension sections (flags & FLAG_SECTIONS), appended after word_blob (4-byte aligned):
+      section bodies
+      section_table[section_count] of:
+        tag[4] (ASCII, e.g. b"MPH1")
+        u32 offset (relative to payload start)
+        u32 size
+        u32 crc32 (over section body)
+      u32 section_count
+      magic[4] = b"MYBS"
+
+    Readers that do not know about sections keep working: all v1 offsets are unchanged and
+    `payload_size` still covers the whole payload.
     """
 
     MAGIC = b"MYBDICT1"
     VERSION = 1
     FLAGS = 0
+    FLAG_SECTIONS = 1 << 0
+    SECTIONS_MAGIC = b"MYBS"
 
-    def encode(self, entries: Iterable[DictionaryEntry]) -> bytes:
+    def encode(
+        self,
+        entries: Iterable[DictionaryEntry],
+        *,
+        section_builders: Iterable[PayloadSectionBuilder] = (),
+    ) -> bytes:
+        return b"".join(self.iter_encode(entries, section_builders=section_builders))
+
+    def iter_encode(
+        self,
+        entries: Iterable[DictionaryEntry],
+        *,
+        section_builders: Iterable[PayloadSectionBuilder] = (),
+    ) -> Iterator[bytes]:
+        """
+        Same bytes as `encode`, yielded as ~1 MiB chunks for the container writer.
+
+        Only the output side streams: offsets depend on the full sorted code set, so every entry is grouped,
+        sorted and its strings encoded before the first chunk. What is saved is the joined payload and its
+        compressed copy on top of that working set, not the working set itself.
+        """
         grouped: dict[str, list[DictionaryEntry]] = defaultdict(list)
         for e in entries:
             grouped[e.code].append(e)
@@ -155,51 +809,33 @@ class MyBoardDictPayloadV1Writer:
         for code in codes:
             grouped[code].sort(key=lambda e: (-e.weight, e.word))
 
-        code_blob_parts: list[bytes] = []
-        code_offsets: dict[str, int] = {}
-        code_blob_size = 0
-        for code in codes:
-            b = code.encode("utf-8") + b"\0"
-            code_offsets[code] = code_blob_size
-            code_blob_parts.append(b)
-            code_blob_size += len(b)
-        code_blob = b"".join(code_blob_parts)
-
-        word_blob_parts: list[bytes] = []
-        word_offsets: list[int] = []
-        weights: list[int] = []
-        word_blob_size = 0
-        for code in codes:
-            for e in grouped[code]:
-                b = e.word.encode("utf-8") + b"\0"
-                word_offsets.append(word_blob_size)
-                weights.append(int(e.weight))
-                word_blob_parts.append(b)
-                word_blob_size += len(b)
-        word_blob = b"".join(word_blob_parts)
-
-        code_index: list[tuple[int, int, int]] = []
-        first_entry_index = 0
-        for code in codes:
-            count = len(grouped[code])
-            code_index.append((code_offsets[code], first_entry_index, count))
-            first_entry_index += count
-
-        entry_count = len(word_offsets)
+        code_blob_parts = [code.encode("utf-8") + b"\0" for code in codes]
+        word_blob_parts = [e.word.encode("utf-8") + b"\0" for code in codes for e in grouped[code]]
+        code_blob_size = sum(map(len, code_blob_parts))
+        word_blob_size = sum(map(len, word_blob_parts))
+        entry_count = len(word_blob_parts)
         code_count = len(codes)
 
         code_index_offset = 8 + 4 * 9
         entry_table_offset = code_index_offset + code_count * 12
         code_blob_offset = entry_table_offset + entry_count * 8
-        word_blob_offset = code_blob_offset + len(code_blob)
-        payload_size = word_blob_offset + len(word_blob)
-
-        out = bytearray()
-        out += self.MAGIC
-        out += struct.pack("<I", self.VERSION)
-        out += struct.pack("<I", self.FLAGS)
-        out += struct.pack("<II", code_count, entry_count)
-        out += struct.pack(
+        word_blob_offset = code_blob_offset + code_blob_size
+        payload_size = word_blob_offset + word_blob_size
+
+        sections = [(b.tag, b.build(codes, grouped)) for b in section_builders]
+        flags = self.FLAGS
+        section_area = b""
+        if sections:
+            flags |= self.FLAG_SECTIONS
+            section_area = self._encode_sections(sections, base_offset=payload_size)
+            payload_size += len(section_area)
+
+        header = bytearray()
+        header += self.MAGIC
+        header += struct.pack("<I", self.VERSION)
+        header += struct.pack("<I", flags)
+        header += struct.pack("<II", code_count, entry_count)
+        header += struct.pack(
             "<IIIII",
             code_index_offset,
             entry_table_offset,
@@ -208,16 +844,44 @@ class MyBoardDictPayloadV1Writer:
             payload_size,
         )
 
-        for code_offset, first, count in code_index:
-            out += struct.pack("<III", code_offset, first, count)
-
-        for off, w in zip(word_offsets, weights, strict=True):
-            out += struct.pack("<Ii", off, w)
-
-        out += code_blob
-        out += word_blob
-        if len(out) != payload_size:
-            raise RuntimeError(f"payload_size mismatch: header={payload_size} actual={len(out)}")
+        def _parts() -> Iterator[bytes]:
+            # Index records and offsets are derived while emitting; only the encoded strings are kept up front.
+            yield bytes(header)
+            code_offset = first = 0
+            for code, b in zip(codes, code_blob_parts, strict=True):
+                count = len(grouped[code])
+                yield struct.pack("<III", code_offset, first, count)
+                code_offset += len(b)
+                first += count
+            word_offset = 0
+            for e, b in zip((e for code in codes for e in grouped[code]), word_blob_parts, strict=True):
+                yield struct.pack("<Ii", word_offset, int(e.weight))
+                word_offset += len(b)
+            yield from code_blob_parts
+            yield from word_blob_parts
+            yield section_area
+
+        written = 0
+        for chunk in _coalesce_chunks(_parts(), PAYLOAD_CHUNK_SIZE):
+            written += len(chunk)
+            yield chunk
+        if written != payload_size:
+            raise RuntimeError(f"payload_size mismatch: header={payload_size} actual={written}")
+
+    def _encode_sections(self, sections: list[tuple[bytes, bytes]], *, base_offset: int) -> bytes:
+        out = bytearray()
+        table: list[tuple[bytes, int, int, int]] = []
+        for tag, body in sections:
+            if len(tag) != 4:
+                raise ValueError(f"section tag must be 4 bytes: {tag!r}")
+            out += b"\0" * (-(base_offset + len(out)) % 4)
+            table.append((tag, base_offset + len(out), len(body), zlib.crc32(body) & 0xFFFFFFFF))
+            out += body
+        out += b"\0" * (-(base_offset + len(out)) % 4)
+        for tag, offset, size, crc in table:
+            out += struct.pack("<4sIII", tag, offset, size, crc)
+        out += struct.pack("<I", len(table))
+        out += self.SECTIONS_MAGIC
         return bytes(out)
 
 
@@ -312,7 +976,7 @@ class MyBoardDictionaryFileV1Writer:
       u8 region_code
       u8 script_type
       u32 feature_flags
-      u32 flags (low 4 bits: compression id; 0=none, 1=zlib)
+      u32 flags (low 4 bits: compression id; 0=none, 1=zlib; bit 4: FLAG_HOT_PAYLOAD)
       u32 header_size (=64)
       u32 meta_size
       u32 payload_size_uncompressed
@@ -324,33 +988,124 @@ class MyBoardDictionaryFileV1Writer:
     Then:
       meta JSON (UTF-8)
       payload bytes (raw or zlib-compressed)
+      hot payload bytes (only with FLAG_HOT_PAYLOAD; same compression as payload)
+
+    The hot payload is a small standalone MYBDICT1 holding the top-N entries (plus an HCX1 section mapping
+    its codes into the full code index). Its sizes/CRC live in `meta.hotPayload`, so an IME can serve it right
+    after reading header+meta and inflate the full payload in the background. Readers unaware of the flag
+    ignore the trailing bytes.
     """
 
     MAGIC = b"MYBDF001"
     VERSION = 1
+    FLAG_HOT_PAYLOAD = 1 << 4
 
     def write(
         self,
-        payload_uncompressed: bytes,
+        payload_uncompressed: bytes | Iterable[bytes],
         out_path: Path,
         *,
         dict_version: tuple[int, int, int],
         meta: dict,
         languages: list[str],
         compression: str = "zlib",
-    ) -> None:
+        hot_payload: bytes | None = None,
+    ) -> int:
+        """
+        Writes `payload_uncompressed` (bytes or an iterable of chunks, e.g. `iter_encode`) into `out_path`
+        chunk by chunk and returns crc32 of the uncompressed payload.
+
+        The file is built as `<out_path>.tmp` in the same directory: placeholder header + meta, payload
+        compressed/checksummed chunk by chunk, hot payload, then the real header is backpatched at offset 0.
+        It is fsynced and moved over `out_path` with `os.replace`, then the directory is fsynced (POSIX), so a
+        crash or encoder error never leaves a half-written dictionary behind and a completed write stays in place.
+        """
         out_path.parent.mkdir(parents=True, exist_ok=True)
         compression_id = 0 if compression == "none" else 1
-        payload_stored = payload_uncompressed if compression_id == 0 else zlib.compress(payload_uncompressed, 9)
+        if isinstance(payload_uncompressed, (bytes, bytearray, memoryview)):
+            payload_uncompressed = [bytes(payload_uncompressed)]
 
         meta_obj = dict(meta)
         meta_obj["languages"] = list(languages)
+        flags = compression_id & 0xF
+        hot_stored = b""
+        if hot_payload is not None:
+            flags |= self.FLAG_HOT_PAYLOAD
+            hot_stored = hot_payload if compression_id == 0 else zlib.compress(hot_payload, 9)
+            meta_obj["hotPayload"] = {
+                **meta_obj.get("hotPayload", {}),
+                "sizeUncompressed": len(hot_payload),
+                "sizeStored": len(hot_stored),
+                "crc32": zlib.crc32(hot_payload) & 0xFFFFFFFF,
+            }
         meta_json = json.dumps(meta_obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
 
         (lang_code, region_code, script_type, feature_flags) = _derive_profile((languages or [""])[0])
         (a, b, c) = dict_version
-        crc_payload = zlib.crc32(payload_uncompressed) & 0xFFFFFFFF
 
+        tmp_path = out_path.with_name(out_path.name + ".tmp")
+        try:
+            with tmp_path.open("wb") as f:
+                f.write(b"\0" * 64)
+                f.write(meta_json)
+                size_uncompressed, size_stored, crc_payload = self._write_payload(
+                    f, payload_uncompressed, compression_id=compression_id
+                )
+                f.write(hot_stored)
+                header = self._build_header(
+                    dict_version=(a, b, c),
+                    profile=(lang_code, region_code, script_type, feature_flags),
+                    flags=flags,
+                    meta_json=meta_json,
+                    size_uncompressed=size_uncompressed,
+                    size_stored=size_stored,
+                    crc_payload=crc_payload,
+                )
+                f.seek(0)
+                f.write(header)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, out_path)
+        except BaseException:
+            tmp_path.unlink(missing_ok=True)
+            raise
+        _fsync_dir(out_path.parent)
+        return crc_payload
+
+    @staticmethod
+    def _write_payload(f: BinaryIO, chunks: Iterable[bytes], *, compression_id: int) -> tuple[int, int, int]:
+        """Writes payload chunks (zlib-compressed when `compression_id` == 1); returns (size, stored, crc32)."""
+        compressor = zlib.compressobj(9) if compression_id == 1 else None
+        size_uncompressed = 0
+        size_stored = 0
+        crc = 0
+        for chunk in chunks:
+            size_uncompressed += len(chunk)
+            crc = zlib.crc32(chunk, crc)
+            stored = compressor.compress(chunk) if compressor is not None else chunk
+            size_stored += len(stored)
+            f.write(stored)
+        if compressor is not None:
+            stored = compressor.flush()
+            size_stored += len(stored)
+            f.write(stored)
+        if size_uncompressed > 0xFFFFFFFF or size_stored > 0xFFFFFFFF:
+            raise ValueError(f"payload too large for MYBDF v1 (u32 sizes): {size_uncompressed} bytes")
+        return size_uncompressed, size_stored, crc & 0xFFFFFFFF
+
+    def _build_header(
+        self,
+        *,
+        dict_version: tuple[int, int, int],
+        profile: tuple[int, int, int, int],
+        flags: int,
+        meta_json: bytes,
+        size_uncompressed: int,
+        size_stored: int,
+        crc_payload: int,
+    ) -> bytes:
+        (a, b, c) = dict_version
+        (lang_code, region_code, script_type, feature_flags) = profile
         # Build header with crc32_header_meta placeholder = 0.
         header = struct.pack(
             "<8sIHHHHHBBIIIIIIII8s",
@@ -364,11 +1119,11 @@ class MyBoardDictionaryFileV1Writer:
             region_code & 0xFF,
             script_type & 0xFF,
             feature_flags & 0xFFFFFFFF,
-            compression_id & 0xF,
+            flags,
             64,
             len(meta_json),
-            len(payload_uncompressed),
-            len(payload_stored),
+            size_uncompressed,
+            size_stored,
             crc_payload,
             0,  # crc32_header_meta
             b"\0" * 8,
@@ -382,12 +1137,960 @@ class MyBoardDictionaryFileV1Writer:
         crc_header_meta = zlib.crc32(header_meta) & 0xFFFFFFFF
 
         # Patch crc32_header_meta into header.
-        header = header[:52] + struct.pack("<I", crc_header_meta) + header[56:]
+        return header[:52] + struct.pack("<I", crc_header_meta) + header[56:]
+
+
+class MyBoardDictionaryReader:
+    """
+    Host-side reader for `.mybdict` (MYBDF v1) and raw MYBDICT1 payloads.
+
+    Mirrors `MyBoardDictionary` (Kotlin) lookup semantics so build outputs can be cross-checked:
+    - `candidates(code)`: exact match, entries in stored order
+    - `candidates_by_prefix(prefix)`: codes in sorted order, not globally weight-sorted
+    """
 
-        with out_path.open("wb") as f:
-            f.write(header)
-            f.write(meta_json)
-            f.write(payload_stored)
+    HEADER_SIZE = 64
+    CODE_INDEX_RECORD_SIZE = 12
+    ENTRY_RECORD_SIZE = 8
+
+    def __init__(self, payload: bytes, *, meta: dict | None = None) -> None:
+        if len(payload) < 8 + 4 * 9 or payload[:8] != MyBoardDictPayloadV1Writer.MAGIC:
+            raise ValueError(f"Unknown payload magic: {payload[:8]!r}")
+        (
+            version,
+            flags,
+            self.code_count,
+            self.entry_count,
+            self.code_index_offset,
+            self.entry_table_offset,
+            self.code_blob_offset,
+            self.word_blob_offset,
+            payload_size,
+        ) = struct.unpack_from("<IIIIIIIII", payload, 8)
+        if version != MyBoardDictPayloadV1Writer.VERSION:
+            raise ValueError(f"Unsupported payload version: {version}")
+        if payload_size != len(payload):
+            raise ValueError(f"payload_size mismatch: header={payload_size} actual={len(payload)}")
+        self.payload = payload
+        self.flags = flags
+        self.meta = meta or {}
+        self.section_spans: dict[bytes, tuple[int, int]] = {}
+        self.sections = self._read_sections() if flags & MyBoardDictPayloadV1Writer.FLAG_SECTIONS else {}
+        # Filled by `from_bytes` for MYBDF files: fileSize, headerMetaSize, compression, payloadStoredSize, hotStoredSize.
+        self.container: dict[str, int] = {}
+        self._mph = self._read_mph(self.sections.get(CodeHashSectionBuilder.tag))
+        self._typo = self._read_typo(self.sections.get(TypoVariantSectionBuilder.tag))
+        self._swipe_groups = self._read_swipe_groups(self.sections.get(SwipeSignatureSectionBuilder.tag))
+
+    @classmethod
+    def from_file(cls, path: Path, *, hot: bool = False) -> MyBoardDictionaryReader:
+        return cls.from_bytes(path.read_bytes(), hot=hot)
+
+    @classmethod
+    def from_bytes(cls, data: bytes, *, hot: bool = False) -> MyBoardDictionaryReader:
+        """With `hot=True`, returns a reader over the hot payload (FLAG_HOT_PAYLOAD) instead of the full one."""
+        if data[:8] == MyBoardDictPayloadV1Writer.MAGIC:
+            if hot:
+                raise ValueError("Raw MYBDICT1 payload has no hot payload")
+            return cls(data)
+        payload, meta, container = _read_mybdf(data, hot=hot)
+        reader = cls(payload, meta=meta)
+        reader.container = container
+        return reader
+
+    def _read_sections(self) -> dict[bytes, memoryview]:
+        p = self.payload
+        if p[-4:] != MyBoardDictPayloadV1Writer.SECTIONS_MAGIC:
+            raise ValueError("Invalid payload: section table magic mismatch")
+        (count,) = struct.unpack_from("<I", p, len(p) - 8)
+        table_offset = len(p) - 8 - count * 16
+        view = memoryview(p)
+        sections: dict[bytes, memoryview] = {}
+        for i in range(count):
+            tag, offset, size, crc = struct.unpack_from("<4sIII", p, table_offset + i * 16)
+            body = view[offset : offset + size]
+            if zlib.crc32(body) & 0xFFFFFFFF != crc:
+                raise ValueError(f"Invalid payload: section {tag!r} CRC32 mismatch")
+            sections[tag] = body
+            self.section_spans[tag] = (offset, size)
+        return sections
+
+    def _read_mph(self, body: memoryview | None) -> tuple[int, int, tuple[int, ...], tuple[int, ...]] | None:
+        if body is None:
+            return None
+        key_count, bucket_count, seed, _reserved = struct.unpack_from("<IIII", body, 0)
+        if key_count != self.code_count:
+            raise ValueError(f"Invalid MPH1: key_count={key_count} code_count={self.code_count}")
+        displacement = struct.unpack_from(f"<{bucket_count}i", body, 16)
+        slot_to_index = struct.unpack_from(f"<{key_count}I", body, 16 + bucket_count * 4)
+        return bucket_count, seed, displacement, slot_to_index
+
+    def _read_typo(self, body: memoryview | None) -> tuple[int, int, int] | None:
+        if body is None:
+            return None
+        record_count, max_distance, record_size, _reserved = struct.unpack_from("<IIII", body, 0)
+        return record_count, max_distance, record_size
+
+    def _read_swipe_groups(self, body: memoryview | None) -> dict[tuple[str, str], tuple[int, int]] | None:
+        if body is None:
+            return None
+        group_count, _record_count, _r0, _r1 = struct.unpack_from("<IIII", body, 0)
+        groups: dict[tuple[str, str], tuple[int, int]] = {}
+        for i in range(group_count):
+            first, last, _reserved, first_record, count = struct.unpack_from("<BBHII", body, 16 + i * 12)
+            groups[(chr(first), chr(last))] = (first_record, count)
+        return groups
+
+    @property
+    def has_code_hash(self) -> bool:
+        return self._mph is not None
+
+    @property
+    def has_typo_index(self) -> bool:
+        return self._typo is not None
+
+    def _cstring(self, start: int) -> bytes:
+        end = self.payload.index(b"\0", start)
+        return self.payload[start:end]
+
+    def code_at(self, index: int) -> bytes:
+        (code_offset,) = struct.unpack_from("<I", self.payload, self.code_index_offset + index * self.CODE_INDEX_RECORD_SIZE)
+        return self._cstring(self.code_blob_offset + code_offset)
+
+    def code_record(self, index: int) -> tuple[int, int]:
+        """Returns (first_entry_index, entry_count) for code index [index]."""
+        pos = self.code_index_offset + index * self.CODE_INDEX_RECORD_SIZE
+        return struct.unpack_from("<II", self.payload, pos + 4)
+
+    def entry(self, entry_index: int) -> tuple[str, int]:
+        word_offset, weight = struct.unpack_from("<Ii", self.payload, self.entry_table_offset + entry_index * self.ENTRY_RECORD_SIZE)
+        return self._cstring(self.word_blob_offset + word_offset).decode("utf-8"), weight
+
+    def find_code_index(self, code: str) -> int | None:
+        """Binary search over code_index (same comparisons as `MyBoardDictionary.findCodeRecord`)."""
+        target = code.encode("utf-8")
+        lo, hi = 0, self.code_count - 1
+        while lo <= hi:
+            mid = (lo + hi) >> 1
+            c = self.code_at(mid)
+            if c == target:
+                return mid
+            if c < target:
+                lo = mid + 1
+            else:
+                hi = mid - 1
+        return None
+
+    def find_code_index_hashed(self, code: str) -> int | None:
+        """O(1) exact lookup via the MPH1 section: one hash and one verification compare."""
+        if self._mph is None:
+            raise ValueError("Dictionary has no MPH1 section (convert with --code-hash)")
+        if self.code_count == 0:
+            return None
+        bucket_count, seed, displacement, slot_to_index = self._mph
+        target = code.encode("utf-8")
+        h = _code_hash64(target, seed)
+        d = displacement[_mix64(h) % bucket_count]
+        slot = -d - 1 if d < 0 else _mph_slot(h, d, self.code_count)
+        index = slot_to_index[slot]
+        return index if self.code_at(index) == target else None
+
+    def find_typo_code_indices(self, typed: str) -> list[tuple[int, int]]:
+        """[(code_index, distance)] of codes whose TYP1 variants include `typed`, best first."""
+        if self._typo is None:
+            raise ValueError("Dictionary has no TYP1 section (convert with --typo-layout)")
+        body = self.sections[TypoVariantSectionBuilder.tag]
+        record_count, max_distance, record_size = self._typo
+        record = struct.Struct(f"<I{max_distance}H")
+
+        def _record(i: int) -> tuple[int, int, bytes]:
+            posting, *edits = record.unpack_from(body, 16 + i * record_size)
+            index = posting & TypoVariantSectionBuilder.MAX_CODE_INDEX
+            distance = posting >> 24
+            return index, distance, TypoVariantSectionBuilder.apply_edits(self.code_at(index), edits[:distance])
+
+        target = typed.encode("utf-8")
+        lo, hi = 0, record_count
+        while lo < hi:
+            mid = (lo + hi) >> 1
+            if _record(mid)[2] < target:
+                lo = mid + 1
+            else:
+                hi = mid
+        out: list[tuple[int, int]] = []
+        while lo < record_count:
+            index, distance, variant = _record(lo)
+            if variant != target:
+                break
+            out.append((index, distance))
+            lo += 1
+        return out
+
+    def first_code_index_at_or_after(self, prefix: str) -> int:
+        target = prefix.encode("utf-8")
+        lo, hi = 0, self.code_count
+        while lo < hi:
+            mid = (lo + hi) >> 1
+            if self.code_at(mid) < target:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def iter_words(self) -> Iterable[str]:
+        for i in range(self.entry_count):
+            yield self.entry(i)[0]
+
+    def candidates(self, code: str, limit: int = 50) -> list[str]:
+        if self.code_count == 0 or not code.strip() or limit <= 0:
+            return []
+        index = self.find_code_index_hashed(code) if self._mph is not None else self.find_code_index(code)
+        if index is None:
+            return []
+        first, count = self.code_record(index)
+        return [self.entry(first + i)[0] for i in range(min(count, limit))]
+
+    def candidates_typo(self, code: str, limit: int = 50) -> list[str]:
+        """Candidates of the codes `code` is a likely mistyping of (TYP1), closest and heaviest codes first."""
+        if self.code_count == 0 or not code.strip() or limit <= 0:
+            return []
+        out: list[str] = []
+        for index, _distance in self.find_typo_code_indices(code):
+            first, count = self.code_record(index)
+            for j in range(min(count, limit - len(out))):
+                out.append(self.entry(first + j)[0])
+            if len(out) >= limit:
+                break
+        return out
+
+    def candidates_swipe(self, keys: str, limit: int = 50) -> list[str]:
+        """
+        Candidates for a swipe key sequence (SWP1): entries in the (first, last) key group whose
+        signature is a subsequence of the collapsed sequence, best weight first.
+        """
+        if self._swipe_groups is None:
+            raise ValueError("Dictionary has no SWP1 section (convert with --swipe-layout)")
+        path = SwipeSignatureSectionBuilder.signature(keys.strip().lower())
+        if not path or limit <= 0:
+            return []
+        group = self._swipe_groups.get((path[0], path[-1]))
+        if group is None:
+            return []
+        body = self.sections[SwipeSignatureSectionBuilder.tag]
+        group_count, record_count, _r0, _r1 = struct.unpack_from("<IIII", body, 0)
+        records_offset = 16 + group_count * 12
+        blob_offset = records_offset + record_count * 12
+        first_record, count = group
+        out: list[str] = []
+        for r in range(first_record, first_record + count):
+            entry_index, sig_offset, _length_q8, _reserved = struct.unpack_from("<IIHH", body, records_offset + r * 12)
+            sig = self._swipe_signature(body, blob_offset + sig_offset)
+            it = iter(path)
+            if all(ch in it for ch in sig):
+                out.append(self.entry(entry_index)[0])
+                if len(out) >= limit:
+                    break
+        return out
+
+    @staticmethod
+    def _swipe_signature(body: memoryview, start: int) -> str:
+        end = start
+        while body[end] != 0:
+            end += 1
+        return bytes(body[start:end]).decode("ascii")
+
+    def candidates_by_prefix(self, prefix: str, limit: int = 50) -> list[str]:
+        p = prefix.strip()
+        if self.code_count == 0 or not p or limit <= 0:
+            return []
+        target = p.encode("utf-8")
+        out: list[str] = []
+        i = self.first_code_index_at_or_after(p)
+        while i < self.code_count and len(out) < limit:
+            if not self.code_at(i).startswith(target):
+                break
+            first, count = self.code_record(i)
+            for j in range(min(count, limit - len(out))):
+                out.append(self.entry(first + j)[0])
+            i += 1
+        return out
+
+
+def _read_mybdf(data: bytes, *, hot: bool = False) -> tuple[bytes, dict, dict[str, int]]:
+    """Validates a MYBDF v1 container; returns (uncompressed payload or hot payload, meta, container sizes)."""
+    if data[:8] != MyBoardDictionaryFileV1Writer.MAGIC:
+        raise ValueError(f"Unknown dictionary magic: {data[:8]!r}")
+    if len(data) < MyBoardDictionaryReader.HEADER_SIZE:
+        raise ValueError(f"Invalid MYBDF: too small ({len(data)})")
+    (flags, _header_size, meta_size, size_uncompressed, size_stored, crc_payload, crc_header_meta) = (
+        struct.unpack_from("<IIIIIII", data, 28)
+    )
+    meta_end = MyBoardDictionaryReader.HEADER_SIZE + meta_size
+    header_meta = data[:52] + b"\0\0\0\0" + data[56:meta_end]
+    if zlib.crc32(header_meta) & 0xFFFFFFFF != crc_header_meta:
+        raise ValueError("Invalid MYBDF: header/meta CRC32 mismatch")
+    meta = json.loads(data[MyBoardDictionaryReader.HEADER_SIZE : meta_end].decode("utf-8"))
+    container = {
+        "fileSize": len(data),
+        "headerMetaSize": meta_end,
+        "compression": flags & 0xF,
+        "payloadStoredSize": size_stored,
+    }
+    if flags & MyBoardDictionaryFileV1Writer.FLAG_HOT_PAYLOAD:
+        container["hotStoredSize"] = int(meta["hotPayload"]["sizeStored"])
+    start = meta_end
+    if hot:
+        if not flags & MyBoardDictionaryFileV1Writer.FLAG_HOT_PAYLOAD:
+            raise ValueError("Invalid MYBDF: no hot payload (convert with --hot-entries)")
+        hot_meta = meta["hotPayload"]
+        start = meta_end + size_stored
+        size_stored = int(hot_meta["sizeStored"])
+        size_uncompressed = int(hot_meta["sizeUncompressed"])
+        crc_payload = int(hot_meta["crc32"])
+    stored = data[start : start + size_stored]
+    payload = stored if (flags & 0xF) == 0 else zlib.decompress(stored)
+    if len(payload) != size_uncompressed:
+        raise ValueError(f"Invalid MYBDF: payload size mismatch (expected={size_uncompressed} actual={len(payload)})")
+    if zlib.crc32(payload) & 0xFFFFFFFF != crc_payload:
+        raise ValueError("Invalid MYBDF: payload CRC32 mismatch")
+    return payload, meta, container
+
+
+def _mybdf_meta(data: bytes) -> dict:
+    """Meta JSON of a MYBDF v1 container without decoding the payload; `{}` for raw payloads (not CRC-checked)."""
+    if data[:8] != MyBoardDictionaryFileV1Writer.MAGIC or len(data) < MyBoardDictionaryReader.HEADER_SIZE:
+        return {}
+    (meta_size,) = struct.unpack_from("<I", data, 36)
+    return json.loads(data[MyBoardDictionaryReader.HEADER_SIZE : MyBoardDictionaryReader.HEADER_SIZE + meta_size])
+
+
+class MyBoardDictPackV1Writer:
+    """
+    Multi-dictionary pack payload v1 (MYBPACK1), stored in a MYBDF v1 container.
+
+    Several logical dictionaries share one interned code table and one interned word table; each keeps
+    its own code index and entry table (same record sizes as MYBDICT1, with shared ids instead of blob offsets).
+    The table of contents (ids, names, DictionarySpec fields, counts) lives in the container meta under
+    `pack.dictionaries`, in pack order, so it can be read without inflating the payload.
+
+    Header (little-endian):
+      magic[8] = b"MYBPACK1"
+      u32 version = 1
+      u32 flags = 0
+      u32 dictionary_count
+      u32 code_count (shared)
+      u32 word_count (shared)
+      u32 dictionary_table_offset
+      u32 code_table_offset
+      u32 word_table_offset
+      u32 code_blob_offset
+      u32 word_blob_offset
+      u32 payload_size
+
+    Then:
+      dictionary_table[dictionary_count] (16 bytes each):
+        u32 code_count, u32 entry_count, u32 code_index_offset, u32 entry_table_offset
+      code_table[code_count]: u32 code_offset (into code_blob; sorted by UTF-8 bytes)
+      word_table[word_count]: u32 word_offset (into word_blob; sorted by UTF-8 bytes)
+      per dictionary:
+        code_index[code_count] (12 bytes each, sorted by code): u32 code_id, u32 first_entry, u32 entry_count
+        entry_table[entry_count] (8 bytes each, per-code order as in the source): u32 word_id, i32 weight
+      code_blob: NUL-terminated UTF-8 codes
+      word_blob: NUL-terminated UTF-8 words
+    """
+
+    MAGIC = b"MYBPACK1"
+    VERSION = 1
+    HEADER_SIZE = 8 + 4 * 11
+
+    def encode(self, dictionaries: list[list[tuple[str, list[tuple[str, int]]]]]) -> bytes:
+        """`dictionaries[i]` is [(code, [(word, weight), ...]), ...] in code order."""
+        codes = sorted({code for groups in dictionaries for code, _ in groups}, key=lambda c: c.encode("utf-8"))
+        words = sorted(
+            {word for groups in dictionaries for _, entries in groups for word, _ in entries},
+            key=lambda w: w.encode("utf-8"),
+        )
+        code_ids = {code: i for i, code in enumerate(codes)}
+        word_ids = {word: i for i, word in enumerate(words)}
+
+        code_blob, code_table = self._blob(codes)
+        word_blob, word_table = self._blob(words)
+
+        dictionary_table_offset = self.HEADER_SIZE
+        code_table_offset = dictionary_table_offset + 16 * len(dictionaries)
+        word_table_offset = code_table_offset + 4 * len(codes)
+        offset = word_table_offset + 4 * len(words)
+
+        dictionary_table = bytearray()
+        bodies = bytearray()
+        for groups in dictionaries:
+            code_index = bytearray()
+            entry_table = bytearray()
+            entry_count = 0
+            for code, entries in sorted(groups, key=lambda g: code_ids[g[0]]):
+                code_index += struct.pack("<III", code_ids[code], entry_count, len(entries))
+                for word, weight in entries:
+                    entry_table += struct.pack("<Ii", word_ids[word], weight)
+                entry_count += len(entries)
+            dictionary_table += struct.pack("<IIII", len(groups), entry_count, offset, offset + len(code_index))
+            bodies += code_index + entry_table
+            offset += len(code_index) + len(entry_table)
+
+        code_blob_offset = offset
+        word_blob_offset = code_blob_offset + len(code_blob)
+        payload_size = word_blob_offset + len(word_blob)
+        header = self.MAGIC + struct.pack(
+            "<IIIIIIIIIII",
+            self.VERSION,
+            0,
+            len(dictionaries),
+            len(codes),
+            len(words),
+            dictionary_table_offset,
+            code_table_offset,
+            word_table_offset,
+            code_blob_offset,
+            word_blob_offset,
+            payload_size,
+        )
+        out = header + bytes(dictionary_table) + code_table + word_table + bytes(bodies) + code_blob + word_blob
+        if len(out) != payload_size:
+            raise RuntimeError(f"pack size mismatch: expected={payload_size} actual={len(out)}")
+        return out
+
+    @staticmethod
+    def _blob(strings: list[str]) -> tuple[bytes, bytes]:
+        blob = bytearray()
+        table = bytearray()
+        for value in strings:
+            table += struct.pack("<I", len(blob))
+            blob += value.encode("utf-8") + b"\0"
+        return bytes(blob), bytes(table)
+
+
+class MyBoardDictionaryPackReader:
+    """Host-side reader for MYBPACK1 packs; `dictionary(id)` gives a `MyBoardDictionaryReader`-compatible view."""
+
+    def __init__(self, payload: bytes, *, meta: dict | None = None) -> None:
+        if payload[:8] != MyBoardDictPackV1Writer.MAGIC:
+            raise ValueError(f"Unknown pack magic: {payload[:8]!r}")
+        (
+            version,
+            _flags,
+            self.dictionary_count,
+            self.code_count,
+            self.word_count,
+            self.dictionary_table_offset,
+            self.code_table_offset,
+            self.word_table_offset,
+            self.code_blob_offset,
+            self.word_blob_offset,
+            payload_size,
+        ) = struct.unpack_from("<IIIIIIIIIII", payload, 8)
+        if version != MyBoardDictPackV1Writer.VERSION:
+            raise ValueError(f"Unsupported pack version: {version}")
+        if payload_size != len(payload):
+            raise ValueError(f"payload_size mismatch: header={payload_size} actual={len(payload)}")
+        self.payload = payload
+        self.meta = meta or {}
+        self.toc: list[dict] = list((self.meta.get("pack") or {}).get("dictionaries") or [])
+
+    @classmethod
+    def from_file(cls, path: Path) -> MyBoardDictionaryPackReader:
+        payload, meta, _container = _read_mybdf(path.read_bytes())
+        return cls(payload, meta=meta)
+
+    @property
+    def dictionary_ids(self) -> list[str]:
+        return [str(d.get("dictionaryId")) for d in self.toc]
+
+    def _string(self, table_offset: int, blob_offset: int, index: int) -> bytes:
+        (offset,) = struct.unpack_from("<I", self.payload, table_offset + index * 4)
+        start = blob_offset + offset
+        return self.payload[start : self.payload.index(b"\0", start)]
+
+    def code(self, code_id: int) -> bytes:
+        return self._string(self.code_table_offset, self.code_blob_offset, code_id)
+
+    def word(self, word_id: int) -> str:
+        return self._string(self.word_table_offset, self.word_blob_offset, word_id).decode("utf-8")
+
+    def dictionary(self, key: str | int) -> _PackedDictionaryView:
+        index = key if isinstance(key, int) else self.dictionary_ids.index(key)
+        if not 0 <= index < self.dictionary_count:
+            raise ValueError(f"No dictionary #{index} in pack (count={self.dictionary_count})")
+        return _PackedDictionaryView(self, index)
+
+
+class _PackedDictionaryView(MyBoardDictionaryReader):
+    """One dictionary of a pack, with `MyBoardDictionaryReader` lookup semantics over the shared tables."""
+
+    def __init__(self, pack: MyBoardDictionaryPackReader, index: int) -> None:
+        self.pack = pack
+        self.payload = pack.payload
+        self.flags = 0
+        self.meta = pack.toc[index] if index < len(pack.toc) else {}
+        self.container = {}
+        self.section_spans = {}
+        self.sections = {}
+        self._mph = None
+        self._typo = None
+        self._swipe_groups = None
+        (self.code_count, self.entry_count, self.code_index_offset, self.entry_table_offset) = struct.unpack_from(
+            "<IIII", pack.payload, pack.dictionary_table_offset + index * 16
+        )
+
+    def code_at(self, index: int) -> bytes:
+        (code_id,) = struct.unpack_from("<I", self.payload, self.code_index_offset + index * self.CODE_INDEX_RECORD_SIZE)
+        return self.pack.code(code_id)
+
+    def entry(self, entry_index: int) -> tuple[str, int]:
+        word_id, weight = struct.unpack_from("<Ii", self.payload, self.entry_table_offset + entry_index * self.ENTRY_RECORD_SIZE)
+        return self.pack.word(word_id), weight
+
+
+class _TracedDictionaryReader(MyBoardDictionaryReader):
+    """
+    `MyBoardDictionaryReader` that records which payload bytes each lookup reads (benchmark only).
+
+    Counts the fixed-size fields and NUL-terminated strings the Kotlin reader reads from its ByteBuffer,
+    plus the distinct 4 KiB pages they fall on (what a memory-mapped payload would fault in).
+    """
+
+    PAGE_SIZE = 4096
+
+    def __init__(self, payload: bytes, *, meta: dict | None = None) -> None:
+        super().__init__(payload, meta=meta)
+        self.bytes_touched = 0
+        self.pages_touched: set[int] = set()
+        self._mph_offset = self.section_spans.get(CodeHashSectionBuilder.tag, (0, 0))[0]
+
+    def reset_touched(self) -> None:
+        self.bytes_touched = 0
+        self.pages_touched = set()
+
+    def _touch(self, offset: int, size: int) -> None:
+        self.bytes_touched += size
+        self.pages_touched.update(range(offset // self.PAGE_SIZE, (offset + size - 1) // self.PAGE_SIZE + 1))
+
+    def _cstring(self, start: int) -> bytes:
+        value = super()._cstring(start)
+        self._touch(start, len(value) + 1)
+        return value
+
+    def code_at(self, index: int) -> bytes:
+        self._touch(self.code_index_offset + index * self.CODE_INDEX_RECORD_SIZE, 4)
+        return super().code_at(index)
+
+    def code_record(self, index: int) -> tuple[int, int]:
+        self._touch(self.code_index_offset + index * self.CODE_INDEX_RECORD_SIZE + 4, 8)
+        return super().code_record(index)
+
+    def entry(self, entry_index: int) -> tuple[str, int]:
+        self._touch(self.entry_table_offset + entry_index * self.ENTRY_RECORD_SIZE, self.ENTRY_RECORD_SIZE)
+        return super().entry(entry_index)
+
+    def find_code_index_hashed(self, code: str) -> int | None:
+        if self._mph is not None and self.code_count > 0:
+            bucket_count, seed, displacement, _slot_to_index = self._mph
+            h = _code_hash64(code.encode("utf-8"), seed)
+            bucket = _mix64(h) % bucket_count
+            d = displacement[bucket]
+            slot = -d - 1 if d < 0 else _mph_slot(h, d, self.code_count)
+            self._touch(self._mph_offset + 16 + bucket * 4, 4)
+            self._touch(self._mph_offset + 16 + bucket_count * 4 + slot * 4, 4)
+        return super().find_code_index_hashed(code)
+
+
+class _ShardRouter:
+    """
+    Routes lookups to the readers that can hold a code: one reader for a single `.mybdict`,
+    or the shards listed in a `<stem>.shards.json` routing index (see `_write_dictionary_outputs`).
+    """
+
+    def __init__(self, shards: list[tuple[str, MyBoardDictionaryReader]]) -> None:
+        self.shards = sorted(shards, key=lambda s: s[0])
+        self._keys = [key for key, _ in self.shards]
+        self._by_key = dict(self.shards)
+        self._key_lengths = sorted({len(key) for key in self._keys})
+
+    @classmethod
+    def open(cls, path: Path, *, hot: bool = False, reader_cls: type[MyBoardDictionaryReader] = MyBoardDictionaryReader) -> _ShardRouter:
+        if path.name.endswith(".shards.json"):
+            index = json.loads(path.read_text(encoding="utf-8"))
+            return cls(
+                [(str(s["key"]), reader_cls.from_file(path.with_name(str(s["file"])), hot=hot)) for s in index["shards"]]
+            )
+        return cls([("", reader_cls.from_file(path, hot=hot))])
+
+    def for_code(self, code: str) -> list[MyBoardDictionaryReader]:
+        return [self._by_key[code[:n]] for n in self._key_lengths if n <= len(code) and code[:n] in self._by_key]
+
+    def for_prefix(self, prefix: str) -> list[MyBoardDictionaryReader]:
+        """Shards whose key is a proper prefix of `prefix`, then shards whose key starts with it (code order)."""
+        out = [self._by_key[prefix[:n]] for n in self._key_lengths if n < len(prefix) and prefix[:n] in self._by_key]
+        i = bisect.bisect_left(self._keys, prefix)
+        while i < len(self._keys) and self._keys[i].startswith(prefix):
+            out.append(self.shards[i][1])
+            i += 1
+        return out
+
+    def candidates(self, code: str, limit: int = 50) -> list[str]:
+        for reader in self.for_code(code):
+            out = reader.candidates(code, limit=limit)
+            if out:
+                return out
+        return []
+
+    def candidates_by_prefix(self, prefix: str, limit: int = 50) -> list[str]:
+        out: list[str] = []
+        for reader in self.for_prefix(prefix):
+            out.extend(reader.candidates_by_prefix(prefix, limit=limit - len(out)))
+            if len(out) >= limit:
+                break
+        return out
+
+
+def _percentile(sorted_values: list[int], q: float) -> int:
+    """Nearest-rank percentile of an ascending list."""
+    if not sorted_values:
+        return 0
+    return sorted_values[min(len(sorted_values) - 1, max(0, math.ceil(q * len(sorted_values)) - 1))]
+
+
+def _latency_histogram(latencies_ns: list[int]) -> list[tuple[int, int]]:
+    """Power-of-two microsecond buckets: [(upper_bound_us, count)], upper bound exclusive."""
+    counts: dict[int, int] = defaultdict(int)
+    for ns in latencies_ns:
+        counts[1 << max(0, (ns // 1000).bit_length())] += 1
+    return sorted(counts.items())
+
+
+def _synthetic_trace(router: _ShardRouter, *, count: int, seed: int) -> list[str]:
+    """Samples `count` codes with probability proportional to their best entry weight (clamped to >= 1)."""
+    codes: list[str] = []
+    cum_weights: list[int] = []
+    total = 0
+    for _key, reader in router.shards:
+        for i in range(reader.code_count):
+            first, n = reader.code_record(i)
+            best = max(reader.entry(first + j)[1] for j in range(n)) if n else 0
+            total += max(1, best)
+            codes.append(reader.code_at(i).decode("utf-8"))
+            cum_weights.append(total)
+    if not codes:
+        return []
+    return random.Random(seed).choices(codes, cum_weights=cum_weights, k=count)
+
+
+DERIVED_SOURCE = "derived:single_chars"
+
+
+def _tally_source(source_of: dict[tuple[str, str], list[tuple[int, str]]] | None, e: DictionaryEntry, source: str) -> None:
+    """Records which source produced an emitted entry (only when a report was requested)."""
+    if source_of is not None:
+        source_of[(e.code, e.word)].append((e.weight, source))
+
+
+def _analyze_dictionary(
+    reader: MyBoardDictionaryReader,
+    *,
+    top: int = 20,
+    source_of: dict[tuple[str, str], list[tuple[int, str]]] | None = None,
+) -> dict:
+    """
+    Size anatomy of one MYBDICT1 payload: bytes per region (zlib level 9 per region, so compressed sizes
+    are estimates that don't add up exactly to the stored payload), entries-per-code distribution,
+    top codes by entry count, largest words and, with `source_of`, per-source attribution.
+    """
+    payload = reader.payload
+    regions: list[tuple[str, int, int]] = [
+        ("header", 0, reader.code_index_offset),
+        ("code_index", reader.code_index_offset, reader.entry_table_offset),
+        ("entry_table", reader.entry_table_offset, reader.code_blob_offset),
+        ("code_blob", reader.code_blob_offset, reader.word_blob_offset),
+    ]
+    word_blob_end = min((offset for offset, _size in reader.section_spans.values()), default=len(payload))
+    regions.append(("word_blob", reader.word_blob_offset, word_blob_end))
+    for tag, (offset, size) in sorted(reader.section_spans.items(), key=lambda kv: kv[1][0]):
+        regions.append((f"section:{tag.decode('ascii')}", offset, offset + size))
+    if reader.section_spans:
+        last_end = max(offset + size for offset, size in reader.section_spans.values())
+        regions.append(("section_table", last_end, len(payload)))
+    sections = [
+        {
+            "name": name,
+            "bytes": end - start,
+            "compressedBytes": len(zlib.compress(payload[start:end], 9)),
+            "share": round((end - start) / max(1, len(payload)), 4),
+        }
+        for name, start, end in regions
+    ]
+
+    per_code: list[tuple[int, str]] = []
+    words: list[tuple[int, str, str]] = []
+    sources: dict[str, dict] = {}
+    source_words: dict[str, list[bytes]] = defaultdict(list)
+    for i in range(reader.code_count):
+        code = reader.code_at(i).decode("utf-8")
+        first, count = reader.code_record(i)
+        per_code.append((count, code))
+        for j in range(count):
+            word, weight = reader.entry(first + j)
+            size = len(word.encode("utf-8")) + 1
+            words.append((size, word, code))
+            if source_of is None:
+                continue
+            claims = source_of.get((code, word)) or []
+            match = next((k for k, (w, _src) in enumerate(claims) if w == weight), 0 if claims else None)
+            source = claims.pop(match)[1] if match is not None else "?"
+            stats = sources.setdefault(source, {"source": source, "entries": 0, "codes": 0, "bytes": 0})
+            stats["entries"] += 1
+            # Entry record + word string; the code record + code string go to the source of the code's top entry.
+            stats["bytes"] += reader.ENTRY_RECORD_SIZE + size
+            if j == 0:
+                stats["codes"] += 1
+                stats["bytes"] += reader.CODE_INDEX_RECORD_SIZE + len(code.encode("utf-8")) + 1
+            source_words[source].append(word.encode("utf-8") + b"\0")
+
+    distribution: dict[int, int] = defaultdict(int)
+    for count, _code in per_code:
+        distribution[1 << max(0, (count - 1).bit_length())] += 1
+    for stats in sources.values():
+        stats["wordBlobCompressedBytes"] = len(zlib.compress(b"".join(source_words[stats["source"]]), 9))
+
+    return {
+        "codes": reader.code_count,
+        "entries": reader.entry_count,
+        "payloadBytes": len(payload),
+        "container": dict(reader.container),
+        "sections": sections,
+        "entriesPerCode": [[upper, n] for upper, n in sorted(distribution.items())],
+        "topCodes": [[code, count] for count, code in sorted(per_code, key=lambda t: (-t[0], t[1]))[:top]],
+        "largestWords": [[word, code, size - 1] for size, word, code in sorted(words, key=lambda t: (-t[0], t[2], t[1]))[:top]],
+        "sources": sorted(sources.values(), key=lambda st: (-st["bytes"], st["source"])),
+    }
+
+
+def _print_analysis(report: dict, *, title: str, file=sys.stdout) -> None:
+    c = report["container"]
+    print(f"== {title}: codes={report['codes']} entries={report['entries']} payload={report['payloadBytes']}B", file=file)
+    if c:
+        print(
+            f"container: file={c['fileSize']}B header+meta={c['headerMetaSize']}B "
+            f"payload_stored={c['payloadStoredSize']}B compression={'zlib' if c['compression'] else 'none'}"
+            + (f" hot_stored={c['hotStoredSize']}B" if "hotStoredSize" in c else ""),
+            file=file,
+        )
+    print(f"{'region':<16} {'bytes':>12} {'zlib':>12} {'share':>7}", file=file)
+    for sec in report["sections"]:
+        print(f"{sec['name']:<16} {sec['bytes']:>12} {sec['compressedBytes']:>12} {sec['share']:>7.1%}", file=file)
+    if report["sources"]:
+        print(f"{'source':<40} {'entries':>10} {'codes':>8} {'bytes':>12} {'words_zlib':>12}", file=file)
+        for st in report["sources"]:
+            print(
+                f"{st['source']:<40} {st['entries']:>10} {st['codes']:>8} {st['bytes']:>12} {st['wordBlobCompressedBytes']:>12}",
+                file=file,
+            )
+    print("entries per code: " + " ".join(f"<={upper}:{n}" for upper, n in report["entriesPerCode"]), file=file)
+    print("top codes: " + " ".join(f"{code}={count}" for code, count in report["topCodes"]), file=file)
+    print("largest words: " + " ".join(f"{word}({size}B,{code})" for word, code, size in report["largestWords"]), file=file)
+
+
+class NgramPayloadV1Writer:
+    """
+    Compact bigram (next-word) payload v1 (MYBNGR01), stored in a MYBDF v1 container.
+
+    Header (little-endian):
+      magic[8] = b"MYBNGR01"
+      u32 version = 1
+      u32 flags = 0
+      u32 prev_count
+      u32 pair_count
+      u32 prev_index_offset
+      u32 pair_table_offset
+      u32 token_blob_offset
+      u32 payload_size
+      prev_index[prev_count] of (sorted by prev token UTF-8 bytes):
+        u32 token_offset
+        u32 first_pair_index
+        u32 pair_count_for_prev
+      pair_table[pair_count] of (per prev, sorted by cost asc then token):
+        u32 next_token_offset
+        u16 cost (quantized -log2(P(next|prev)) * COST_SCALE, lower is better)
+        u16 reserved = 0
+      token_blob: NUL-terminated utf-8 strings (interned; shared by prev and next tokens)
+    """
+
+    MAGIC = b"MYBNGR01"
+    VERSION = 1
+    FLAGS = 0
+    COST_SCALE = 256
+
+    def encode(self, table: dict[str, list[tuple[str, int]]]) -> bytes:
+        prevs = sorted(table.keys(), key=lambda t: t.encode("utf-8"))
+
+        token_offsets: dict[str, int] = {}
+        token_blob = bytearray()
+
+        def _intern(token: str) -> int:
+            off = token_offsets.get(token)
+            if off is None:
+                off = len(token_blob)
+                token_offsets[token] = off
+                token_blob.extend(token.encode("utf-8") + b"\0")
+            return off
+
+        prev_index = bytearray()
+        pair_table = bytearray()
+        first = 0
+        for prev in prevs:
+            pairs = table[prev]
+            prev_index += struct.pack("<III", _intern(prev), first, len(pairs))
+            for nxt, cost in pairs:
+                pair_table += struct.pack("<IHH", _intern(nxt), cost, 0)
+            first += len(pairs)
+
+        prev_index_offset = 8 + 4 * 8
+        pair_table_offset = prev_index_offset + len(prev_index)
+        token_blob_offset = pair_table_offset + len(pair_table)
+        payload_size = token_blob_offset + len(token_blob)
+
+        out = bytearray()
+        out += self.MAGIC
+        out += struct.pack(
+            "<IIIIIIII",
+            self.VERSION,
+            self.FLAGS,
+            len(prevs),
+            first,
+            prev_index_offset,
+            pair_table_offset,
+            token_blob_offset,
+            payload_size,
+        )
+        out += prev_index
+        out += pair_table
+        out += token_blob
+        if len(out) != payload_size:
+            raise RuntimeError(f"payload_size mismatch: header={payload_size} actual={len(out)}")
+        return bytes(out)
+
+
+class BigramCounter:
+    """
+    Streaming bigram counter with bounded memory (lossy counting, Manku & Motwani).
+
+    Observations are grouped into buckets of `bucket_width` (default `max_pairs`). A pair first seen in
+    bucket `b` is stored as `(count=1, delta=b-1)`; at each bucket boundary pairs with `count + delta <= b` are
+    dropped. A boundary is also forced whenever more than `max_pairs` distinct pairs are held. Stored counts
+    never exceed the true count and undercount it by at most `bucket - 1`, independent of arrival order.
+
+    Per-prev totals are lossy-counted on the same buckets, so their memory is bounded too. A prev total is
+    only dropped once every pair of that prev has been dropped, and it counts every observation of the prev
+    since it was (re)inserted, including those that went to evicted pairs: conditional probabilities are
+    normalised by the observed total, not by the sum of the surviving pairs. Totals are exact while no
+    prev has been evicted and otherwise undercount by at most `bucket - 1`, like the pairs.
+    """
+
+    def __init__(self, *, max_pairs: int, bucket_width: int | None = None) -> None:
+        self.max_pairs = max(1, max_pairs)
+        self.bucket_width = max(1, bucket_width if bucket_width is not None else self.max_pairs)
+        self.pairs: dict[tuple[str, str], int] = {}
+        self.prev_totals: dict[str, int] = {}
+        self.bucket = 1
+        self.evicted_pairs = 0
+        self._deltas: dict[tuple[str, str], int] = {}
+        self._prev_deltas: dict[str, int] = {}
+        self._in_bucket = 0
+
+    def add(self, prev: str, nxt: str) -> None:
+        total = self.prev_totals.get(prev)
+        if total is None:
+            self.prev_totals[prev] = 1
+            self._prev_deltas[prev] = self.bucket - 1
+        else:
+            self.prev_totals[prev] = total + 1
+        key = (prev, nxt)
+        count = self.pairs.get(key)
+        if count is None:
+            self.pairs[key] = 1
+            self._deltas[key] = self.bucket - 1
+        else:
+            self.pairs[key] = count + 1
+        self._in_bucket += 1
+        if self._in_bucket >= self.bucket_width:
+            self._end_bucket()
+        while len(self.pairs) > self.max_pairs or len(self.prev_totals) > self.max_pairs:
+            self._end_bucket()
+
+    def _end_bucket(self) -> None:
+        bucket = self.bucket
+        deltas = self._deltas
+        doomed = [k for k, c in self.pairs.items() if c + deltas[k] <= bucket]
+        for k in doomed:
+            del self.pairs[k]
+            del deltas[k]
+        self.evicted_pairs += len(doomed)
+        # A prev is inserted no later than its pairs and counts all of their observations, so when its total
+        # falls under the threshold every pair of it has fallen under it as well.
+        prev_deltas = self._prev_deltas
+        for prev in [p for p, c in self.prev_totals.items() if c + prev_deltas[p] <= bucket]:
+            del self.prev_totals[prev]
+            del prev_deltas[prev]
+        self.bucket += 1
+        self._in_bucket = 0
+
+    def table(self, *, min_count: int, top_k: int) -> dict[str, list[tuple[str, int]]]:
+        """Returns prev -> [(next, cost)] with quantized conditional costs, pruned by count and per-prev top-k."""
+        grouped: dict[str, list[tuple[str, int]]] = defaultdict(list)
+        for (prev, nxt), c in self.pairs.items():
+            if c >= min_count:
+                grouped[prev].append((nxt, c))
+
+        out: dict[str, list[tuple[str, int]]] = {}
+        for prev, items in grouped.items():
+            items.sort(key=lambda kv: (-kv[1], kv[0]))
+            total = self.prev_totals[prev]
+            out[prev] = [(nxt, _quantize_cost(c / total)) for nxt, c in items[:top_k]]
+        return out
+
+
+def _quantize_cost(probability: float) -> int:
+    if probability <= 0.0:
+        return 0xFFFF
+    return min(0xFFFF, max(0, round(-math.log2(probability) * NgramPayloadV1Writer.COST_SCALE)))
+
+
+def _iter_corpus_lines(paths: list[Path], *, skip_comments: bool = False) -> Iterable[str]:
+    """Non-empty stripped lines; `#` lines are only skipped with `skip_comments` (raw text may start with `#`)."""
+    for path in paths:
+        with _open_source_text(path) as f:
+            for raw in f:
+                line = raw.strip()
+                if line and not (skip_comments and line.startswith("#")):
+                    yield line
+
+
+class _LongestMatchTokenizer:
+    """Forward maximum matching over a word set (for corpora without whitespace, e.g. Chinese)."""
+
+    def __init__(self, words: Iterable[str], *, max_len: int = 8) -> None:
+        self.words = {w for w in words if 1 < len(w) <= max_len}
+        self.max_len = max(1, max((len(w) for w in self.words), default=1))
+
+    def tokenize(self, line: str) -> list[str]:
+        tokens: list[str] = []
+        for chunk in line.split():
+            i = 0
+            while i < len(chunk):
+                for n in range(min(self.max_len, len(chunk) - i), 0, -1):
+                    piece = chunk[i : i + n]
+                    if n == 1 or piece in self.words:
+                        tokens.append(piece)
+                        i += n
+                        break
+        return tokens
 
 
 class CodeScheme:
@@ -415,6 +2118,66 @@ def _canonicalize_code(code: str, *, scheme: str) -> str:
     raise ValueError(f"Unknown code scheme: {scheme}")
 
 
+def _query_code(code: str, meta: dict) -> str:
+    """A typed query code (e.g. "xi'an", "Ni Hao") in the dictionary's canonical form, per its `codeScheme` meta."""
+    return _canonicalize_code(code, scheme=str(meta.get("codeScheme") or CodeScheme.PINYIN_FULL))
+
+
+class _CanonicalCodeCache(dict):
+    """raw code -> canonical code, computed on first lookup (the same raw code recurs across many words)."""
+
+    def __init__(self, scheme: str) -> None:
+        super().__init__()
+        self.scheme = scheme
+
+    def __missing__(self, raw: str) -> str:
+        code = self[raw] = _canonicalize_code(raw, scheme=self.scheme)
+        return code
+
+
+def _canonicalize_codes(codes: list[str], *, cache: _CanonicalCodeCache) -> list[str]:
+    """Column-wise `_canonicalize_code`; the per-row loop runs in `map`, Python code only on cache misses."""
+    if len(cache) > 1 << 18:
+        cache.clear()
+    return list(map(cache.__getitem__, codes))
+
+
+def _canonical_batch(batch: EntryBatch, *, cache: _CanonicalCodeCache) -> tuple[list[DictionaryEntry], list[str]]:
+    """
+    Canonical entries of one parsed batch plus their raw codes (aligned), dropping rows whose word or
+    canonical code is empty. Clean batches (the common case) are converted without a per-row Python loop.
+    """
+    words = list(map(str.strip, batch.words))
+    codes = _canonicalize_codes(batch.codes, cache=cache)
+    if all(words) and all(codes):
+        return list(map(DictionaryEntry, words, codes, batch.weights)), batch.codes
+    keep = [i for i, (word, code) in enumerate(zip(words, codes, strict=True)) if word and code]
+    return [DictionaryEntry(words[i], codes[i], batch.weights[i]) for i in keep], [batch.codes[i] for i in keep]
+
+
+def _collect_single_chars(
+    char_best: dict[str, dict[str, int]],
+    entries: list[DictionaryEntry],
+    raw_codes: list[str],
+    *,
+    cache: _CanonicalCodeCache,
+) -> None:
+    """Tracks the best derived weight per (syllable code, char) for words with one raw syllable per character."""
+    for e, raw_code in zip(entries, raw_codes, strict=True):
+        syllables = raw_code.split()
+        if len(syllables) != len(e.word):
+            continue
+        # Normalize derived weight: use scaled weight so long phrases don't dominate.
+        derived_weight = int(e.weight / len(e.word))
+        for ch, syl_code in zip(e.word, _canonicalize_codes(syllables, cache=cache), strict=True):
+            if not syl_code or ch.isspace():
+                continue
+            best = char_best[syl_code]
+            prev = best.get(ch)
+            if prev is None or derived_weight > prev:
+                best[ch] = derived_weight
+
+
 def _to_locale_tag_underscore(tag: str) -> str:
     """
     Normalizes a locale tag into underscore style used by existing assets (e.g. zh_CN).
@@ -474,19 +2237,408 @@ def _parser_registry() -> dict[str, DictionaryFormatParser]:
     return {p.format_id: p for p in parsers}
 
 
+def _section_builders(args: argparse.Namespace) -> list[PayloadSectionBuilder]:
+    builders: list[PayloadSectionBuilder] = []
+    if args.code_hash:
+        builders.append(CodeHashSectionBuilder())
+    if args.typo_layout is not None:
+        builders.append(
+            TypoVariantSectionBuilder(
+                _load_key_adjacency(args.typo_layout),
+                max_distance=int(args.typo_max_distance),
+                fan_out=int(args.typo_fan_out),
+            )
+        )
+    if args.swipe_layout is not None:
+        builders.append(SwipeSignatureSectionBuilder(_load_key_centers(args.swipe_layout), per_group=int(args.swipe_per_group)))
+    return builders
+
+
+def _select_hot_entries(
+    entries: list[DictionaryEntry],
+    *,
+    limit: int,
+    min_weight: int | None,
+) -> list[DictionaryEntry]:
+    """Top `limit` entries by (-weight, code, word); deterministic for identical inputs."""
+    candidates = entries if min_weight is None else [e for e in entries if e.weight >= min_weight]
+    return sorted(candidates, key=lambda e: (-e.weight, e.code, e.word))[:limit]
+
+
+@dataclasses.dataclass(frozen=True)
+class PruningPolicy:
+    max_entries_per_code: int = 0
+    min_weight: int | None = None
+    min_weight_percentile: float | None = None
+    source_quotas: dict[str, int] = dataclasses.field(default_factory=dict)
+    max_entries: int = 0
+    max_bytes: int = 0
+
+    @property
+    def active(self) -> bool:
+        return bool(
+            self.max_entries_per_code
+            or self.min_weight is not None
+            or self.min_weight_percentile is not None
+            or self.source_quotas
+            or self.max_entries
+            or self.max_bytes
+        )
+
+
+class _RankedItem:
+    """Heap item ordered worst-first, so a bounded `heapq` evicts the lowest-ranked entry."""
+
+    __slots__ = ("rank", "item")
+
+    def __init__(self, rank: tuple, item: tuple[DictionaryEntry, str]) -> None:
+        self.rank = rank
+        self.item = item
+
+    def __lt__(self, other: _RankedItem) -> bool:
+        return self.rank > other.rank
+
+
+class EntryPruner:
+    """
+    Applies a `PruningPolicy` to (entry, source) pairs, keeping the highest-ranked entries.
+
+    Rank is (-weight, code, word, source), so results are deterministic for identical inputs.
+    Stages, in order:
+      1. `min_weight`: per-entry filter
+      2. per-source quota: one bounded heap per source that has a quota
+      3. `max_entries_per_code`: one bounded heap per code (same order as the payload's entry order)
+      4. `min_weight_percentile`: threshold from the weights that survived 1-3
+      5. `max_entries` / `max_bytes`: the best-ranked prefix that fits (bytes as encoded: 12 + code per code,
+         8 + word per entry)
+    Every dropped entry is recorded with the stage that dropped it.
+
+    Only stages 1-2 pass entries through as they arrive (quota'd sources are emitted at the end). Stages 3-5
+    need every surviving entry, so with any of them active all survivors are buffered before the first yield.
+    """
+
+    def __init__(self, policy: PruningPolicy) -> None:
+        self.policy = policy
+        self.dropped: list[tuple[DictionaryEntry, str, str]] = []
+        self.seen = 0
+        self.kept = 0
+
+    @staticmethod
+    def _rank(item: tuple[DictionaryEntry, str]) -> tuple:
+        e, source = item
+        return (-e.weight, e.code, e.word, source)
+
+    def _bounded(self, heaps: dict, key, item: tuple[DictionaryEntry, str], limit: int, reason: str) -> None:
+        heap = heaps[key]
+        heapq.heappush(heap, _RankedItem(self._rank(item), item))
+        if len(heap) > limit:
+            worst = heapq.heappop(heap).item
+            self.dropped.append((worst[0], worst[1], reason))
+
+    def prune(self, labeled: Iterable[tuple[DictionaryEntry, str]]) -> Iterable[tuple[DictionaryEntry, str]]:
+        policy = self.policy
+        buffered = bool(
+            policy.max_entries_per_code
+            or policy.min_weight_percentile is not None
+            or policy.max_entries
+            or policy.max_bytes
+        )
+        quota_heaps: dict[str, list[_RankedItem]] = defaultdict(list)
+        items: list[tuple[DictionaryEntry, str]] = []
+        for item in labeled:
+            self.seen += 1
+            e, source = item
+            if policy.min_weight is not None and e.weight < policy.min_weight:
+                self.dropped.append((e, source, "min_weight"))
+                continue
+            quota = policy.source_quotas.get(source)
+            if quota:
+                self._bounded(quota_heaps, source, item, quota, "source_quota")
+            elif buffered:
+                items.append(item)
+            else:
+                self.kept += 1
+                yield item
+        quota_items = sorted((h.item for heap in quota_heaps.values() for h in heap), key=self._rank)
+        del quota_heaps
+        if not buffered:
+            self.kept += len(quota_items)
+            yield from quota_items
+            return
+        items += quota_items
+        del quota_items
+
+        if policy.max_entries_per_code:
+            code_heaps: dict[str, list[_RankedItem]] = defaultdict(list)
+            for item in items:
+                self._bounded(code_heaps, item[0].code, item, policy.max_entries_per_code, "max_entries_per_code")
+            items = [h.item for heap in code_heaps.values() for h in heap]
+
+        if policy.min_weight_percentile is not None and items:
+            weights = sorted(e.weight for e, _ in items)
+            threshold = weights[min(len(weights) - 1, max(0, math.ceil(policy.min_weight_percentile / 100.0 * len(weights)) - 1))]
+            kept: list[tuple[DictionaryEntry, str]] = []
+            for item in items:
+                if item[0].weight < threshold:
+                    self.dropped.append((item[0], item[1], "min_weight_percentile"))
+                else:
+                    kept.append(item)
+            items = kept
+
+        items.sort(key=self._rank)
+        if policy.max_entries and len(items) > policy.max_entries:
+            self.dropped.extend((e, source, "max_entries") for e, source in items[policy.max_entries :])
+            items = items[: policy.max_entries]
+        if policy.max_bytes:
+            total = 0
+            codes: set[str] = set()
+            for n, (e, _source) in enumerate(items):
+                cost = MyBoardDictionaryReader.ENTRY_RECORD_SIZE + len(e.word.encode("utf-8")) + 1
+                if e.code not in codes:
+                    cost += MyBoardDictionaryReader.CODE_INDEX_RECORD_SIZE + len(e.code.encode("utf-8")) + 1
+                if total + cost > policy.max_bytes:
+                    self.dropped.extend((e2, s2, "max_bytes") for e2, s2 in items[n:])
+                    items = items[:n]
+                    break
+                total += cost
+                codes.add(e.code)
+
+        self.kept = len(items)
+        yield from items
+
+    def print_summary(self, *, file=sys.stderr) -> None:
+        by_reason: dict[str, int] = defaultdict(int)
+        by_source: dict[str, int] = defaultdict(int)
+        for _e, source, reason in self.dropped:
+            by_reason[reason] += 1
+            by_source[source] += 1
+        print(f"pruned: seen={self.seen} kept={self.kept} dropped={len(self.dropped)}", file=file)
+        for reason, n in sorted(by_reason.items()):
+            print(f"  reason {reason}: {n}", file=file)
+        for source, n in sorted(by_source.items()):
+            print(f"  source {source}: {n}", file=file)
+
+    def write_dropped(self, out_path: Path) -> None:
+        out_path.parent.mkdir(parents=True, exist_ok=True)
+        with out_path.open("w", encoding="utf-8") as f:
+            for e, source, reason in sorted(self.dropped, key=lambda d: (self._rank((d[0], d[1])), d[2])):
+                f.write(f"{e.word}\t{e.code}\t{e.weight}\t{source}\t{reason}\n")
+
+
+def _shard_key(code: str, shard_by: str) -> str:
+    if shard_by == "initial":
+        return code[:1]
+    if shard_by == "prefix2":
+        return code[:2]
+    raise ValueError(f"Unknown shard mode: {shard_by}")
+
+
+def _shard_path(out_path: Path, key: str) -> Path:
+    # Canonical codes are ASCII (a-z) for PINYIN_FULL; escape anything else to keep file names portable.
+    safe = "".join(ch if ch.isascii() and ch.isalnum() else f"_{ord(ch):x}" for ch in key)
+    return out_path.with_name(f"{out_path.stem}.{safe}{out_path.suffix}")
+
+
+def _shard_index_path(out_path: Path) -> Path:
+    return out_path.with_name(f"{out_path.stem}.shards.json")
+
+
+def _check_meta_output(args: argparse.Namespace) -> None:
+    # DictionarySpec.assetPath points the app at one .mybdict; a sharded build never writes `--output` itself.
+    if args.meta_output is not None and args.shard_by != "none":
+        raise SystemExit("--meta-output cannot be combined with --shard-by (sharded builds do not write --output)")
+
+
+def _write_dictionary_outputs(
+    args: argparse.Namespace,
+    entries: Iterable[DictionaryEntry],
+    *,
+    meta: dict,
+    languages: list[str],
+) -> list[Path]:
+    """
+    Encodes canonical entries and writes `args.output`; returns the written dictionary files.
+
+    With `--shard-by`, writes one `.mybdict` per code prefix (`<stem>.<key>.mybdict`, each with its own CRCs)
+    plus a routing index `<stem>.shards.json` mapping code-prefix ranges to shard files.
+    A lookup for typed prefix `p` needs the shards whose key starts with `p` or is a prefix of `p`.
+    """
+    encoder = MyBoardDictPayloadV1Writer()
+    writer = MyBoardDictionaryFileV1Writer()
+    dict_version = _parse_semver(args.dict_version)
+    shard_by = str(args.shard_by)
+    hot_entries = max(0, int(args.hot_entries))
+
+    def _emit(part: Iterable[DictionaryEntry], out_path: Path, file_meta: dict, hot: list[DictionaryEntry]) -> int:
+        hot_payload = None
+        if hot:
+            part = list(part)
+            full_codes = sorted({e.code for e in part})
+            hot_payload = encoder.encode(hot, section_builders=[HotCodeMapSectionBuilder(full_codes)])
+            file_meta = dict(file_meta)
+            file_meta["hotPayload"] = {"entryCount": len(hot)}
+        return writer.write(
+            payload_uncompressed=encoder.iter_encode(part, section_builders=_section_builders(args)),
+            out_path=out_path,
+            dict_version=dict_version,
+            meta=file_meta,
+            languages=languages,
+            compression=args.compress,
+            hot_payload=hot_payload,
+        )
+
+    if shard_by == "none":
+        hot: list[DictionaryEntry] = []
+        if hot_entries > 0:
+            entries = list(entries)
+            hot = _select_hot_entries(entries, limit=hot_entries, min_weight=args.hot_min_weight)
+        _emit(entries, args.output, meta, hot)
+        return [args.output]
+
+    partitions: dict[str, list[DictionaryEntry]] = defaultdict(list)
+    for e in entries:
+        partitions[_shard_key(e.code, shard_by)].append(e)
+    # The hot set is the top N of the whole dictionary; each shard stores the part of it that falls in the shard.
+    hot_by_key: dict[str, list[DictionaryEntry]] = defaultdict(list)
+    if hot_entries > 0:
+        all_entries = list(itertools.chain.from_iterable(partitions.values()))
+        for e in _select_hot_entries(all_entries, limit=hot_entries, min_weight=args.hot_min_weight):
+            hot_by_key[_shard_key(e.code, shard_by)].append(e)
+        del all_entries
+
+    shards: list[dict] = []
+    for key in sorted(partitions.keys()):
+        part = partitions.pop(key)
+        codes = sorted({e.code for e in part})
+        shard_path = _shard_path(args.output, key)
+        shard_meta = dict(meta)
+        shard_meta["shard"] = {"shardBy": shard_by, "key": key}
+        crc_payload = _emit(part, shard_path, shard_meta, hot_by_key.pop(key, []))
+        shards.append(
+            {
+                "key": key,
+                "firstCode": codes[0],
+                "lastCode": codes[-1],
+                "file": shard_path.name,
+                "codeCount": len(codes),
+                "entryCount": len(part),
+                "crc32Payload": crc_payload,
+                "fileSize": shard_path.stat().st_size,
+            }
+        )
+
+    index = {
+        "version": 1,
+        "dictionaryId": meta.get("dictionaryId"),
+        "shardBy": shard_by,
+        "shards": shards,
+    }
+    index_path = _shard_index_path(args.output)
+    index_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = index_path.with_suffix(index_path.suffix + ".tmp")
+    try:
+        with tmp.open("w", encoding="utf-8") as f:
+            json.dump(index, f, ensure_ascii=False, indent=2)
+            f.write("\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, index_path)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+    _fsync_dir(index_path.parent)
+    return [args.output.with_name(s["file"]) for s in shards]
+
+
+def _report_outputs(paths: list[Path], source_of: dict[tuple[str, str], list[tuple[int, str]]]) -> None:
+    for path in paths:
+        report = _analyze_dictionary(MyBoardDictionaryReader.from_file(path), source_of=source_of)
+        _print_analysis(report, title=str(path), file=sys.stderr)
+
+
+def _pruning_policy(args: argparse.Namespace, sources: list[str]) -> PruningPolicy:
+    quotas_raw = [s.strip() for s in str(args.source_quota).split(",") if s.strip()]
+    if len(quotas_raw) == 1:
+        quotas_raw = quotas_raw * len(sources)
+    if quotas_raw and len(quotas_raw) != len(sources):
+        raise SystemExit(f"--source-quota count mismatch: inputs={len(sources)} quotas={len(quotas_raw)}")
+    percentile = args.min_weight_percentile
+    if percentile is not None and not 0.0 <= percentile <= 100.0:
+        raise SystemExit("--min-weight-percentile must be within 0..100")
+    return PruningPolicy(
+        max_entries_per_code=max(0, int(args.max_entries_per_code)),
+        min_weight=args.min_weight,
+        min_weight_percentile=percentile,
+        source_quotas={src: int(q) for src, q in zip(sources, quotas_raw or ["0"] * len(sources), strict=True) if int(q) > 0},
+        max_entries=max(0, int(args.max_entries)),
+        max_bytes=max(0, int(args.max_bytes)),
+    )
+
+
+def _write_converted(
+    args: argparse.Namespace,
+    batches: Iterable[tuple[list[DictionaryEntry], str]],
+    *,
+    meta: dict,
+    languages: list[str],
+    sources: list[str],
+) -> None:
+    """
+    Shared tail of `convert`/`convert-multi`: pruning, source tally for `--report`, writing.
+
+    `batches` are (canonical entries, source label) pairs. Without pruning or `--report` they are chained
+    straight into the encoder; only those two features need a per-entry (entry, source) stream.
+    """
+    policy = _pruning_policy(args, sources)
+    pruner = EntryPruner(policy) if policy.active else None
+    source_of: dict[tuple[str, str], list[tuple[int, str]]] | None = defaultdict(list) if args.report else None
+
+    if pruner is None and source_of is None:
+        entries: Iterable[DictionaryEntry] = itertools.chain.from_iterable(batch for batch, _ in batches)
+    else:
+        labeled: Iterable[tuple[DictionaryEntry, str]] = ((e, source) for batch, source in batches for e in batch)
+        if pruner is not None:
+            labeled = pruner.prune(labeled)
+
+        def _entries() -> Iterable[DictionaryEntry]:
+            for e, source in labeled:
+                _tally_source(source_of, e, source)
+                yield e
+
+        entries = _entries()
+
+    written = _write_dictionary_outputs(args, entries, meta=meta, languages=languages)
+    if pruner is not None:
+        pruner.print_summary(file=sys.stderr)
+        if args.pruned_output is not None:
+            pruner.write_dropped(args.pruned_output)
+    if source_of is not None:
+        _report_outputs(written, source_of)
+
+
 def _cmd_convert(argv: list[str]) -> int:
     p = argparse.ArgumentParser(
         prog="dict_tool.py convert",
         description="Convert source dictionaries into MyBoard .mybdict (MYBDF v1) files.",
     )
-    p.add_argument("--input", required=True, type=Path, help="Input dictionary file.")
+    p.add_argument(
+        "--input",
+        required=True,
+        type=Path,
+        help="Input dictionary file; may be .gz/.xz/.bz2/.zst compressed or an archive member (<bundle.tar.gz|.zip>::<member>).",
+    )
     p.add_argument("--format", required=True, help="Input format id (e.g. rime_dict_yaml).")
     p.add_argument("--output", required=True, type=Path, help="Output compact dictionary file.")
     p.add_argument("--dictionary-id", required=True, help="Dictionary id (matches DictionarySpec.dictionaryId).")
     p.add_argument("--name", default=None, help="Optional display name.")
     p.add_argument("--languages", default="", help="Comma-separated BCP-47 tags (e.g. zh-CN,en).")
     p.add_argument("--dict-version", default="1.0.0", help="Semantic version a.b.c (stored in MYBDF header).")
-    p.add_argument("--meta-output", default=None, type=Path, help="Optional output DictionarySpec JSON path.")
+    p.add_argument(
+        "--meta-output",
+        default=None,
+        type=Path,
+        help="Optional output DictionarySpec JSON path (not with --shard-by: assetPath names a single .mybdict).",
+    )
     p.add_argument("--asset-path", default=None, help='Optional assetPath in DictionarySpec (e.g. "dictionary/base.mybdict").')
     p.add_argument("--layout-ids", default="", help="Comma-separated allowed layout ids (DictionarySpec.layoutIds).")
     p.add_argument("--code-scheme", default=CodeScheme.PINYIN_FULL, help="Canonical code scheme for payload (e.g. PINYIN_FULL).")
@@ -512,13 +2664,84 @@ def _cmd_convert(argv: list[str]) -> int:
         default="zlib",
         help="Compression for output file (default: zlib).",
     )
+    p.add_argument(
+        "--code-hash",
+        action="store_true",
+        help="Embed a minimal perfect hash (MPH1 section) over canonical codes for O(1) exact lookup.",
+    )
+    p.add_argument(
+        "--typo-layout",
+        default=None,
+        type=Path,
+        help="Embed a typo-tolerance index (TYP1 section) using key adjacency from this layout (e.g. assets/layouts/qwerty.json).",
+    )
+    p.add_argument("--typo-max-distance", default="1", help="Max edits (neighbor-key substitution or omitted key) per variant (default: 1).")
+    p.add_argument(
+        "--typo-fan-out",
+        default="16",
+        help="Max typo variants stored per code, spread over key positions; 0 = all (default: 16).",
+    )
+    p.add_argument(
+        "--swipe-layout",
+        default=None,
+        type=Path,
+        help="Embed a swipe path signature index (SWP1 section) using key centers from this layout (e.g. assets/layouts/qwerty.json).",
+    )
+    p.add_argument("--swipe-per-group", default="0", help="Keep at most N entries per (first, last) key group (default: 0=all).")
+    p.add_argument(
+        "--hot-entries",
+        default="0",
+        help=(
+            "Also store a small hot payload with the top N entries by weight, loadable before the full payload; "
+            "with --shard-by each shard stores its part of the top N (default: 0=off)."
+        ),
+    )
+    p.add_argument(
+        "--hot-min-weight",
+        default=None,
+        type=int,
+        help="Only entries with weight >= this value are eligible for the hot payload.",
+    )
+    p.add_argument(
+        "--shard-by",
+        choices=["none", "initial", "prefix2"],
+        default="none",
+        help="Split output into per-prefix shard files plus a routing index (default: none).",
+    )
+    p.add_argument("--max-entries-per-code", default="0", help="Prune: keep at most N entries per code (default: 0=off).")
+    p.add_argument("--min-weight", default=None, type=int, help="Prune: drop entries with weight below this value.")
+    p.add_argument(
+        "--min-weight-percentile",
+        default=None,
+        type=float,
+        help="Prune: drop entries weighing less than the P-th percentile (0-100) of the remaining weights.",
+    )
+    p.add_argument(
+        "--source-quota",
+        default="",
+        help="Prune: max entries kept per input file; one value for all inputs or one per input (0=unlimited).",
+    )
+    p.add_argument("--max-entries", default="0", help="Prune: total entry budget (default: 0=off).")
+    p.add_argument(
+        "--max-bytes",
+        default="0",
+        help="Prune: budget for uncompressed code index + entry table + code/word blobs in bytes (default: 0=off).",
+    )
+    p.add_argument("--pruned-output", default=None, type=Path, help="Write every pruned entry (TSV: word, code, weight, source, reason).")
+    p.add_argument(
+        "--report",
+        action="store_true",
+        help="Print a payload anatomy report (bytes per region and per source, see the analyze command) to stderr.",
+    )
     args = p.parse_args(argv)
+    _check_meta_output(args)
 
     reg = _parser_registry()
     parser = reg.get(args.format)
     if parser is None:
         available = ", ".join(sorted(reg.keys()))
         raise SystemExit(f"Unknown format: {args.format} (available: {available})")
+    _check_source(args.input)
 
     languages = [s.strip() for s in str(args.languages).split(",") if s.strip()]
     locale_tags = [_to_locale_tag_underscore(s) for s in languages]
@@ -539,52 +2762,28 @@ def _cmd_convert(argv: list[str]) -> int:
     derive_single_chars = bool(args.derive_single_chars) or scheme == CodeScheme.PINYIN_FULL
     single_chars_per_code = max(0, int(args.single_chars_per_code))
 
-    def _iter_canonical() -> Iterable[DictionaryEntry]:
+    def _iter_canonical() -> Iterable[tuple[list[DictionaryEntry], str]]:
         # For each single-syllable code, keep best-weight single characters.
         # Keeps the output size bounded (unlike emitting per-character entries for every word).
         char_best: dict[str, dict[str, int]] = defaultdict(dict)
-
-        for e in parser.parse(args.input):
-            raw_code = (e.code or "").strip()
-            word = (e.word or "").strip()
-            code = _canonicalize_code(raw_code, scheme=scheme)
-            if not code or not word:
-                continue
-
-            if derive_single_chars and single_chars_per_code > 0 and scheme == CodeScheme.PINYIN_FULL:
-                syllables = [s for s in raw_code.split() if s]
-                if syllables and len(syllables) == len(word):
-                    for ch, syl in zip(word, syllables, strict=True):
-                        ch = ch.strip()
-                        if not ch or len(ch) != 1:
-                            continue
-                        syl_code = _canonicalize_code(syl, scheme=scheme)
-                        if not syl_code:
-                            continue
-                        # Normalize derived weight: use scaled weight so long phrases don't dominate.
-                        derived_weight = int(e.weight / max(1, len(word)))
-                        prev = char_best[syl_code].get(ch)
-                        if prev is None or derived_weight > prev:
-                            char_best[syl_code][ch] = derived_weight
-
-            yield DictionaryEntry(word=word, code=code, weight=e.weight)
-
-        if derive_single_chars and single_chars_per_code > 0 and scheme == CodeScheme.PINYIN_FULL:
+        code_cache = _CanonicalCodeCache(scheme)
+        derive = derive_single_chars and single_chars_per_code > 0 and scheme == CodeScheme.PINYIN_FULL
+        source = str(args.input)
+        for batch in parser.parse_batches(args.input):
+            entries, raw_codes = _canonical_batch(batch, cache=code_cache)
+            if derive:
+                _collect_single_chars(char_best, entries, raw_codes, cache=code_cache)
+            yield entries, source
+
+        if derive:
+            derived: list[DictionaryEntry] = []
             for syl_code, m in char_best.items():
                 # Sort by weight desc then char for stable output.
                 items = sorted(m.items(), key=lambda kv: (-kv[1], kv[0]))
-                for ch, w in items[:single_chars_per_code]:
-                    yield DictionaryEntry(word=ch, code=syl_code, weight=w)
+                derived.extend(DictionaryEntry(word=ch, code=syl_code, weight=w) for ch, w in items[:single_chars_per_code])
+            yield derived, DERIVED_SOURCE
 
-    payload = MyBoardDictPayloadV1Writer().encode(_iter_canonical())
-    MyBoardDictionaryFileV1Writer().write(
-        payload_uncompressed=payload,
-        out_path=args.output,
-        dict_version=_parse_semver(args.dict_version),
-        meta=meta,
-        languages=languages,
-        compression=args.compress,
-    )
+    _write_converted(args, _iter_canonical(), meta=meta, languages=languages, sources=[str(args.input)])
 
     if args.meta_output is not None:
         asset_path = args.asset_path or f"dictionary/{args.output.name}"
@@ -607,12 +2806,12 @@ def _cmd_convert(argv: list[str]) -> int:
 
 
 def _guess_format_id(path: Path) -> str:
-    name = path.name.lower()
+    name = _source_name(path).lower()
     if name.endswith(".dict.yaml") or name.endswith(".yaml"):
         return RimeDictYamlParser.format_id
     if name.endswith(".txt"):
         return RimeTableTxtParser.format_id
-    raise ValueError(f"Cannot guess format for: {path}")
+    raise SystemExit(f"Cannot guess format for: {path} (pass --formats)")
 
 
 def _cmd_convert_multi(argv: list[str]) -> int:
@@ -620,7 +2819,11 @@ def _cmd_convert_multi(argv: list[str]) -> int:
         prog="dict_tool.py convert-multi",
         description="Convert multiple source dictionary files into a single MyBoard .mybdict (MYBDF v1).",
     )
-    p.add_argument("--inputs", required=True, help="Comma-separated input dictionary file paths.")
+    p.add_argument(
+        "--inputs",
+        required=True,
+        help="Comma-separated input dictionary file paths (compressed files and <archive>::<member> accepted).",
+    )
     p.add_argument("--formats", default="", help="Optional comma-separated format ids per input; empty to auto-guess.")
     p.add_argument(
         "--dedupe",
@@ -633,7 +2836,12 @@ def _cmd_convert_multi(argv: list[str]) -> int:
     p.add_argument("--name", default=None, help="Optional display name.")
     p.add_argument("--languages", default="", help="Comma-separated BCP-47 tags (e.g. zh-CN,en).")
     p.add_argument("--dict-version", default="1.0.0", help="Semantic version a.b.c (stored in MYBDF header).")
-    p.add_argument("--meta-output", default=None, type=Path, help="Optional output DictionarySpec JSON path.")
+    p.add_argument(
+        "--meta-output",
+        default=None,
+        type=Path,
+        help="Optional output DictionarySpec JSON path (not with --shard-by: assetPath names a single .mybdict).",
+    )
     p.add_argument("--asset-path", default=None, help='Optional assetPath in DictionarySpec (e.g. "dictionary/base.mybdict").')
     p.add_argument("--layout-ids", default="", help="Comma-separated allowed layout ids (DictionarySpec.layoutIds).")
     p.add_argument("--code-scheme", default=CodeScheme.PINYIN_FULL, help="Canonical code scheme for payload (e.g. PINYIN_FULL).")
@@ -659,15 +2867,84 @@ def _cmd_convert_multi(argv: list[str]) -> int:
         default="zlib",
         help="Compression for output file (default: zlib).",
     )
+    p.add_argument(
+        "--code-hash",
+        action="store_true",
+        help="Embed a minimal perfect hash (MPH1 section) over canonical codes for O(1) exact lookup.",
+    )
+    p.add_argument(
+        "--typo-layout",
+        default=None,
+        type=Path,
+        help="Embed a typo-tolerance index (TYP1 section) using key adjacency from this layout (e.g. assets/layouts/qwerty.json).",
+    )
+    p.add_argument("--typo-max-distance", default="1", help="Max edits (neighbor-key substitution or omitted key) per variant (default: 1).")
+    p.add_argument(
+        "--typo-fan-out",
+        default="16",
+        help="Max typo variants stored per code, spread over key positions; 0 = all (default: 16).",
+    )
+    p.add_argument(
+        "--swipe-layout",
+        default=None,
+        type=Path,
+        help="Embed a swipe path signature index (SWP1 section) using key centers from this layout (e.g. assets/layouts/qwerty.json).",
+    )
+    p.add_argument("--swipe-per-group", default="0", help="Keep at most N entries per (first, last) key group (default: 0=all).")
+    p.add_argument(
+        "--hot-entries",
+        default="0",
+        help=(
+            "Also store a small hot payload with the top N entries by weight, loadable before the full payload; "
+            "with --shard-by each shard stores its part of the top N (default: 0=off)."
+        ),
+    )
+    p.add_argument(
+        "--hot-min-weight",
+        default=None,
+        type=int,
+        help="Only entries with weight >= this value are eligible for the hot payload.",
+    )
+    p.add_argument(
+        "--shard-by",
+        choices=["none", "initial", "prefix2"],
+        default="none",
+        help="Split output into per-prefix shard files plus a routing index (default: none).",
+    )
+    p.add_argument("--max-entries-per-code", default="0", help="Prune: keep at most N entries per code (default: 0=off).")
+    p.add_argument("--min-weight", default=None, type=int, help="Prune: drop entries with weight below this value.")
+    p.add_argument(
+        "--min-weight-percentile",
+        default=None,
+        type=float,
+        help="Prune: drop entries weighing less than the P-th percentile (0-100) of the remaining weights.",
+    )
+    p.add_argument(
+        "--source-quota",
+        default="",
+        help="Prune: max entries kept per input file; one value for all inputs or one per input (0=unlimited).",
+    )
+    p.add_argument("--max-entries", default="0", help="Prune: total entry budget (default: 0=off).")
+    p.add_argument(
+        "--max-bytes",
+        default="0",
+        help="Prune: budget for uncompressed code index + entry table + code/word blobs in bytes (default: 0=off).",
+    )
+    p.add_argument("--pruned-output", default=None, type=Path, help="Write every pruned entry (TSV: word, code, weight, source, reason).")
+    p.add_argument(
+        "--report",
+        action="store_true",
+        help="Print a payload anatomy report (bytes per region and per source, see the analyze command) to stderr.",
+    )
     p.add_argument("--fail-on-empty", action="store_true", help="Fail if no entries were produced.")
     args = p.parse_args(argv)
+    _check_meta_output(args)
 
     inputs = [Path(s.strip()) for s in str(args.inputs).split(",") if s.strip()]
     if not inputs:
         raise SystemExit("--inputs is empty")
     for path in inputs:
-        if not path.exists():
-            raise SystemExit(f"Input not found: {path}")
+        _check_source(path)
 
     formats_raw = [s.strip() for s in str(args.formats).split(",") if s.strip()]
     if formats_raw:
@@ -707,7 +2984,7 @@ def _cmd_convert_multi(argv: list[str]) -> int:
     single_chars_per_code = max(0, int(args.single_chars_per_code))
     dedupe_policy = str(args.dedupe)
 
-    def _iter_canonical() -> Iterable[DictionaryEntry]:
+    def _iter_canonical() -> Iterable[tuple[list[DictionaryEntry], str]]:
         accepted = 0
         # For each single-syllable code, keep best-weight single characters.
         char_best: dict[str, dict[str, int]] = defaultdict(dict)
@@ -730,54 +3007,36 @@ def _cmd_convert_multi(argv: list[str]) -> int:
                 return False
             raise RuntimeError(f"Unknown dedupe policy: {dedupe_policy}")
 
-        for path, parser in pairs:
-            for e in parser.parse(path):
-                raw_code = (e.code or "").strip()
-                word = (e.word or "").strip()
-                code = _canonicalize_code(raw_code, scheme=scheme)
-                if not code or not word:
-                    continue
-                if not _accept(code, word, int(e.weight)):
-                    continue
+        code_cache = _CanonicalCodeCache(scheme)
+        derive = derive_single_chars and single_chars_per_code > 0 and scheme == CodeScheme.PINYIN_FULL
 
-                if derive_single_chars and single_chars_per_code > 0 and scheme == CodeScheme.PINYIN_FULL:
-                    syllables = [s for s in raw_code.split() if s]
-                    if syllables and len(syllables) == len(word):
-                        for ch, syl in zip(word, syllables, strict=True):
-                            ch = ch.strip()
-                            if not ch or len(ch) != 1:
-                                continue
-                            syl_code = _canonicalize_code(syl, scheme=scheme)
-                            if not syl_code:
-                                continue
-                            derived_weight = int(e.weight / max(1, len(word)))
-                            prev = char_best[syl_code].get(ch)
-                            if prev is None or derived_weight > prev:
-                                char_best[syl_code][ch] = derived_weight
-
-                accepted += 1
-                yield DictionaryEntry(word=word, code=code, weight=e.weight)
+        for path, parser in pairs:
+            source = str(path)
+            for batch in parser.parse_batches(path):
+                entries, raw_codes = _canonical_batch(batch, cache=code_cache)
+                if dedupe_policy != "none":
+                    keep = [_accept(e.code, e.word, int(e.weight)) for e in entries]
+                    entries = list(itertools.compress(entries, keep))
+                    raw_codes = list(itertools.compress(raw_codes, keep))
+                if derive:
+                    _collect_single_chars(char_best, entries, raw_codes, cache=code_cache)
+                accepted += len(entries)
+                yield entries, source
 
         if accepted == 0 and bool(args.fail_on_empty):
             raise SystemExit("No entries produced (check inputs / format / canonicalization).")
 
-        if derive_single_chars and single_chars_per_code > 0 and scheme == CodeScheme.PINYIN_FULL:
+        if derive:
+            derived: list[DictionaryEntry] = []
             for syl_code, m in char_best.items():
                 items = sorted(m.items(), key=lambda kv: (-kv[1], kv[0]))
                 for ch, w in items[:single_chars_per_code]:
                     if not _accept(syl_code, ch, int(w)):
                         continue
-                    yield DictionaryEntry(word=ch, code=syl_code, weight=w)
+                    derived.append(DictionaryEntry(word=ch, code=syl_code, weight=w))
+            yield derived, DERIVED_SOURCE
 
-    payload = MyBoardDictPayloadV1Writer().encode(_iter_canonical())
-    MyBoardDictionaryFileV1Writer().write(
-        payload_uncompressed=payload,
-        out_path=args.output,
-        dict_version=_parse_semver(args.dict_version),
-        meta=meta,
-        languages=languages,
-        compression=args.compress,
-    )
+    _write_converted(args, _iter_canonical(), meta=meta, languages=languages, sources=[str(p) for p, _ in pairs])
 
     if args.meta_output is not None:
         asset_path = args.asset_path or f"dictionary/{args.output.name}"
@@ -799,15 +3058,483 @@ def _cmd_convert_multi(argv: list[str]) -> int:
     return 0
 
 
+def _cmd_lookup(argv: list[str]) -> int:
+    p = argparse.ArgumentParser(
+        prog="dict_tool.py lookup",
+        description="Query a .mybdict file with the same semantics as the runtime reader.",
+    )
+    p.add_argument("--input", required=True, type=Path, help="Input .mybdict (or raw MYBDICT1 payload) file.")
+    p.add_argument("--code", default=None, help="Exact code to look up (canonicalized, e.g. xi'an -> xian).")
+    p.add_argument("--prefix", default=None, help="Code prefix to look up (prefix search).")
+    p.add_argument("--typo", default=None, help="Mistyped code to resolve through the TYP1 typo index.")
+    p.add_argument("--swipe", default=None, help="Swipe key sequence (letters passed, in order) to resolve through the SWP1 index.")
+    p.add_argument("--limit", default="50", help="Max candidates to print (default: 50).")
+    p.add_argument("--hot", action="store_true", help="Query the hot payload (see --hot-entries) instead of the full one.")
+    p.add_argument("--pack-dictionary", default=None, help="Input is a pack (see pack command): dictionaryId to query.")
+    p.add_argument(
+        "--check-code-hash",
+        action="store_true",
+        help="Cross-check the MPH1 section against binary search for every code in the index.",
+    )
+    args = p.parse_args(argv)
+
+    reader = _open_query_reader(args.input, hot=bool(args.hot), pack_dictionary=args.pack_dictionary)
+    limit = int(args.limit)
+    print(
+        f"codes={reader.code_count} entries={reader.entry_count} "
+        f"sections={','.join(t.decode('ascii') for t in reader.sections) or '-'}",
+        file=sys.stderr,
+    )
+
+    if args.check_code_hash:
+        if not reader.has_code_hash:
+            raise SystemExit(f"{args.input}: no MPH1 section (convert with --code-hash)")
+        mismatches = 0
+        for i in range(reader.code_count):
+            code = reader.code_at(i).decode("utf-8")
+            if reader.find_code_index_hashed(code) != i:
+                mismatches += 1
+                print(f"mismatch: code={code!r} index={i}", file=sys.stderr)
+        if mismatches:
+            raise SystemExit(f"MPH1 check failed: {mismatches} of {reader.code_count} codes")
+        print(f"MPH1 check ok: {reader.code_count} codes", file=sys.stderr)
+
+    if args.code is not None:
+        for word in reader.candidates(_query_code(args.code, reader.meta), limit=limit):
+            print(word)
+    if args.prefix is not None:
+        for word in reader.candidates_by_prefix(_query_code(args.prefix, reader.meta), limit=limit):
+            print(word)
+    if args.typo is not None:
+        for word in reader.candidates_typo(_query_code(args.typo, reader.meta), limit=limit):
+            print(word)
+    if args.swipe is not None:
+        for word in reader.candidates_swipe(args.swipe, limit=limit):
+            print(word)
+    return 0
+
+
+def _open_query_reader(
+    path: Path,
+    *,
+    hot: bool = False,
+    pack_dictionary: str | None = None,
+    packs: bool = True,
+) -> MyBoardDictionaryReader:
+    """
+    Reader for `--input` of the query commands. A pack needs `pack_dictionary` and otherwise exits listing
+    the ids in its table of contents; with `packs=False` (commands that need a real MYBDICT1 payload) any pack exits.
+    """
+    if not path.is_file():
+        raise SystemExit(f"Input not found: {path}")
+    data = path.read_bytes()
+    meta = _mybdf_meta(data)
+    if "pack" not in meta:
+        if pack_dictionary is not None:
+            raise SystemExit(f"{path}: not a dictionary pack (drop --pack-dictionary)")
+        return MyBoardDictionaryReader.from_bytes(data, hot=hot)
+
+    ids = [str(d.get("dictionaryId")) for d in meta["pack"].get("dictionaries") or []]
+    if not packs:
+        raise SystemExit(f"{path}: dictionary pack ({', '.join(ids)}), pass one of its source .mybdict files instead")
+    if pack_dictionary is None:
+        raise SystemExit(f"{path}: dictionary pack, pass --pack-dictionary <id> (available: {', '.join(ids)})")
+    if pack_dictionary not in ids:
+        raise SystemExit(f"{path}: no dictionary {pack_dictionary!r} in pack (available: {', '.join(ids)})")
+    if hot:
+        raise SystemExit(f"{path}: packs have no hot payload")
+    payload, meta, _container = _read_mybdf(data)
+    return MyBoardDictionaryPackReader(payload, meta=meta).dictionary(pack_dictionary)
+
+
+def _reader_groups(reader: MyBoardDictionaryReader) -> list[tuple[str, list[tuple[str, int]]]]:
+    groups: list[tuple[str, list[tuple[str, int]]]] = []
+    for i in range(reader.code_count):
+        first, count = reader.code_record(i)
+        groups.append((reader.code_at(i).decode("utf-8"), [reader.entry(first + j) for j in range(count)]))
+    return groups
+
+
+# DictionarySpec fields a `pack --specs` file may set in the TOC; sizes and positions are always computed.
+PACK_SPEC_KEYS = frozenset(
+    {
+        "dictionaryId",
+        "name",
+        "localeTags",
+        "layoutIds",
+        "assetPath",
+        "codeScheme",
+        "kind",
+        "core",
+        "variant",
+        "isDefault",
+        "enabled",
+        "priority",
+    }
+)
+
+
+def _cmd_pack(argv: list[str]) -> int:
+    p = argparse.ArgumentParser(
+        prog="dict_tool.py pack",
+        description="Combine built .mybdict dictionaries into one pack (MYBDF v1 + MYBPACK1) with shared code/word tables.",
+    )
+    p.add_argument("--inputs", required=True, help="Comma-separated input .mybdict files (one logical dictionary each).")
+    p.add_argument(
+        "--specs",
+        default="",
+        help="Optional comma-separated DictionarySpec JSON per input (copied into the pack table of contents).",
+    )
+    p.add_argument("--output", required=True, type=Path, help="Output pack file (e.g. dictionaries.mybpack).")
+    p.add_argument("--pack-id", required=True, help="Id stored in container metadata.")
+    p.add_argument("--name", default=None, help="Optional display name.")
+    p.add_argument("--dict-version", default="1.0.0", help="Semantic version a.b.c (stored in MYBDF header).")
+    p.add_argument(
+        "--compress",
+        choices=["none", "zlib"],
+        default="zlib",
+        help="Compression for output file (default: zlib).",
+    )
+    p.add_argument("--verify", action="store_true", help="Re-read the pack and compare every entry with the inputs.")
+    args = p.parse_args(argv)
+
+    inputs = [Path(s.strip()) for s in str(args.inputs).split(",") if s.strip()]
+    if not inputs:
+        raise SystemExit("--inputs is empty")
+    specs_raw = [s.strip() for s in str(args.specs).split(",") if s.strip()]
+    if specs_raw and len(specs_raw) != len(inputs):
+        raise SystemExit(f"--specs count mismatch: inputs={len(inputs)} specs={len(specs_raw)}")
+
+    readers: list[MyBoardDictionaryReader] = []
+    toc: list[dict] = []
+    languages: list[str] = []
+    for i, path in enumerate(inputs):
+        if not path.exists():
+            raise SystemExit(f"Input not found: {path}")
+        reader = MyBoardDictionaryReader.from_file(path)
+        readers.append(reader)
+        dict_languages = [str(x) for x in reader.meta.get("languages") or []]
+        entry = {
+            "dictionaryId": reader.meta.get("dictionaryId"),
+            "name": reader.meta.get("name"),
+            "languages": dict_languages,
+            "codeScheme": reader.meta.get("codeScheme"),
+        }
+        if specs_raw:
+            spec = json.loads(Path(specs_raw[i]).read_text(encoding="utf-8"))
+            if not isinstance(spec, dict):
+                raise SystemExit(f"{specs_raw[i]}: DictionarySpec json root must be an object")
+            entry.update({k: v for k, v in spec.items() if k in PACK_SPEC_KEYS})
+        entry.setdefault("localeTags", [t for t in (_to_locale_tag_underscore(x) for x in dict_languages) if t])
+        entry.update({"packIndex": i, "source": path.name, "codeCount": reader.code_count, "entryCount": reader.entry_count})
+        if not entry.get("dictionaryId"):
+            raise SystemExit(f"{path}: missing dictionaryId")
+        toc.append(entry)
+        languages.extend(x for x in dict_languages if x not in languages)
+
+    ids = [str(e["dictionaryId"]) for e in toc]
+    duplicates = sorted({x for x in ids if ids.count(x) > 1})
+    if duplicates:
+        raise SystemExit(f"Duplicate dictionaryId in pack: {', '.join(duplicates)}")
+
+    groups = [_reader_groups(r) for r in readers]
+    payload = MyBoardDictPackV1Writer().encode(groups)
+    meta = {
+        "dictionaryId": args.pack_id,
+        "name": args.name,
+        "sourceFormat": "mybdict",
+        "createdBy": "myboard_build",
+        "createdAtEpochMs": int(time.time() * 1000),
+        "kind": "DICTIONARY_PACK",
+        "pack": {"version": MyBoardDictPackV1Writer.VERSION, "dictionaries": toc},
+    }
+    MyBoardDictionaryFileV1Writer().write(
+        payload_uncompressed=payload,
+        out_path=args.output,
+        dict_version=_parse_semver(args.dict_version),
+        meta=meta,
+        languages=languages,
+        compression=args.compress,
+    )
+
+    separate = sum(len(r.payload) for r in readers)
+    print(
+        f"dictionaries={len(readers)} payload={len(payload)}B separate_payloads={separate}B "
+        f"file={args.output.stat().st_size}B",
+        file=sys.stderr,
+    )
+
+    if args.verify:
+        pack = MyBoardDictionaryPackReader.from_file(args.output)
+        for i, expected in enumerate(groups):
+            if _reader_groups(pack.dictionary(i)) != expected:
+                raise SystemExit(f"Pack verify failed for {ids[i]}")
+        print(f"pack verify ok: {len(groups)} dictionaries", file=sys.stderr)
+    return 0
+
+
+def _cmd_analyze(argv: list[str]) -> int:
+    p = argparse.ArgumentParser(
+        prog="dict_tool.py analyze",
+        description="Report where the bytes of a built dictionary go (per payload region, per code, per word).",
+    )
+    p.add_argument("--input", required=True, type=Path, help="Input .mybdict (or raw MYBDICT1 payload) file.")
+    p.add_argument("--top", default="20", help="Number of top codes / largest words to list (default: 20).")
+    p.add_argument("--hot", action="store_true", help="Analyze the hot payload (see --hot-entries) instead of the full one.")
+    p.add_argument("--json", default=None, type=Path, help="Also write the report as JSON to this path.")
+    args = p.parse_args(argv)
+
+    reader = _open_query_reader(args.input, hot=bool(args.hot), packs=False)
+    report = _analyze_dictionary(reader, top=max(0, int(args.top)))
+    _print_analysis(report, title=str(args.input))
+    if args.json is not None:
+        args.json.parent.mkdir(parents=True, exist_ok=True)
+        args.json.write_text(json.dumps(report, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+    return 0
+
+
+def _cmd_benchmark(argv: list[str]) -> int:
+    p = argparse.ArgumentParser(
+        prog="dict_tool.py benchmark",
+        description="Replay a keystroke trace against a built dictionary and report lookup latency and bytes touched.",
+    )
+    p.add_argument("--input", required=True, type=Path, help="Input .mybdict, or a <stem>.shards.json routing index.")
+    p.add_argument(
+        "--trace",
+        default=None,
+        type=Path,
+        help="Recorded trace: one composing string per line (canonicalized, e.g. xi'an -> xian); every keystroke prefix is replayed.",
+    )
+    p.add_argument(
+        "--synthetic",
+        default="0",
+        help="Instead of --trace, sample N codes from the dictionary's own weight distribution (default: 0).",
+    )
+    p.add_argument("--seed", default="1", help="Random seed for --synthetic (default: 1).")
+    p.add_argument(
+        "--mode",
+        choices=["exact", "prefix", "both"],
+        default="both",
+        help="Lookups per keystroke: candidates(), candidatesByPrefix(), or both (default: both).",
+    )
+    p.add_argument("--limit", default="50", help="Candidate limit per lookup (default: 50).")
+    p.add_argument("--rounds", default="3", help="Replay the trace this many times (default: 3).")
+    p.add_argument("--hot", action="store_true", help="Benchmark the hot payload (see --hot-entries) instead of the full one.")
+    p.add_argument("--report-json", default=None, type=Path, help="Also write the report as JSON to this path.")
+    args = p.parse_args(argv)
+
+    started = time.perf_counter_ns()
+    router = _ShardRouter.open(args.input, hot=bool(args.hot))
+    load_ns = time.perf_counter_ns() - started
+
+    synthetic = int(args.synthetic)
+    if args.trace is not None:
+        if synthetic > 0:
+            raise SystemExit("--trace and --synthetic are mutually exclusive")
+        # Canonicalized like `lookup --code`, so "xi'an" replays as "xian"; lines with no code letters are skipped.
+        meta = router.shards[0][1].meta if router.shards else {}
+        codes = (_query_code(line.split()[0], meta) for line in _iter_corpus_lines([args.trace], skip_comments=True))
+        trace = [code for code in codes if code]
+    elif synthetic > 0:
+        trace = _synthetic_trace(router, count=synthetic, seed=int(args.seed))
+    else:
+        raise SystemExit("Either --trace or --synthetic N is required")
+    keystrokes = [line[:n] for line in trace for n in range(1, len(line) + 1)]
+    if not keystrokes:
+        raise SystemExit("Trace is empty")
+
+    limit = int(args.limit)
+    rounds = max(1, int(args.rounds))
+    modes = ["exact", "prefix"] if args.mode == "both" else [args.mode]
+    traced = _ShardRouter([(key, _TracedDictionaryReader(r.payload, meta=r.meta)) for key, r in router.shards])
+
+    report: dict = {
+        "input": str(args.input),
+        "shards": len(router.shards),
+        "codes": sum(r.code_count for _, r in router.shards),
+        "entries": sum(r.entry_count for _, r in router.shards),
+        "codeHash": all(r.has_code_hash for _, r in router.shards),
+        "loadMs": round(load_ns / 1e6, 3),
+        "traceLines": len(trace),
+        "keystrokes": len(keystrokes),
+        "rounds": rounds,
+        "modes": {},
+    }
+    for mode in modes:
+        lookup = router.candidates if mode == "exact" else router.candidates_by_prefix
+        latencies: list[int] = []
+        hits = 0
+        total_ns = 0
+        for _ in range(rounds):
+            round_started = time.perf_counter_ns()
+            for key in keystrokes:
+                t0 = time.perf_counter_ns()
+                found = lookup(key, limit)
+                latencies.append(time.perf_counter_ns() - t0)
+                hits += bool(found)
+            total_ns += time.perf_counter_ns() - round_started
+
+        # Bytes touched are measured in a separate pass so the tracing overhead stays out of the latencies.
+        traced_lookup = traced.candidates if mode == "exact" else traced.candidates_by_prefix
+        touched_bytes: list[int] = []
+        touched_pages: list[int] = []
+        for key in keystrokes:
+            readers = traced.for_code(key) if mode == "exact" else traced.for_prefix(key)
+            for r in readers:
+                r.reset_touched()
+            traced_lookup(key, limit)
+            touched_bytes.append(sum(r.bytes_touched for r in readers))
+            touched_pages.append(sum(len(r.pages_touched) for r in readers))
+
+        latencies.sort()
+        touched_bytes.sort()
+        report["modes"][mode] = {
+            "lookups": len(latencies),
+            "hits": hits,
+            "misses": len(latencies) - hits,
+            "hitRate": round(hits / len(latencies), 4),
+            "latencyUs": {
+                "p50": round(_percentile(latencies, 0.50) / 1000, 2),
+                "p95": round(_percentile(latencies, 0.95) / 1000, 2),
+                "p99": round(_percentile(latencies, 0.99) / 1000, 2),
+                "max": round(latencies[-1] / 1000, 2),
+                "mean": round(sum(latencies) / len(latencies) / 1000, 2),
+            },
+            "histogramUs": [[upper, count] for upper, count in _latency_histogram(latencies)],
+            "lookupsPerSecond": round(len(latencies) / (total_ns / 1e9), 1),
+            "bytesTouched": {
+                "mean": round(sum(touched_bytes) / len(touched_bytes), 1),
+                "p95": _percentile(touched_bytes, 0.95),
+                "max": touched_bytes[-1],
+            },
+            "pagesTouchedMean": round(sum(touched_pages) / len(touched_pages), 2),
+        }
+
+    print(
+        f"input={report['input']} shards={report['shards']} codes={report['codes']} entries={report['entries']} "
+        f"code_hash={'yes' if report['codeHash'] else 'no'} load_ms={report['loadMs']}"
+    )
+    print(f"trace_lines={report['traceLines']} keystrokes={report['keystrokes']} rounds={rounds} limit={limit}")
+    for mode, r in report["modes"].items():
+        lat = r["latencyUs"]
+        print(
+            f"{mode}: lookups={r['lookups']} hits={r['hits']} misses={r['misses']} hit_rate={r['hitRate']} "
+            f"p50={lat['p50']}us p95={lat['p95']}us p99={lat['p99']}us max={lat['max']}us mean={lat['mean']}us "
+            f"throughput={r['lookupsPerSecond']}/s"
+        )
+        print(
+            f"{mode}: bytes_touched mean={r['bytesTouched']['mean']} p95={r['bytesTouched']['p95']} "
+            f"max={r['bytesTouched']['max']} pages_mean={r['pagesTouchedMean']}"
+        )
+        print(f"{mode}: histogram " + " ".join(f"<{upper}us:{count}" for upper, count in r["histogramUs"]))
+
+    if args.report_json is not None:
+        args.report_json.parent.mkdir(parents=True, exist_ok=True)
+        args.report_json.write_text(json.dumps(report, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+    return 0
+
+
+def _cmd_ngram(argv: list[str]) -> int:
+    p = argparse.ArgumentParser(
+        prog="dict_tool.py ngram",
+        description="Compile a plain-text corpus into a prebuilt next-word (bigram) table (MYBDF v1 + MYBNGR01).",
+    )
+    p.add_argument("--inputs", required=True, help="Comma-separated UTF-8 corpus files (one sentence per line).")
+    p.add_argument("--output", required=True, type=Path, help="Output bigram file (e.g. next_word_zh-cn.mybngram).")
+    p.add_argument("--dictionary-id", required=True, help="Id stored in container metadata.")
+    p.add_argument("--name", default=None, help="Optional display name.")
+    p.add_argument("--languages", default="", help="Comma-separated BCP-47 tags (e.g. zh-CN).")
+    p.add_argument("--dict-version", default="1.0.0", help="Semantic version a.b.c (stored in MYBDF header).")
+    p.add_argument(
+        "--tokenize",
+        choices=["whitespace", "dictionary"],
+        default="whitespace",
+        help="Tokenizer: split on whitespace, or longest-match against --dictionary words (default: whitespace).",
+    )
+    p.add_argument("--dictionary", default=None, type=Path, help="A .mybdict providing the word list for --tokenize dictionary.")
+    p.add_argument("--min-count", default="2", help="Drop bigrams seen fewer times (default: 2).")
+    p.add_argument("--top-k", default="16", help="Keep at most K next words per previous word (default: 16).")
+    p.add_argument("--max-pairs", default="4000000", help="Memory bound on distinct pairs while counting (default: 4000000).")
+    p.add_argument(
+        "--compress",
+        choices=["none", "zlib"],
+        default="none",
+        help="Compression for output file (default: none, so the payload can be memory-mapped).",
+    )
+    p.add_argument("--fail-on-empty", action="store_true", help="Fail if no bigrams were produced.")
+    args = p.parse_args(argv)
+
+    inputs = [Path(s.strip()) for s in str(args.inputs).split(",") if s.strip()]
+    if not inputs:
+        raise SystemExit("--inputs is empty")
+    for path in inputs:
+        _check_source(path)
+
+    if args.tokenize == "dictionary":
+        if args.dictionary is None:
+            raise SystemExit("--tokenize dictionary requires --dictionary")
+        tokenize = _LongestMatchTokenizer(MyBoardDictionaryReader.from_file(args.dictionary).iter_words()).tokenize
+    else:
+        tokenize = str.split
+
+    counter = BigramCounter(max_pairs=int(args.max_pairs))
+    lines = 0
+    for line in _iter_corpus_lines(inputs):
+        lines += 1
+        tokens = [sys.intern(t) for t in tokenize(line)]
+        for prev, nxt in zip(tokens, tokens[1:]):
+            counter.add(prev, nxt)
+
+    table = counter.table(min_count=max(1, int(args.min_count)), top_k=max(1, int(args.top_k)))
+    pair_count = sum(len(v) for v in table.values())
+    if pair_count == 0 and bool(args.fail_on_empty):
+        raise SystemExit("No bigrams produced (check inputs / tokenizer / --min-count).")
+
+    languages = [s.strip() for s in str(args.languages).split(",") if s.strip()]
+    meta = {
+        "dictionaryId": args.dictionary_id,
+        "name": args.name,
+        "sourceFormat": "corpus_text",
+        "createdBy": "myboard_build",
+        "createdAtEpochMs": int(time.time() * 1000),
+        "kind": "NEXT_WORD_BIGRAM",
+        "costScale": NgramPayloadV1Writer.COST_SCALE,
+    }
+    MyBoardDictionaryFileV1Writer().write(
+        payload_uncompressed=NgramPayloadV1Writer().encode(table),
+        out_path=args.output,
+        dict_version=_parse_semver(args.dict_version),
+        meta=meta,
+        languages=languages,
+        compression=args.compress,
+    )
+    print(
+        f"lines={lines} prevs={len(table)} pairs={pair_count} "
+        f"evicted={counter.evicted_pairs} max_undercount={counter.bucket - 1}",
+        file=sys.stderr,
+    )
+    return 0
+
+
 def main(argv: list[str]) -> int:
     if not argv:
-        raise SystemExit("Usage: dict_tool.py <command> [args...]; command=convert|convert-multi")
+        raise SystemExit("Usage: dict_tool.py <command> [args...]; command=convert|convert-multi|pack|lookup|analyze|benchmark|ngram")
 
     cmd, *rest = argv
     if cmd == "convert":
         return _cmd_convert(rest)
     if cmd == "convert-multi":
         return _cmd_convert_multi(rest)
+    if cmd == "pack":
+        return _cmd_pack(rest)
+    if cmd == "lookup":
+        return _cmd_lookup(rest)
+    if cmd == "analyze":
+        return _cmd_analyze(rest)
+    if cmd == "benchmark":
+        return _cmd_benchmark(rest)
+    if cmd == "ngram":
+        return _cmd_ngram(rest)
 
     raise SystemExit(f"Unknown command: {cmd}")
 
@@ -0,0 +1,370 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import struct
+import sys
+import zlib
+from dataclasses import dataclass
+from pathlib import Path
+
+
+@dataclass(frozen=True)
+class EmojiRecord:
+    emoji: str
+    codes: str  # "-"-joined hex code points, e.g. "1f468-200d-1f469"
+    image_path: str
+    category_index: int
+    names: dict[str, str]
+    keywords: dict[str, tuple[str, ...]]
+
+
+@dataclass(frozen=True)
+class EmojiCategoryDef:
+    category_id: str
+    name: str
+    first_emoji: int
+    emoji_count: int
+
+
+def _load_catalog(path: Path) -> tuple[list[EmojiCategoryDef], list[EmojiRecord]]:
+    with path.open("r", encoding="utf-8") as f:
+        obj = json.load(f)
+    if not isinstance(obj, dict):
+        raise ValueError(f"{path}: emoji json root must be an object")
+    raw_categories = obj.get("categories", [])
+    if not isinstance(raw_categories, list):
+        raise ValueError(f"{path}: categories must be a list")
+
+    categories: list[EmojiCategoryDef] = []
+    records: list[EmojiRecord] = []
+    for ci, cat in enumerate(raw_categories):
+        category_id = str(cat.get("categoryId", "")).strip()
+        if not category_id:
+            raise ValueError(f"{path}: categories[{ci}] missing categoryId")
+        first = len(records)
+        for item in cat.get("items", []) or []:
+            emoji = str(item.get("emoji", ""))
+            if not emoji:
+                continue
+            codes = [str(c).lower() for c in item.get("codes", []) or []]
+            if not codes:
+                codes = [f"{ord(ch):x}" for ch in emoji]
+            names = {str(k): str(v) for k, v in (item.get("name") or {}).items() if v}
+            keywords = {
+                str(k): tuple(str(x) for x in (v or []) if str(x).strip())
+                for k, v in (item.get("keywords") or {}).items()
+            }
+            records.append(
+                EmojiRecord(
+                    emoji=emoji,
+                    codes="-".join(codes),
+                    image_path=str((item.get("image") or {}).get("path", "")),
+                    category_index=ci,
+                    names=names,
+                    keywords=keywords,
+                )
+            )
+        categories.append(
+            EmojiCategoryDef(
+                category_id=category_id,
+                name=str(cat.get("name", "")),
+                first_emoji=first,
+                emoji_count=len(records) - first,
+            )
+        )
+    return categories, records
+
+
+def _normalize_term(text: str) -> str:
+    return " ".join(text.strip().lower().split())
+
+
+def _is_cjk(ch: str) -> bool:
+    cp = ord(ch)
+    return 0x2E80 <= cp <= 0x9FFF or 0xAC00 <= cp <= 0xD7AF or 0xF900 <= cp <= 0xFAFF or 0x20000 <= cp <= 0x2FFFF
+
+
+def _search_terms(record: EmojiRecord, lang: str) -> set[str]:
+    """
+    Index terms for one language: every suffix of each name/keyword phrase that starts at a word boundary,
+    plus, inside CJK runs (no spaces), every suffix starting at a CJK character. A term-prefix search then
+    finds "big e" in "grinning face with big eyes" and 笑 in 大笑.
+    """
+    phrases = [record.names.get(lang, "")] + list(record.keywords.get(lang, ()))
+    terms: set[str] = set()
+    for phrase in phrases:
+        words = _normalize_term(phrase).split()
+        for i, word in enumerate(words):
+            rest = words[i + 1 :]
+            for j, ch in enumerate(word):
+                if j == 0 or _is_cjk(ch):
+                    terms.add(" ".join([word[j:], *rest]))
+    return terms
+
+
+class EmojiIndexV1Writer:
+    """
+    Emoji search index v1 (MYBEMJ01), little-endian.
+
+    Header (52 bytes):
+      magic[8] = b"MYBEMJ01"
+      u32 version = 1
+      u32 crc32_body (over all bytes after the header)
+      u32 emoji_count
+      u32 category_count
+      u32 language_count
+      u32 emoji_table_offset
+      u32 category_table_offset
+      u32 language_table_offset
+      u32 postings_offset
+      u32 string_blob_offset
+      u32 size
+    emoji_table[emoji_count] of (16 bytes, catalog order):
+      u32 emoji_offset
+      u32 codes_offset ("-"-joined hex code points)
+      u32 image_path_offset (e.g. "twemoji/72x72/1f600.png")
+      u16 category_index
+      u16 reserved = 0
+    category_table[category_count] of (16 bytes, display order):
+      u32 category_id_offset
+      u32 name_offset
+      u32 first_emoji_index
+      u32 emoji_count
+    language_table[language_count] of (16 bytes):
+      u32 language_offset (e.g. "zh", "en")
+      u32 term_table_offset
+      u32 term_count
+      u32 reserved = 0
+    term_table[term_count] per language, sorted by term UTF-8 bytes (12 bytes each):
+      u32 term_offset (lowercased, whitespace-collapsed; see `_search_terms` for which suffixes are indexed)
+      u32 first_posting
+      u32 posting_count
+    postings: u16 emoji indices (ascending, i.e. catalog order)
+    string_blob: NUL-terminated utf-8 strings (interned); all *_offset fields are relative to it.
+    """
+
+    MAGIC = b"MYBEMJ01"
+    VERSION = 1
+    HEADER_SIZE = 52
+
+    def encode(self, categories: list[EmojiCategoryDef], records: list[EmojiRecord], languages: list[str]) -> bytes:
+        if len(records) > 0xFFFF:
+            raise ValueError(f"too many emoji for u16 postings: {len(records)}")
+
+        blob = bytearray()
+        offsets: dict[str, int] = {}
+
+        def _s(text: str) -> int:
+            off = offsets.get(text)
+            if off is None:
+                off = len(blob)
+                offsets[text] = off
+                blob.extend(text.encode("utf-8") + b"\0")
+            return off
+
+        emoji_table = bytearray()
+        for r in records:
+            emoji_table += struct.pack("<IIIHH", _s(r.emoji), _s(r.codes), _s(r.image_path), r.category_index, 0)
+
+        category_table = bytearray()
+        for c in categories:
+            category_table += struct.pack("<IIII", _s(c.category_id), _s(c.name), c.first_emoji, c.emoji_count)
+
+        term_tables: list[tuple[str, list[tuple[str, list[int]]]]] = []
+        for lang in languages:
+            postings: dict[str, list[int]] = {}
+            for i, r in enumerate(records):
+                for term in _search_terms(r, lang):
+                    postings.setdefault(term, []).append(i)
+            terms = sorted(postings.items(), key=lambda kv: kv[0].encode("utf-8"))
+            term_tables.append((lang, terms))
+
+        emoji_table_offset = self.HEADER_SIZE
+        category_table_offset = emoji_table_offset + len(emoji_table)
+        language_table_offset = category_table_offset + len(category_table)
+        term_tables_offset = language_table_offset + 16 * len(term_tables)
+
+        language_table = bytearray()
+        terms_bytes = bytearray()
+        postings_bytes = bytearray()
+        posting_count = 0
+        for lang, terms in term_tables:
+            language_table += struct.pack("<IIII", _s(lang), term_tables_offset + len(terms_bytes), len(terms), 0)
+            for term, ids in terms:
+                terms_bytes += struct.pack("<III", _s(term), posting_count, len(ids))
+                postings_bytes += struct.pack(f"<{len(ids)}H", *ids)
+                posting_count += len(ids)
+        postings_bytes += b"\0" * (-len(postings_bytes) % 4)
+
+        postings_offset = term_tables_offset + len(terms_bytes)
+        string_blob_offset = postings_offset + len(postings_bytes)
+        size = string_blob_offset + len(blob)
+
+        body = bytes(emoji_table + category_table + language_table + terms_bytes + postings_bytes + blob)
+        header = self.MAGIC + struct.pack(
+            "<IIIIIIIIIII",
+            self.VERSION,
+            zlib.crc32(body) & 0xFFFFFFFF,
+            len(records),
+            len(categories),
+            len(term_tables),
+            emoji_table_offset,
+            category_table_offset,
+            language_table_offset,
+            postings_offset,
+            string_blob_offset,
+            size,
+        )
+        if len(header) != self.HEADER_SIZE or len(header) + len(body) != size:
+            raise RuntimeError(f"emoji index size mismatch: header={len(header)} body={len(body)} size={size}")
+        return header + body
+
+
+class EmojiIndexReader:
+    """Host-side reader for MYBEMJ01 (mirrors the intended runtime binary search)."""
+
+    def __init__(self, data: bytes) -> None:
+        if data[:8] != EmojiIndexV1Writer.MAGIC:
+            raise ValueError(f"Invalid emoji index magic: {data[:8]!r}")
+        (
+            version,
+            crc,
+            self.emoji_count,
+            self.category_count,
+            language_count,
+            self.emoji_table_offset,
+            self.category_table_offset,
+            language_table_offset,
+            self.postings_offset,
+            self.string_blob_offset,
+            size,
+        ) = struct.unpack_from("<IIIIIIIIIII", data, 8)
+        if version != EmojiIndexV1Writer.VERSION or size != len(data):
+            raise ValueError(f"Unsupported emoji index: version={version} size={size} actual={len(data)}")
+        if zlib.crc32(data[EmojiIndexV1Writer.HEADER_SIZE :]) & 0xFFFFFFFF != crc:
+            raise ValueError("Invalid emoji index: CRC32 mismatch")
+        self.data = data
+        self.languages: dict[str, tuple[int, int]] = {}
+        for i in range(language_count):
+            lang_off, table_off, count, _ = struct.unpack_from("<IIII", data, language_table_offset + i * 16)
+            self.languages[self._string(lang_off)] = (table_off, count)
+
+    def _string(self, offset: int) -> str:
+        start = self.string_blob_offset + offset
+        return self.data[start : self.data.index(b"\0", start)].decode("utf-8")
+
+    def emoji(self, index: int) -> tuple[str, str, str, int]:
+        """Returns (emoji, codes, image_path, category_index)."""
+        e, c, p, cat, _ = struct.unpack_from("<IIIHH", self.data, self.emoji_table_offset + index * 16)
+        return self._string(e), self._string(c), self._string(p), cat
+
+    def categories(self) -> list[tuple[str, str, int, int]]:
+        out = []
+        for i in range(self.category_count):
+            cid, name, first, count = struct.unpack_from("<IIII", self.data, self.category_table_offset + i * 16)
+            out.append((self._string(cid), self._string(name), first, count))
+        return out
+
+    def search(self, query: str, lang: str, limit: int = 200) -> list[int]:
+        """
+        Emoji indices (catalog order) having any term that starts with `query`: a prefix of any word-boundary
+        suffix of a name/keyword ("big e", "eyes"), or any infix inside CJK text (笑 matches 大笑).
+        """
+        q = _normalize_term(query)
+        table = self.languages.get(lang)
+        if not q or table is None:
+            return []
+        table_off, count = table
+        target = q.encode("utf-8")
+
+        def _term(i: int) -> tuple[bytes, int, int]:
+            off, first, n = struct.unpack_from("<III", self.data, table_off + i * 12)
+            start = self.string_blob_offset + off
+            return self.data[start : self.data.index(b"\0", start)], first, n
+
+        lo, hi = 0, count
+        while lo < hi:
+            mid = (lo + hi) >> 1
+            if _term(mid)[0] < target:
+                lo = mid + 1
+            else:
+                hi = mid
+        hits: set[int] = set()
+        i = lo
+        while i < count:
+            term, first, n = _term(i)
+            if not term.startswith(target):
+                break
+            hits.update(struct.unpack_from(f"<{n}H", self.data, self.postings_offset + first * 2))
+            i += 1
+        return sorted(hits)[:limit]
+
+
+def _write_bytes_atomic(path: Path, data: bytes) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    with tmp.open("wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def _cmd_compile(argv: list[str]) -> int:
+    p = argparse.ArgumentParser(
+        prog="emoji_tool.py compile",
+        description="Compile assets/emoji/emoji.json into a binary emoji search index (MYBEMJ01).",
+    )
+    p.add_argument("--input", required=True, type=Path, help="Input emoji JSON (EmojiCategoryFile schema).")
+    p.add_argument("--output", required=True, type=Path, help="Output index file (e.g. emoji/emoji.mybemoji).")
+    p.add_argument("--languages", default="zh,en", help="Comma-separated keyword languages to index (default: zh,en).")
+    args = p.parse_args(argv)
+
+    languages = [s.strip() for s in str(args.languages).split(",") if s.strip()]
+    try:
+        categories, records = _load_catalog(args.input)
+        data = EmojiIndexV1Writer().encode(categories, records, languages)
+    except (ValueError, TypeError, AttributeError) as e:
+        raise SystemExit(f"{args.input}: {e}")
+    if not any(_search_terms(r, lang) for r in records for lang in languages):
+        # An index without terms can never match; refuse to produce it rather than ship a dead artifact.
+        raise SystemExit(
+            f"{args.input}: no emoji has a name or keyword for languages {','.join(languages)}; "
+            "fill in item name/keywords before compiling a search index."
+        )
+    _write_bytes_atomic(args.output, data)
+    print(f"emoji={len(records)} categories={len(categories)} bytes={len(data)}", file=sys.stderr)
+    return 0
+
+
+def _cmd_search(argv: list[str]) -> int:
+    p = argparse.ArgumentParser(prog="emoji_tool.py search", description="Search a compiled emoji index.")
+    p.add_argument("--input", required=True, type=Path, help="Compiled index file (MYBEMJ01).")
+    p.add_argument("--query", required=True, help="Search text (term prefix).")
+    p.add_argument("--lang", default="en", help="Keyword language (default: en).")
+    p.add_argument("--limit", default="50", help="Max results (default: 50).")
+    args = p.parse_args(argv)
+
+    reader = EmojiIndexReader(args.input.read_bytes())
+    for i in reader.search(args.query, args.lang, limit=int(args.limit)):
+        emoji, codes, image_path, _ = reader.emoji(i)
+        print(f"{emoji}\t{codes}\t{image_path}")
+    return 0
+
+
+def main(argv: list[str]) -> int:
+    if not argv:
+        raise SystemExit("Usage: emoji_tool.py <command> [args...]; command=compile|search")
+
+    cmd, *rest = argv
+    if cmd == "compile":
+        return _cmd_compile(rest)
+    if cmd == "search":
+        return _cmd_search(rest)
+
+    raise SystemExit(f"Unknown command: {cmd}")
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
@@ -2,8 +2,11 @@
 from __future__ import annotations
 
 import argparse
+import hashlib
 import json
 import os
+import struct
+import zlib
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Any, Iterable
@@ -105,6 +108,533 @@ def _parse_dictionary(obj: dict[str, Any], source: Path) -> DictionaryDef:
     )
 
 
+def _read_dictionary_pack_toc(path: Path) -> list[dict[str, Any]]:
+    """
+    Reads the table of contents of a dictionary pack (`dict_tool.py pack`, MYBDF v1 + MYBPACK1).
+
+    Only the 64-byte MYBDF header and the meta JSON are read (CRC-checked); the TOC is `meta.pack.dictionaries`,
+    one DictionarySpec-like object per packed dictionary.
+    """
+    with path.open("rb") as f:
+        header = f.read(64)
+        if len(header) < 64 or header[:8] != b"MYBDF001":
+            raise ValueError(f"{path}: not a MYBDF v1 file")
+        (meta_size,) = struct.unpack_from("<I", header, 36)
+        (crc_header_meta,) = struct.unpack_from("<I", header, 52)
+        meta_bytes = f.read(meta_size)
+    if zlib.crc32(header[:52] + b"\0\0\0\0" + header[56:] + meta_bytes) & 0xFFFFFFFF != crc_header_meta:
+        raise ValueError(f"{path}: header/meta CRC32 mismatch")
+    meta = json.loads(meta_bytes.decode("utf-8"))
+    pack = meta.get("pack") if isinstance(meta, dict) else None
+    if not isinstance(pack, dict) or not isinstance(pack.get("dictionaries"), list):
+        raise ValueError(f"{path}: not a dictionary pack (missing meta.pack.dictionaries)")
+    return [d for d in pack["dictionaries"] if isinstance(d, dict)]
+
+
+# An edge coordinate as (ratio, dp): px = ratio * view_size_px + dp * density.
+# Key geometry in `KeyboardSurfaceView.computeKeyRects` is affine in (view size, density), so this is exact
+# (apart from the coerceAtLeast(0) clamps that only matter for degenerate sizes).
+Edge = tuple[float, float]
+Rect = tuple[Edge, Edge, Edge, Edge]  # left, top, right, bottom
+
+# Uniform hit-test grid over the normalized keyboard area.
+HIT_GRID_COLS = 32
+HIT_GRID_ROWS = 16
+# Keyboard view size range (dp) the hit-test grid stays conservative for.
+HIT_GRID_WIDTH_DP = (240.0, 1280.0)
+HIT_GRID_HEIGHT_DP = (120.0, 640.0)
+
+
+def _lin(a: Edge, b: Edge, ka: float = 1.0, kb: float = 1.0) -> Edge:
+    return (a[0] * ka + b[0] * kb, a[1] * ka + b[1] * kb)
+
+
+def _f(obj: dict[str, Any], key: str, default: float) -> float:
+    v = obj.get(key)
+    return default if v is None else float(v)
+
+
+@dataclass(frozen=True)
+class CompiledKey:
+    key_id: str
+    primary_code: int
+    row_index: int
+    visual: Rect
+    touch: Rect
+
+
+def _compile_key_rects(obj: dict[str, Any]) -> list[CompiledKey]:
+    """
+    Resolves key visual/touch rects like `KeyboardSurfaceView.computeKeyRects/computeTouchRects`.
+
+    Horizontal edges are relative to the keyboard view width, vertical edges to its height.
+    """
+    defaults = obj.get("defaults") or {}
+    padding = defaults.get("padding") or {}
+    left_dp = _f(padding, "leftDp", 0.0)
+    right_dp = _f(padding, "rightDp", 0.0)
+    top_dp = _f(padding, "topDp", 0.0)
+    bottom_dp = _f(padding, "bottomDp", 0.0)
+    default_hgap = _f(defaults, "horizontalGapDp", 0.0)
+    vgap = _f(defaults, "verticalGapDp", 0.0)
+
+    rows = obj.get("rows") or []
+    row_count = max(1, len(rows))
+    available_width: Edge = (1.0, -left_dp - right_dp)
+    content_height: Edge = (1.0, -top_dp - bottom_dp - vgap * (row_count - 1))
+
+    visual: list[tuple[int, dict[str, Any], Rect]] = []
+    row_spans: dict[int, tuple[Edge, Edge]] = {}
+    y: Edge = (0.0, top_dp)
+    for row_index, row in enumerate(rows):
+        row_height = _lin(content_height, (0.0, _f(row, "heightDpOffset", 0.0)), float(row["heightRatio"]))
+        row_top = y
+        row_bottom = _lin(row_top, row_height)
+        y = _lin(row_bottom, (0.0, vgap))
+
+        keys = sorted(row.get("keys") or [], key=lambda k: int(k["ui"]["gridPosition"]["startCol"]))
+        if not keys:
+            continue
+        row_spans[row_index] = (row_top, row_bottom)
+
+        gap = _f(row, "horizontalGapDp", default_hgap)
+        start_pad = _f(row, "startPaddingDp", left_dp)
+        end_pad = _f(row, "endPaddingDp", right_dp)
+        row_available = _lin(
+            available_width,
+            (0.0, _f(row, "widthDpOffset", 0.0) - start_pad - end_pad),
+            _f(row, "widthRatio", 1.0),
+        )
+        # LEFT/JUSTIFY/weighted CENTER start at the padding; grid CENTER centers a row that already fills
+        # the available width, so the offset is zero there too.
+        x0: Edge = (0.0, left_dp + start_pad)
+        uses_weight = any(float(k["ui"].get("widthWeight", 1.0)) != 1.0 for k in keys)
+        if uses_weight:
+            total_weight = max(0.0001, sum(float(k["ui"].get("widthWeight", 1.0)) for k in keys))
+            unit = _lin(_lin(row_available, (0.0, -gap * max(0, len(keys) - 1))), (0.0, 0.0), 1.0 / total_weight)
+            x = x0
+            for k in keys:
+                w = float(k["ui"].get("widthWeight", 1.0))
+                right = _lin(x, unit, 1.0, w)
+                visual.append((row_index, k, (x, row_top, right, row_bottom)))
+                x = _lin(right, (0.0, gap))
+        else:
+            col_count = max(1, max(int(k["ui"]["gridPosition"]["startCol"]) + int(k["ui"]["gridPosition"].get("spanCols", 1)) for k in keys))
+            cell = _lin(_lin(row_available, (0.0, -gap * (col_count - 1))), (0.0, 0.0), 1.0 / col_count)
+            for k in keys:
+                gp = k["ui"]["gridPosition"]
+                start_col = int(gp["startCol"])
+                span = int(gp.get("spanCols", 1))
+                left = _lin(x0, _lin(cell, (0.0, gap)), 1.0, start_col)
+                right = _lin(left, _lin(cell, (0.0, gap * (span - 1)), span, 1.0))
+                visual.append((row_index, k, (left, row_top, right, row_bottom)))
+
+    out: list[CompiledKey] = []
+    last_row = len(rows) - 1
+    by_row: dict[int, list[tuple[dict[str, Any], Rect]]] = {}
+    for row_index, k, rect in visual:
+        by_row.setdefault(row_index, []).append((k, rect))
+    for row_index, items in sorted(by_row.items()):
+        row_top, row_bottom = row_spans[row_index]
+        touch_top = (0.0, 0.0) if row_index == 0 else _lin(row_top, (0.0, -vgap / 2.0))
+        touch_bottom = (1.0, 0.0) if row_index == last_row else _lin(row_bottom, (0.0, vgap / 2.0))
+        for i, (k, rect) in enumerate(items):
+            left = (0.0, 0.0) if i == 0 else _lin(items[i - 1][1][2], rect[0], 0.5, 0.5)
+            right = (1.0, 0.0) if i == len(items) - 1 else _lin(rect[2], items[i + 1][1][0], 0.5, 0.5)
+            out.append(
+                CompiledKey(
+                    key_id=str(k["keyId"]),
+                    primary_code=int(k.get("primaryCode", 0)),
+                    row_index=row_index,
+                    visual=rect,
+                    touch=(left, touch_top, right, touch_bottom),
+                )
+            )
+    return out
+
+
+def _edge_range(e: Edge, size_range: tuple[float, float]) -> tuple[float, float]:
+    """Normalized [min, max] of an edge over a view size range (dp); linear in size, so endpoints suffice."""
+    a = e[0] + e[1] / size_range[0]
+    b = e[0] + e[1] / size_range[1]
+    return min(a, b), max(a, b)
+
+
+def _build_hit_grid(keys: list[CompiledKey]) -> list[list[int]]:
+    """Per grid cell, the keys whose touch rect may intersect it for any view size in the reference range."""
+    cells: list[list[int]] = [[] for _ in range(HIT_GRID_COLS * HIT_GRID_ROWS)]
+    for index, key in enumerate(keys):
+        left, top, right, bottom = key.touch
+        x0 = _edge_range(left, HIT_GRID_WIDTH_DP)[0]
+        x1 = _edge_range(right, HIT_GRID_WIDTH_DP)[1]
+        y0 = _edge_range(top, HIT_GRID_HEIGHT_DP)[0]
+        y1 = _edge_range(bottom, HIT_GRID_HEIGHT_DP)[1]
+        c0 = max(0, min(HIT_GRID_COLS - 1, int(x0 * HIT_GRID_COLS)))
+        c1 = max(0, min(HIT_GRID_COLS - 1, int(x1 * HIT_GRID_COLS)))
+        r0 = max(0, min(HIT_GRID_ROWS - 1, int(y0 * HIT_GRID_ROWS)))
+        r1 = max(0, min(HIT_GRID_ROWS - 1, int(y1 * HIT_GRID_ROWS)))
+        for r in range(r0, r1 + 1):
+            for c in range(c0, c1 + 1):
+                cells[r * HIT_GRID_COLS + c].append(index)
+    return cells
+
+
+def compile_layout(obj: dict[str, Any]) -> bytes:
+    """
+    Compiled layout geometry (MYBLAY01), little-endian.
+
+    Header (48 bytes):
+      magic[8] = b"MYBLAY01"
+      u32 version = 1
+      u32 crc32_body (over all bytes after the header)
+      u32 key_count
+      u32 row_count
+      u16 grid_cols
+      u16 grid_rows
+      u32 key_table_offset
+      u32 grid_index_offset
+      u32 grid_keys_offset
+      u32 string_blob_offset
+      u32 size
+    key_table[key_count] of (76 bytes, in row order then startCol order):
+      u32 key_id_offset (relative to string_blob_offset)
+      u16 row_index
+      u16 reserved = 0
+      i32 primary_code
+      f32 visual[left, top, right, bottom] x (ratio, dp)
+      f32 touch[left, top, right, bottom] x (ratio, dp)
+      (px = ratio * view_size_px + dp * density; x uses view width, y uses view height)
+    grid_index[grid_cols * grid_rows + 1]: u32 start offsets into grid_keys (row-major cells)
+    grid_keys[]: u16 key indices (candidates to test against touch rects)
+    string_blob: NUL-terminated utf-8 key ids
+    """
+    keys = _compile_key_rects(obj)
+    cells = _build_hit_grid(keys)
+
+    string_blob = bytearray()
+    key_table = bytearray()
+    for k in keys:
+        key_table += struct.pack("<IHHi", len(string_blob), k.row_index, 0, k.primary_code)
+        for rect in (k.visual, k.touch):
+            for ratio, dp in rect:
+                key_table += struct.pack("<ff", ratio, dp)
+        string_blob += k.key_id.encode("utf-8") + b"\0"
+
+    grid_index = bytearray()
+    grid_keys = bytearray()
+    n = 0
+    for cell in cells:
+        grid_index += struct.pack("<I", n)
+        for i in cell:
+            grid_keys += struct.pack("<H", i)
+        n += len(cell)
+    grid_index += struct.pack("<I", n)
+
+    header_size = 8 + 4 * 4 + 2 * 2 + 4 * 5
+    key_table_offset = header_size
+    grid_index_offset = key_table_offset + len(key_table)
+    grid_keys_offset = grid_index_offset + len(grid_index)
+    string_blob_offset = grid_keys_offset + len(grid_keys)
+    string_blob += b"\0" * (-(string_blob_offset + len(string_blob)) % 4)
+    size = string_blob_offset + len(string_blob)
+
+    body = bytes(key_table + grid_index + grid_keys + string_blob)
+    header = b"MYBLAY01" + struct.pack(
+        "<IIIIHHIIIII",
+        1,
+        zlib.crc32(body) & 0xFFFFFFFF,
+        len(keys),
+        len(obj.get("rows") or []),
+        HIT_GRID_COLS,
+        HIT_GRID_ROWS,
+        key_table_offset,
+        grid_index_offset,
+        grid_keys_offset,
+        string_blob_offset,
+        size,
+    )
+    if len(header) != header_size or len(header) + len(body) != size:
+        raise RuntimeError(f"compiled layout size mismatch: header={len(header)} body={len(body)} size={size}")
+    return header + body
+
+
+def _write_bytes_atomic(path: Path, data: bytes) -> None:
+    """Writes `<path>.tmp`, fsyncs it and moves it over `path`, then fsyncs the directory, like dict_tool.py's writer."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    try:
+        with tmp.open("wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+    if os.name == "posix":
+        fd = os.open(path.parent, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+
+class AssetBundleWriter:
+    """
+    Pre-parsed asset bundle (MYBASB01): many JSON assets in one file, decodable per section.
+
+    Header (40 bytes, little-endian):
+      magic[8] = b"MYBASB01"
+      u32 version = 1
+      u32 section_count
+      u32 toc_offset
+      u32 string_table_offset
+      u32 string_count
+      u32 crc32_toc_strings (over toc + string table)
+      u32 size
+      u32 reserved = 0
+    toc[section_count] of (40 bytes):
+      u32 kind_string_id (e.g. "layouts", "themes")
+      u32 name_string_id (asset path relative to assets/, e.g. "layouts/qwerty.json")
+      u32 offset
+      u32 size
+      u32 crc32 (over section bytes)
+      u8 source_sha256_prefix[20] (content hash of the source JSON; used to skip unchanged inputs)
+    string table:
+      u32 offsets[string_count + 1] (relative to the blob start, right after this array)
+      blob: utf-8 strings (no NUL)
+    sections: one tagged value each:
+      0x00 null | 0x01 false | 0x02 true
+      0x03 i32 | 0x04 i64 | 0x05 f64
+      0x06 string: u32 string_id
+      0x07 array: u32 count, values...
+      0x08 object: u32 count, (u32 key_string_id, value)...
+    """
+
+    MAGIC = b"MYBASB01"
+    VERSION = 1
+    HEADER_SIZE = 40
+    TOC_RECORD_SIZE = 40
+    HASH_SIZE = 20
+
+    def __init__(self) -> None:
+        self._strings: dict[str, int] = {}
+
+    def _intern(self, text: str) -> int:
+        sid = self._strings.get(text)
+        if sid is None:
+            sid = len(self._strings)
+            self._strings[text] = sid
+        return sid
+
+    def _encode_value(self, v: Any, out: bytearray) -> None:
+        if v is None:
+            out.append(0x00)
+        elif v is False:
+            out.append(0x01)
+        elif v is True:
+            out.append(0x02)
+        elif isinstance(v, int):
+            if -(1 << 31) <= v < (1 << 31):
+                out.append(0x03)
+                out += struct.pack("<i", v)
+            else:
+                out.append(0x04)
+                out += struct.pack("<q", v)
+        elif isinstance(v, float):
+            out.append(0x05)
+            out += struct.pack("<d", v)
+        elif isinstance(v, str):
+            out.append(0x06)
+            out += struct.pack("<I", self._intern(v))
+        elif isinstance(v, list):
+            out.append(0x07)
+            out += struct.pack("<I", len(v))
+            for item in v:
+                self._encode_value(item, out)
+        elif isinstance(v, dict):
+            out.append(0x08)
+            out += struct.pack("<I", len(v))
+            for k, item in v.items():
+                out += struct.pack("<I", self._intern(str(k)))
+                self._encode_value(item, out)
+        else:
+            raise TypeError(f"unsupported JSON value: {type(v).__name__}")
+
+    def encode(self, sections: list[tuple[str, str, bytes, Any]]) -> bytes:
+        """`sections` are (kind, name, source_hash, value) in output order."""
+        self._strings = {}
+        toc_fields: list[tuple[int, int, bytes, bytes]] = []
+        for kind, name, source_hash, value in sections:
+            body = bytearray()
+            self._encode_value(value, body)
+            toc_fields.append((self._intern(kind), self._intern(name), source_hash, bytes(body)))
+
+        strings = [t.encode("utf-8") for t in self._strings]
+        string_offsets = bytearray()
+        off = 0
+        for b in strings:
+            string_offsets += struct.pack("<I", off)
+            off += len(b)
+        string_offsets += struct.pack("<I", off)
+        string_table = bytes(string_offsets) + b"".join(strings)
+        string_table += b"\0" * (-len(string_table) % 4)
+
+        toc_offset = self.HEADER_SIZE
+        string_table_offset = toc_offset + len(toc_fields) * self.TOC_RECORD_SIZE
+        offset = string_table_offset + len(string_table)
+        toc = bytearray()
+        bodies = bytearray()
+        for kind_id, name_id, source_hash, body in toc_fields:
+            toc += struct.pack("<IIIII", kind_id, name_id, offset + len(bodies), len(body), zlib.crc32(body) & 0xFFFFFFFF)
+            toc += source_hash[: self.HASH_SIZE].ljust(self.HASH_SIZE, b"\0")
+            bodies += body
+        size = offset + len(bodies)
+
+        header = self.MAGIC + struct.pack(
+            "<IIIIIIII",
+            self.VERSION,
+            len(toc_fields),
+            toc_offset,
+            string_table_offset,
+            len(strings),
+            zlib.crc32(bytes(toc) + string_table) & 0xFFFFFFFF,
+            size,
+            0,
+        )
+        return header + bytes(toc) + string_table + bytes(bodies)
+
+
+class AssetBundleReader:
+    """Reads MYBASB01 bundles (used to skip unchanged inputs and to verify builds)."""
+
+    def __init__(self, data: bytes) -> None:
+        if data[:8] != AssetBundleWriter.MAGIC:
+            raise ValueError(f"Invalid asset bundle magic: {data[:8]!r}")
+        (version, count, toc_offset, st_offset, string_count, crc, size, _reserved) = struct.unpack_from("<IIIIIIII", data, 8)
+        if version != AssetBundleWriter.VERSION or size != len(data):
+            raise ValueError(f"Unsupported asset bundle: version={version} size={size} actual={len(data)}")
+        offsets_end = st_offset + (string_count + 1) * 4
+        offsets = struct.unpack_from(f"<{string_count + 1}I", data, st_offset)
+        blob_end = offsets_end + offsets[-1]
+        string_table_end = blob_end + (-(blob_end - st_offset) % 4)
+        if zlib.crc32(data[toc_offset:string_table_end]) & 0xFFFFFFFF != crc:
+            raise ValueError("Invalid asset bundle: toc/string table CRC32 mismatch")
+        self.data = data
+        self.strings = [data[offsets_end + offsets[i] : offsets_end + offsets[i + 1]].decode("utf-8") for i in range(string_count)]
+        self.toc: dict[tuple[str, str], tuple[int, int, int, bytes]] = {}
+        for i in range(count):
+            pos = toc_offset + i * AssetBundleWriter.TOC_RECORD_SIZE
+            kind_id, name_id, offset, length, section_crc = struct.unpack_from("<IIIII", data, pos)
+            source_hash = data[pos + 20 : pos + 20 + AssetBundleWriter.HASH_SIZE]
+            self.toc[(self.strings[kind_id], self.strings[name_id])] = (offset, length, section_crc, source_hash)
+
+    def source_hash(self, kind: str, name: str) -> bytes | None:
+        rec = self.toc.get((kind, name))
+        return None if rec is None else rec[3]
+
+    def section(self, kind: str, name: str) -> Any:
+        offset, length, section_crc, _ = self.toc[(kind, name)]
+        body = self.data[offset : offset + length]
+        if zlib.crc32(body) & 0xFFFFFFFF != section_crc:
+            raise ValueError(f"Invalid asset bundle: section {kind}/{name} CRC32 mismatch")
+        value, _ = self._decode(body, 0)
+        return value
+
+    def _decode(self, b: bytes, pos: int) -> tuple[Any, int]:
+        tag = b[pos]
+        pos += 1
+        if tag <= 0x02:
+            return (None, False, True)[tag], pos
+        if tag == 0x03:
+            return struct.unpack_from("<i", b, pos)[0], pos + 4
+        if tag == 0x04:
+            return struct.unpack_from("<q", b, pos)[0], pos + 8
+        if tag == 0x05:
+            return struct.unpack_from("<d", b, pos)[0], pos + 8
+        if tag == 0x06:
+            return self.strings[struct.unpack_from("<I", b, pos)[0]], pos + 4
+        (count,) = struct.unpack_from("<I", b, pos)
+        pos += 4
+        if tag == 0x07:
+            items = []
+            for _ in range(count):
+                item, pos = self._decode(b, pos)
+                items.append(item)
+            return items, pos
+        if tag == 0x08:
+            obj = {}
+            for _ in range(count):
+                (key_id,) = struct.unpack_from("<I", b, pos)
+                obj[self.strings[key_id]], pos = self._decode(b, pos + 4)
+            return obj, pos
+        raise ValueError(f"Invalid asset bundle value tag: {tag:#x}")
+
+
+def _validate_bundle_asset(kind: str, obj: Any, source: Path) -> None:
+    if not isinstance(obj, dict):
+        raise ValueError(f"{source}: {kind} json root must be an object")
+    if kind == "layouts":
+        _parse_layout(obj, source)
+        compile_layout(obj)
+    elif kind == "themes":
+        if not str(obj.get("themeId", "")).strip():
+            raise ValueError(f"{source}: missing themeId")
+    elif kind == "toolbars":
+        if not str(obj.get("toolbarId", "")).strip():
+            raise ValueError(f"{source}: missing toolbarId")
+        if not isinstance(obj.get("items", []), list):
+            raise ValueError(f"{source}: items must be a list")
+    elif kind == "symbols":
+        if not isinstance(obj.get("categories", []), list):
+            raise ValueError(f"{source}: categories must be a list")
+
+
+def build_asset_bundle(
+    inputs: list[tuple[str, Path]],
+    generated: list[tuple[str, str, Any]],
+    out_path: Path,
+) -> bool:
+    """
+    Validates and bundles JSON assets into `out_path` (MYBASB01). Returns False if the bundle was up to date.
+
+    `inputs` are (kind, file) pairs; section names are "<kind>/<file name>". Inputs whose content hash matches
+    the existing bundle are taken from it instead of being re-parsed and re-validated.
+    `generated` are in-memory (kind, name, value) sections, e.g. the subtype pack.
+    """
+    previous: AssetBundleReader | None = None
+    if out_path.exists():
+        try:
+            previous = AssetBundleReader(out_path.read_bytes())
+        except (ValueError, struct.error, UnicodeDecodeError):
+            previous = None
+
+    sections: list[tuple[str, str, bytes, Any]] = []
+    unchanged = previous is not None
+    for kind, path in inputs:
+        raw = path.read_bytes()
+        digest = hashlib.sha256(raw).digest()
+        name = f"{kind}/{path.name}"
+        if previous is not None and previous.source_hash(kind, name) == digest[: AssetBundleWriter.HASH_SIZE]:
+            sections.append((kind, name, digest, previous.section(kind, name)))
+            continue
+        unchanged = False
+        obj = json.loads(raw.decode("utf-8"))
+        _validate_bundle_asset(kind, obj, path)
+        sections.append((kind, name, digest, obj))
+    for kind, name, value in generated:
+        raw = json.dumps(value, ensure_ascii=False, sort_keys=True).encode("utf-8")
+        digest = hashlib.sha256(raw).digest()
+        if previous is None or previous.source_hash(kind, name) != digest[: AssetBundleWriter.HASH_SIZE]:
+            unchanged = False
+        sections.append((kind, name, digest, value))
+    if unchanged and previous is not None and len(previous.toc) == len(sections):
+        return False
+
+    _write_bytes_atomic(out_path, AssetBundleWriter().encode(sections))
+    return True
+
+
 def generate(layouts: list[LayoutDef], dictionaries: list[DictionaryDef]) -> dict[str, Any]:
     """
     Final scheme2: generate a "locale -> layoutIds[]" mapping table.
@@ -149,8 +679,30 @@ def main(argv: list[str] | None = None) -> int:
         type=Path,
         help="Directory containing dictionary meta JSON files. Can be specified multiple times.",
     )
+    parser.add_argument(
+        "--dictionary-pack",
+        default=[],
+        action="append",
+        type=Path,
+        help="Dictionary pack (.mybpack) whose table of contents lists dictionaries. Can be specified multiple times.",
+    )
     parser.add_argument("--output", required=True, type=Path, help="Output JSON path (SubtypePack schema).")
     parser.add_argument("--fail-on-empty", action="store_true", help="Fail if no subtypes are generated.")
+    parser.add_argument(
+        "--compiled-layouts-dir",
+        default=None,
+        type=Path,
+        help="Optional output directory for compiled layout geometry (<layoutId>.myblayout).",
+    )
+    parser.add_argument(
+        "--bundle-output",
+        default=None,
+        type=Path,
+        help="Optional output path for a pre-parsed asset bundle (MYBASB01) of layouts/themes/toolbars/symbols/subtypes.",
+    )
+    parser.add_argument("--themes-dir", default=None, type=Path, help="Theme JSON directory (for --bundle-output).")
+    parser.add_argument("--toolbars-dir", default=None, type=Path, help="Toolbar JSON directory (for --bundle-output).")
+    parser.add_argument("--symbols-dir", default=None, type=Path, help="Symbols JSON directory (for --bundle-output).")
     args = parser.parse_args(argv)
 
     layout_files = _iter_json_files(args.layouts_dir)
@@ -159,6 +711,7 @@ def main(argv: list[str] | None = None) -> int:
         dict_files.extend(_iter_json_files(d))
 
     layouts: list[LayoutDef] = []
+    bundle_inputs: list[tuple[str, Path]] = []
     for f in layout_files:
         try:
             obj = _load_json(f)
@@ -171,8 +724,23 @@ def main(argv: list[str] | None = None) -> int:
         if not obj.get("layoutId"):
             continue
         layouts.append(_parse_layout(obj, f))
+        bundle_inputs.append(("layouts", f))
+        if args.compiled_layouts_dir is not None:
+            layout_id = layouts[-1].layout_id
+            try:
+                compiled = compile_layout(obj)
+            except (KeyError, TypeError, ValueError) as e:
+                raise SystemExit(f"{f}: cannot compile layout geometry: {e}")
+            _write_bytes_atomic(args.compiled_layouts_dir / f"{layout_id}.myblayout", compiled)
 
     dictionaries: list[DictionaryDef] = []
+    # Packed dictionaries come first so that meta JSON files with the same dictionaryId override them.
+    for pack_path in args.dictionary_pack:
+        try:
+            toc = _read_dictionary_pack_toc(pack_path)
+        except (OSError, ValueError) as e:
+            raise SystemExit(f"dictionary pack: {e}")
+        dictionaries.extend(_parse_dictionary(obj, pack_path) for obj in toc)
     for f in dict_files:
         obj = _load_json(f)
         if not isinstance(obj, dict):
@@ -204,6 +772,15 @@ def main(argv: list[str] | None = None) -> int:
         json.dump(pack, f, ensure_ascii=False, indent=2)
         f.write("\n")
     os.replace(tmp, args.output)
+
+    if args.bundle_output is not None:
+        for kind, d in (("themes", args.themes_dir), ("toolbars", args.toolbars_dir), ("symbols", args.symbols_dir)):
+            if d is not None:
+                bundle_inputs.extend((kind, f) for f in _iter_json_files(d))
+        try:
+            build_asset_bundle(bundle_inputs, [("subtypes", f"subtypes/{args.output.name}", pack)], args.bundle_output)
+        except (ValueError, KeyError, TypeError) as e:
+            raise SystemExit(f"asset bundle: {e}")
     return 0
 
 
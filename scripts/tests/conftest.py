@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+import random
+import sys
+from collections.abc import Callable
+from pathlib import Path
+
+import pytest
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(REPO_ROOT / "scripts"))
+
+import dict_tool  # noqa: E402
+
+SYLLABLES = ("a", "ba", "bi", "chi", "de", "guo", "hao", "ma", "men", "mi", "ni", "shi", "ta", "wo", "xi", "zhong")
+HANZI = "的一是不了人我在有他这中大来上国个到说们为子和你地出道也时年"
+
+
+def write_rime_dict(path: Path, *, entries: int = 1500, seed: int = 7) -> Path:
+    """Deterministic synthetic Rime dictionary: multi-syllable codes, shared prefixes, zero and large weights."""
+    rng = random.Random(seed)
+    lines = ["---", "name: test", "version: \"1.0\"", "...", ""]
+    for _ in range(entries):
+        n = rng.randint(1, 3)
+        code = " ".join(rng.choice(SYLLABLES) for _ in range(n))
+        word = "".join(rng.choice(HANZI) for _ in range(n))
+        weight = rng.choice((0, rng.randint(1, 5000)))
+        lines.append(f"{word}\t{code}\t{weight}")
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return path
+
+
+@pytest.fixture
+def rime_dict(tmp_path: Path) -> Path:
+    return write_rime_dict(tmp_path / "test.dict.yaml")
+
+
+@pytest.fixture
+def qwerty_layout() -> Path:
+    return REPO_ROOT / "app/src/main/assets/layouts/qwerty.json"
+
+
+@pytest.fixture
+def convert(tmp_path: Path) -> Callable[..., Path]:
+    """Runs `dict_tool.py convert` on a Rime source; returns the output path."""
+
+    def _convert(source: Path, output: Path | str, *extra: str) -> Path:
+        out = tmp_path / output if isinstance(output, str) else output
+        argv = [
+            "convert",
+            "--input",
+            str(source),
+            "--format",
+            "rime_dict_yaml",
+            "--dictionary-id",
+            "test",
+            "--languages",
+            "zh-CN",
+            "--output",
+            str(out),
+            *extra,
+        ]
+        assert dict_tool.main(argv) == 0
+        return out
+
+    return _convert
@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import json
+import shutil
+
+import pytest
+
+import generate_subtypes as gs
+from conftest import REPO_ROOT
+
+ASSETS = REPO_ROOT / "app/src/main/assets"
+FIXTURE = {
+    "layouts": ["qwerty.json", "t9.json"],
+    "themes": ["theme_default.json", "theme_slate.json"],
+    "toolbars": ["toolbar_default.json"],
+    "symbols": ["symbols.json"],
+}
+SUBTYPES = {"version": 1, "locales": {"zh_CN": ["qwerty", "t9"]}, "ratio": 0.5, "big": 1 << 40, "none": None}
+
+
+@pytest.fixture
+def inputs(tmp_path):
+    pairs = []
+    for kind, names in FIXTURE.items():
+        (tmp_path / kind).mkdir()
+        for name in names:
+            pairs.append((kind, shutil.copy(ASSETS / kind / name, tmp_path / kind / name)))
+    return pairs
+
+
+def _build(inputs, out, subtypes=SUBTYPES):
+    return gs.build_asset_bundle(inputs, [("subtypes", "subtypes/generated.json", subtypes)], out)
+
+
+def test_bundle_round_trip(inputs, tmp_path):
+    out = tmp_path / "bundle" / "assets.mybundle"
+    assert _build(inputs, out) is True
+    reader = gs.AssetBundleReader(out.read_bytes())
+    assert len(reader.toc) == len(inputs) + 1
+    for kind, path in inputs:
+        assert reader.section(kind, f"{kind}/{path.name}") == json.loads(path.read_text(encoding="utf-8"))
+    assert reader.section("subtypes", "subtypes/generated.json") == SUBTYPES
+
+
+def test_bundle_is_not_rewritten_when_inputs_are_unchanged(inputs, tmp_path):
+    out = tmp_path / "assets.mybundle"
+    _build(inputs, out)
+    first = out.read_bytes()
+    stat = out.stat()
+
+    assert _build(inputs, out) is False
+    assert out.stat().st_mtime_ns == stat.st_mtime_ns and out.stat().st_ino == stat.st_ino
+    assert out.read_bytes() == first
+
+    # Changing one input rewrites the bundle with the new section and the others unchanged.
+    kind, theme = next((k, p) for k, p in inputs if k == "themes")
+    obj = json.loads(theme.read_text(encoding="utf-8"))
+    obj["name"] = "changed"
+    theme.write_text(json.dumps(obj), encoding="utf-8")
+    assert _build(inputs, out) is True
+    reader = gs.AssetBundleReader(out.read_bytes())
+    assert reader.section(kind, f"{kind}/{theme.name}")["name"] == "changed"
+    for other_kind, path in inputs:
+        if path != theme:
+            assert reader.section(other_kind, f"{other_kind}/{path.name}") == json.loads(path.read_text(encoding="utf-8"))
+
+    # So do a changed generated section and a removed input.
+    assert _build(inputs, out, {**SUBTYPES, "version": 2}) is True
+    assert _build(inputs[1:], out, {**SUBTYPES, "version": 2}) is True
+    assert len(gs.AssetBundleReader(out.read_bytes()).toc) == len(inputs)
+
+
+def test_bundle_rejects_invalid_assets(inputs, tmp_path):
+    bad = tmp_path / "toolbars" / "broken.json"
+    bad.write_text(json.dumps({"items": []}), encoding="utf-8")
+    with pytest.raises(ValueError, match="missing toolbarId"):
+        _build([*inputs, ("toolbars", bad)], tmp_path / "assets.mybundle")
+    assert not (tmp_path / "assets.mybundle").exists()
+
+
+def test_corrupt_section_is_detected(inputs, tmp_path):
+    out = tmp_path / "assets.mybundle"
+    _build(inputs, out)
+    data = bytearray(out.read_bytes())
+    data[-1] ^= 0xFF
+    reader = gs.AssetBundleReader(bytes(data))
+    with pytest.raises(ValueError, match="CRC32 mismatch"):
+        reader.section("subtypes", "subtypes/generated.json")
@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+import json
+
+import pytest
+
+import dict_tool
+
+ROWS = [("西安", "xi an", 500), ("先", "xian", 400), ("你好", "ni hao", 300), ("呢", "ne", 10)]
+
+
+@pytest.fixture
+def small_dict(tmp_path, convert):
+    source = tmp_path / "bench.dict.yaml"
+    lines = ["---", "name: bench", "...", ""] + [f"{word}\t{code}\t{weight}" for word, code, weight in ROWS]
+    source.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    # Codes: xian, nihao, ne (no derived single characters).
+    return convert(source, "bench.mybdict", "--single-chars-per-code", "0", "--code-hash")
+
+
+def _benchmark(path, trace, tmp_path, *extra):
+    (tmp_path / "trace.txt").write_text("\n".join(trace) + "\n", encoding="utf-8")
+    report = tmp_path / "report.json"
+    argv = ["benchmark", "--input", str(path), "--trace", str(tmp_path / "trace.txt"), "--report-json", str(report), *extra]
+    assert dict_tool.main(argv) == 0
+    return json.loads(report.read_text(encoding="utf-8"))
+
+
+def test_trace_codes_are_canonicalized(small_dict, tmp_path):
+    # "xi'an" and "Ni Hao" replay as xian / ni (first field); "qq" is not in the dictionary; comments are skipped.
+    report = _benchmark(small_dict, ["# recorded", "xi'an", "Ni Hao", "qq", "'"], tmp_path, "--rounds", "2")
+    assert report["traceLines"] == 3
+    # x xi xia xian / n ni / q qq
+    assert report["keystrokes"] == 8
+    exact, prefix = report["modes"]["exact"], report["modes"]["prefix"]
+    assert (exact["lookups"], exact["hits"], exact["misses"]) == (16, 2, 14)  # xian, twice
+    assert (prefix["lookups"], prefix["hits"], prefix["misses"]) == (16, 12, 4)  # all but q and qq
+    assert exact["hitRate"] == round(2 / 16, 4)
+
+
+def test_traced_reader_counts_bytes_of_a_hashed_hit(small_dict):
+    reader = dict_tool.MyBoardDictionaryReader.from_file(small_dict)
+    traced = dict_tool._TracedDictionaryReader(reader.payload, meta=reader.meta)
+    assert traced.candidates("xian") == reader.candidates("xian") == ["西安", "先"]
+
+    traced.reset_touched()
+    traced.candidates("xian")
+    # MPH1 bucket + slot, the verifying code compare, the code record, then two entries with their words.
+    words = sum(len(w.encode("utf-8")) + 1 for w in ("西安", "先"))
+    expected = 4 + 4 + 4 + len(b"xian") + 1 + 8 + 2 * reader.ENTRY_RECORD_SIZE + words
+    assert traced.bytes_touched == expected
+    assert traced.pages_touched
+    traced.reset_touched()
+    assert (traced.bytes_touched, traced.pages_touched) == (0, set())
+
+
+def test_lookup_canonicalizes_codes(small_dict, capsys):
+    assert dict_tool.main(["lookup", "--input", str(small_dict), "--code", "Xi'an"]) == 0
+    assert capsys.readouterr().out.splitlines() == ["西安", "先"]
+    assert dict_tool.main(["lookup", "--input", str(small_dict), "--prefix", "ni'"]) == 0
+    assert capsys.readouterr().out.splitlines() == ["你好"]
@@ -0,0 +1,30 @@
+from __future__ import annotations
+
+import dict_tool
+
+
+def test_mph_lookup_matches_binary_search(rime_dict, convert):
+    reader = dict_tool.MyBoardDictionaryReader.from_file(convert(rime_dict, "mph.mybdict", "--code-hash"))
+    assert reader.has_code_hash and reader.code_count > 100
+
+    for i in range(reader.code_count):
+        code = reader.code_at(i).decode("utf-8")
+        assert reader.find_code_index_hashed(code) == reader.find_code_index(code) == i
+
+
+def test_mph_lookup_rejects_missing_codes(rime_dict, convert):
+    reader = dict_tool.MyBoardDictionaryReader.from_file(convert(rime_dict, "mph.mybdict", "--code-hash"))
+    codes = {reader.code_at(i).decode("utf-8") for i in range(reader.code_count)}
+
+    for probe in ("", "q", "zzzz", "nihaoq", "bab", "shishishishi"):
+        if probe not in codes:
+            assert reader.find_code_index(probe) is None
+            assert reader.find_code_index_hashed(probe) is None
+
+
+def test_mph_single_code_dictionary(tmp_path, convert):
+    source = tmp_path / "one.dict.yaml"
+    source.write_text("---\nname: one\n...\n\n你\tni\t1\n", encoding="utf-8")
+    reader = dict_tool.MyBoardDictionaryReader.from_file(convert(source, "one.mybdict", "--code-hash"))
+    assert reader.find_code_index_hashed("ni") == 0
+    assert reader.find_code_index_hashed("nj") is None
@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+import json
+import struct
+import zlib
+
+import pytest
+
+import generate_subtypes as gs
+from conftest import REPO_ROOT
+
+LAYOUTS = REPO_ROOT / "app/src/main/assets/layouts"
+# (width dp, height dp, density) inside HIT_GRID_WIDTH_DP / HIT_GRID_HEIGHT_DP.
+VIEWS = [(411.0, 260.0, 2.625), (360.0, 240.0, 3.0), (800.0, 320.0, 2.0)]
+
+
+def _kotlin_rects(obj: dict, width: float, height: float, density: float) -> dict[str, tuple[tuple, tuple]]:
+    """Straight port of `KeyboardSurfaceView.computeKeyRects` + `computeTouchRects` (px); keyId -> (visual, touch)."""
+    dp = lambda v: float(v or 0.0) * density  # noqa: E731
+    defaults = obj.get("defaults") or {}
+    padding = defaults.get("padding") or {}
+    left_px, top_px = dp(padding.get("leftDp")), dp(padding.get("topDp"))
+    right_px, bottom_px = dp(padding.get("rightDp")), dp(padding.get("bottomDp"))
+    available_width = max(0.0, width - left_px - right_px)
+    available_height = max(0.0, height - top_px - bottom_px)
+    rows = obj["rows"]
+    vgap = dp(defaults.get("verticalGapDp"))
+    content_height = max(0.0, available_height - vgap * (max(1, len(rows)) - 1))
+
+    visual: dict[str, tuple] = {}
+    y = top_px
+    for row in rows:
+        row_top, row_height = y, content_height * float(row["heightRatio"]) + dp(row.get("heightDpOffset"))
+        y += row_height + vgap
+        gap = dp(row.get("horizontalGapDp", defaults.get("horizontalGapDp")))
+        start_pad = dp(row.get("startPaddingDp", padding.get("leftDp")))
+        end_pad = dp(row.get("endPaddingDp", padding.get("rightDp")))
+        row_available = available_width * float(row.get("widthRatio", 1.0)) + dp(row.get("widthDpOffset")) - start_pad - end_pad
+        keys = sorted(row["keys"], key=lambda k: k["ui"]["gridPosition"]["startCol"])
+        weights = [float(k["ui"].get("widthWeight", 1.0)) for k in keys]
+        col_count = max(1, max(k["ui"]["gridPosition"]["startCol"] + k["ui"]["gridPosition"].get("spanCols", 1) for k in keys))
+        cell = max(0.0, (row_available - gap * (col_count - 1)) / col_count)
+        start_x = left_px + start_pad
+        if row.get("alignment") == "CENTER" and all(w == 1.0 for w in weights):
+            start_x += max(0.0, (row_available - (cell * col_count + gap * (col_count - 1))) / 2.0)
+        if any(w != 1.0 for w in weights):
+            unit = max(0.0, row_available - gap * max(0, len(keys) - 1)) / max(0.0001, sum(weights))
+            x = start_x
+            for k, w in zip(keys, weights):
+                visual[k["keyId"]] = (x, row_top, x + unit * w, row_top + row_height)
+                x += unit * w + gap
+        else:
+            for k in keys:
+                gp = k["ui"]["gridPosition"]
+                x = start_x + gp["startCol"] * (cell + gap)
+                span = gp.get("spanCols", 1)
+                visual[k["keyId"]] = (x, row_top, x + cell * span + gap * (span - 1), row_top + row_height)
+
+    out: dict[str, tuple[tuple, tuple]] = {}
+    for row_index, row in enumerate(rows):
+        keys = sorted(row["keys"], key=lambda k: k["ui"]["gridPosition"]["startCol"])
+        rects = [visual[k["keyId"]] for k in keys]
+        top = 0.0 if row_index == 0 else max(0.0, min(r[1] for r in rects) - vgap / 2.0)
+        bottom = height if row_index == len(rows) - 1 else min(height, max(r[3] for r in rects) + vgap / 2.0)
+        for i, (k, rect) in enumerate(zip(keys, rects)):
+            left = 0.0 if i == 0 else (rects[i - 1][2] + rect[0]) / 2.0
+            right = width if i == len(rects) - 1 else (rect[2] + rects[i + 1][0]) / 2.0
+            out[k["keyId"]] = (rect, (left, top, right, bottom))
+    return out
+
+
+def _parse_compiled(data: bytes) -> tuple[list[tuple[str, tuple, tuple]], list[list[int]]]:
+    """Reads a MYBLAY01 blob back into [(keyId, visual, touch)] with (ratio, dp) edges, plus the hit grid cells."""
+    assert data[:8] == b"MYBLAY01"
+    (version, crc, key_count, _rows, cols, grid_rows, key_off, grid_off, keys_off, str_off, size) = struct.unpack_from(
+        "<IIIIHHIIIII", data, 8
+    )
+    assert (version, size, len(data)) == (1, len(data), size)
+    assert crc == zlib.crc32(data[key_off:])
+    keys = []
+    for i in range(key_count):
+        base = key_off + i * 76
+        (name_off,) = struct.unpack_from("<I", data, base)
+        edges = struct.unpack_from("<16f", data, base + 12)
+        pairs = [edges[j : j + 2] for j in range(0, 16, 2)]
+        name_start = str_off + name_off
+        name = data[name_start : data.index(b"\0", name_start)].decode("utf-8")
+        keys.append((name, tuple(pairs[:4]), tuple(pairs[4:])))
+    starts = struct.unpack_from(f"<{cols * grid_rows + 1}I", data, grid_off)
+    cells = [list(struct.unpack_from(f"<{b - a}H", data, keys_off + a * 2)) for a, b in zip(starts, starts[1:])]
+    return keys, cells
+
+
+def _px(rect: tuple, width: float, height: float, density: float) -> tuple:
+    sizes = (width, height, width, height)
+    return tuple(ratio * size + dp * density for (ratio, dp), size in zip(rect, sizes))
+
+
+@pytest.mark.parametrize("name", sorted(p.name for p in LAYOUTS.glob("*.json")))
+def test_compiled_rects_match_kotlin(name):
+    obj = json.loads((LAYOUTS / name).read_text(encoding="utf-8"))
+    keys, _cells = _parse_compiled(gs.compile_layout(obj))
+    row_order = [sorted(row["keys"], key=lambda k: k["ui"]["gridPosition"]["startCol"]) for row in obj["rows"]]
+    assert [k for k, _v, _t in keys] == [k["keyId"] for row in row_order for k in row]
+    for w_dp, h_dp, density in VIEWS:
+        width, height = w_dp * density, h_dp * density
+        expected = _kotlin_rects(obj, width, height, density)
+        for key_id, visual, touch in keys:
+            assert _px(visual, width, height, density) == pytest.approx(expected[key_id][0], abs=0.01), (key_id, "visual")
+            assert _px(touch, width, height, density) == pytest.approx(expected[key_id][1], abs=0.01), (key_id, "touch")
+
+
+def test_qwerty_known_rects():
+    obj = json.loads((LAYOUTS / "qwerty.json").read_text(encoding="utf-8"))
+    keys = {k: (v, t) for k, v, t in _parse_compiled(gs.compile_layout(obj))[0]}
+    # 1000 x 600 px at density 1. Row 1: the row start padding (6) is added on top of the keyboard padding (6),
+    # so `q` starts at 12, not 6; the cell is (1000 - 12 - 12 - 9 * 4) / 10 = 94 wide.
+    assert _px(keys["key_q"][0], 1000, 600, 1.0) == pytest.approx((12.0, 6.0, 106.0, 6.0 + (600 - 12 - 15) * 0.25), abs=1e-3)
+    assert _px(keys["key_w"][0], 1000, 600, 1.0)[0] == pytest.approx(110.0, abs=1e-3)
+    # Row 2 is CENTER-aligned on a grid that already fills the row, so it starts at the padding like row 1.
+    assert _px(keys["key_a"][0], 1000, 600, 1.0)[0] == pytest.approx(12.0, abs=1e-3)
+    # Touch rects of the first / last key in a row reach the view edges.
+    assert _px(keys["key_q"][1], 1000, 600, 1.0)[0] == 0.0
+    assert _px(keys["key_p"][1], 1000, 600, 1.0)[2] == pytest.approx(1000.0)
+
+
+@pytest.mark.parametrize("name", ["qwerty.json", "t9.json", "zh_cn_cluster.json"])
+def test_hit_grid_cells_hold_the_touched_key(name):
+    obj = json.loads((LAYOUTS / name).read_text(encoding="utf-8"))
+    keys, cells = _parse_compiled(gs.compile_layout(obj))
+    index = {key_id: i for i, (key_id, _v, _t) in enumerate(keys)}
+    checked = 0
+    for w_dp, h_dp, density in VIEWS:
+        width, height = w_dp * density, h_dp * density
+        touch = {key_id: t for key_id, (_v, t) in _kotlin_rects(obj, width, height, density).items()}
+        for yi in range(1, 60):
+            for xi in range(1, 120):
+                x, y = width * xi / 120, height * yi / 60
+                hits = [k for k, (l, t, r, b) in touch.items() if l <= x < r and t <= y < b]
+                if not hits:
+                    continue
+                cell = cells[int(y / height * gs.HIT_GRID_ROWS) * gs.HIT_GRID_COLS + int(x / width * gs.HIT_GRID_COLS)]
+                assert index[hits[0]] in cell, (hits[0], x, y)
+                checked += 1
+    assert checked > 10_000
@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import json
+
+import pytest
+
+import emoji_tool
+
+CATALOG = {
+    "version": 1,
+    "categories": [
+        {
+            "categoryId": "smileys_and_emotion",
+            "name": "faces",
+            "items": [
+                {
+                    "emoji": "😀",
+                    "codes": ["1f600"],
+                    "name": {"zh": "大笑", "en": "Grinning Face"},
+                    "keywords": {"zh": ["开心"], "en": ["smile", "happy"]},
+                    "image": {"path": "twemoji/72x72/1f600.png"},
+                },
+                {
+                    "emoji": "😃",
+                    "codes": ["1f603"],
+                    "name": {"zh": "大眼睛笑脸", "en": "Grinning Face with Big Eyes"},
+                    "keywords": {"zh": [], "en": []},
+                    "image": {"path": "twemoji/72x72/1f603.png"},
+                },
+            ],
+        },
+        {
+            "categoryId": "animals_and_nature",
+            "name": "animals",
+            "items": [
+                {
+                    "emoji": "🐶",
+                    "codes": ["1f436"],
+                    "name": {"zh": "狗脸", "en": "Dog Face"},
+                    "keywords": {"zh": ["小狗"], "en": ["puppy"]},
+                },
+            ],
+        },
+    ],
+}
+
+
+@pytest.fixture
+def index(tmp_path) -> emoji_tool.EmojiIndexReader:
+    source = tmp_path / "emoji.json"
+    source.write_text(json.dumps(CATALOG, ensure_ascii=False), encoding="utf-8")
+    out = tmp_path / "emoji.mybemoji"
+    assert emoji_tool.main(["compile", "--input", str(source), "--output", str(out)]) == 0
+    return emoji_tool.EmojiIndexReader(out.read_bytes())
+
+
+def _emoji(index: emoji_tool.EmojiIndexReader, query: str, lang: str) -> list[str]:
+    return [index.emoji(i)[0] for i in index.search(query, lang)]
+
+
+@pytest.mark.parametrize(
+    ("query", "lang", "expected"),
+    [
+        ("grin", "en", ["😀", "😃"]),
+        ("FACE", "en", ["😀", "😃", "🐶"]),
+        ("big e", "en", ["😃"]),
+        ("eyes", "en", ["😃"]),
+        ("pup", "en", ["🐶"]),
+        ("笑", "zh", ["😀", "😃"]),
+        ("眼睛", "zh", ["😃"]),
+        ("狗", "zh", ["🐶"]),
+        ("开", "zh", ["😀"]),
+        ("ace", "en", []),
+        ("cat", "en", []),
+        ("笑", "en", []),
+        ("", "en", []),
+    ],
+)
+def test_search(index, query, lang, expected):
+    assert _emoji(index, query, lang) == expected
+
+
+def test_catalog_tables(index):
+    assert index.emoji_count == 3
+    assert index.emoji(2) == ("🐶", "1f436", "", 1)
+    assert index.categories() == [("smileys_and_emotion", "faces", 0, 2), ("animals_and_nature", "animals", 2, 1)]
+
+
+def test_compile_refuses_catalog_without_terms(tmp_path):
+    empty = json.loads(json.dumps(CATALOG))
+    for cat in empty["categories"]:
+        for item in cat["items"]:
+            item["name"] = {"zh": "", "en": ""}
+            item["keywords"] = {"zh": [], "en": []}
+    source = tmp_path / "emoji.json"
+    source.write_text(json.dumps(empty, ensure_ascii=False), encoding="utf-8")
+    out = tmp_path / "emoji.mybemoji"
+    with pytest.raises(SystemExit, match="no emoji has a name or keyword"):
+        emoji_tool.main(["compile", "--input", str(source), "--output", str(out)])
+    assert not out.exists()
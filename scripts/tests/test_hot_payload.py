@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+import json
+import struct
+
+import pytest
+
+import dict_tool
+
+HOT = 60
+
+
+def _hot_entries(path):
+    """Reads the hot payload of `path` and maps every hot code through HCX1 into the full payload."""
+    full = dict_tool.MyBoardDictionaryReader.from_file(path)
+    hot = dict_tool.MyBoardDictionaryReader.from_file(path, hot=True)
+    body = hot.sections[dict_tool.HotCodeMapSectionBuilder.tag]
+    full_index = struct.unpack(f"<{hot.code_count}I", body)
+    entries = []
+    for i in range(hot.code_count):
+        code = hot.code_at(i)
+        assert full.code_at(full_index[i]) == code
+        first, count = full.code_record(full_index[i])
+        full_group = [full.entry(first + j) for j in range(count)]
+        hot_first, hot_count = hot.code_record(i)
+        for j in range(hot_count):
+            entry = hot.entry(hot_first + j)
+            assert entry in full_group
+            entries.append((code.decode("utf-8"), *entry))
+    assert full.meta["hotPayload"]["entryCount"] == len(entries)
+    return entries
+
+
+def _top(path, limit):
+    reader = dict_tool.MyBoardDictionaryReader.from_file(path)
+    all_entries = [(code, word, w) for code, group in dict_tool._reader_groups(reader) for word, w in group]
+    return sorted(all_entries, key=lambda e: (-e[2], e[0], e[1]))[:limit]
+
+
+def test_hot_payload_round_trip(rime_dict, convert):
+    out = convert(rime_dict, "hot.mybdict", "--hot-entries", str(HOT))
+    entries = _hot_entries(out)
+    assert sorted(entries, key=lambda e: (-e[2], e[0], e[1])) == _top(out, HOT)
+    with pytest.raises(ValueError, match="no hot payload"):
+        dict_tool.MyBoardDictionaryReader.from_file(convert(rime_dict, "plain.mybdict"), hot=True)
+
+
+@pytest.mark.parametrize("shard_by", ["initial", "prefix2"])
+def test_sharded_hot_payload_is_global_top_n(rime_dict, convert, tmp_path, shard_by):
+    mono = convert(rime_dict, "mono.mybdict", "--hot-entries", str(HOT))
+    convert(rime_dict, tmp_path / "sharded" / "dict.mybdict", "--shard-by", shard_by, "--hot-entries", str(HOT))
+    index = json.loads((tmp_path / "sharded" / "dict.shards.json").read_text(encoding="utf-8"))
+
+    entries = []
+    for shard in index["shards"]:
+        path = tmp_path / "sharded" / shard["file"]
+        if "hotPayload" in dict_tool.MyBoardDictionaryReader.from_file(path).meta:
+            entries.extend(_hot_entries(path))
+    assert sorted(entries) == sorted(_hot_entries(mono))
+    assert len(entries) == HOT
@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import math
+import random
+from collections import Counter
+
+import pytest
+
+import dict_tool
+
+
+def _skewed_pairs(seed: int = 3) -> list[tuple[str, str]]:
+    """40 prev words with Zipf-like successors, interleaved with a long tail of one-off pairs."""
+    rng = random.Random(seed)
+    pairs: list[tuple[str, str]] = []
+    for p in range(40):
+        for n in range(8):
+            pairs += [(f"w{p}", f"w{n}")] * (120 // (n + 1))
+    pairs += [(f"w{rng.randrange(40)}", f"rare{i}") for i in range(6000)]
+    rng.shuffle(pairs)
+    return pairs
+
+
+ORDERS = {
+    "shuffled": lambda pairs: pairs,
+    "rare_first": lambda pairs: sorted(pairs, key=lambda kv: not kv[1].startswith("rare")),
+    "rare_last": lambda pairs: sorted(pairs, key=lambda kv: kv[1].startswith("rare")),
+}
+
+
+def _count(pairs: list[tuple[str, str]], **kwargs: int) -> dict_tool.BigramCounter:
+    counter = dict_tool.BigramCounter(**kwargs)
+    for prev, nxt in pairs:
+        counter.add(prev, nxt)
+    return counter
+
+
+@pytest.mark.parametrize("order", ORDERS)
+def test_lossy_counts_are_bounded_undercounts(order):
+    pairs = ORDERS[order](_skewed_pairs())
+    truth = Counter(pairs)
+    counter = _count(pairs, max_pairs=1000)
+
+    assert counter.evicted_pairs > 0
+    assert len(counter.pairs) <= 1000
+    err = counter.bucket - 1
+    for key, c in counter.pairs.items():
+        assert truth[key] - err <= c <= truth[key]
+    # Every pair seen more often than the error bound must survive.
+    for key, c in truth.items():
+        if c > err:
+            assert key in counter.pairs
+
+
+@pytest.mark.parametrize("order", ORDERS)
+def test_prev_totals_are_bounded_undercounts(order):
+    pairs = ORDERS[order](_skewed_pairs())
+    truth = Counter(prev for prev, _ in pairs)
+    counter = _count(pairs, max_pairs=1000)
+    err = counter.bucket - 1
+    for prev, total in counter.prev_totals.items():
+        assert truth[prev] - err <= total <= truth[prev]
+    # A surviving pair always has its prev total, and never more observations than it.
+    for (prev, _nxt), c in counter.pairs.items():
+        assert c <= counter.prev_totals[prev]
+
+
+def test_prev_totals_memory_is_bounded():
+    # Every prev is a one-off: without pruning the totals would grow with the corpus.
+    pairs = [(f"once{i}", "x") for i in range(20_000)] + [("w", "x")] * 5000
+    random.Random(5).shuffle(pairs)
+    counter = _count(pairs, max_pairs=500)
+    assert len(counter.prev_totals) <= 500 and len(counter.pairs) <= 500
+    assert counter.table(min_count=1, top_k=4)["w"] == [("x", 0)]
+
+
+def test_corpus_lines_keep_hashtags(tmp_path):
+    corpus = tmp_path / "corpus.txt"
+    corpus.write_text("#今天 天气 很好\n\n  普通 句子  \n", encoding="utf-8")
+    assert list(dict_tool._iter_corpus_lines([corpus])) == ["#今天 天气 很好", "普通 句子"]
+    assert list(dict_tool._iter_corpus_lines([corpus], skip_comments=True)) == ["普通 句子"]
+
+
+@pytest.mark.parametrize("order", ORDERS)
+def test_costs_with_and_without_eviction_agree_for_frequent_pairs(order):
+    pairs = ORDERS[order](_skewed_pairs())
+    truth = Counter(pairs)
+    exact = _count(pairs, max_pairs=len(truth), bucket_width=len(pairs) + 1)
+    lossy = _count(pairs, max_pairs=1000)
+    assert exact.evicted_pairs == 0 and lossy.evicted_pairs > 0
+
+    exact_table = exact.table(min_count=1, top_k=8)
+    lossy_table = lossy.table(min_count=1, top_k=8)
+    assert exact_table.keys() == lossy_table.keys()
+
+    err = lossy.bucket - 1
+    checked = 0
+    for prev, items in exact_table.items():
+        lossy_costs = dict(lossy_table[prev])
+        frequent = [nxt for nxt, _ in items if truth[(prev, nxt)] > 4 * err]
+        assert [nxt for nxt, _ in lossy_table[prev]][: len(frequent)] == frequent
+        for nxt, cost in items:
+            c = truth[(prev, nxt)]
+            if nxt not in frequent:
+                continue
+            # The pair count and the prev total each undercount by at most `err`: the first can raise the cost
+            # by at most -log2(1 - err/c), the second lower it by at most -log2(1 - err/total).
+            total = exact.prev_totals[prev]
+            scale = dict_tool.NgramPayloadV1Writer.COST_SCALE
+            up = -math.log2(1 - err / c) * scale + 1
+            down = -math.log2(1 - err / total) * scale + 1
+            assert cost - down <= lossy_costs[nxt] <= cost + up, (prev, nxt)
+            checked += 1
+    assert checked >= 40
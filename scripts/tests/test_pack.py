@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+import json
+
+import pytest
+
+import dict_tool
+from conftest import write_rime_dict
+
+
+@pytest.fixture
+def dictionaries(rime_dict, convert, tmp_path):
+    other = write_rime_dict(tmp_path / "other.dict.yaml", entries=900, seed=11)
+    return [
+        convert(rime_dict, "a.mybdict", "--dictionary-id", "a"),
+        convert(other, "b.mybdict", "--dictionary-id", "b"),
+    ]
+
+
+def _pack(inputs, output, *extra):
+    argv = ["pack", "--inputs", ",".join(map(str, inputs)), "--output", str(output), "--pack-id", "p", *extra]
+    assert dict_tool.main(argv) == 0
+    return output
+
+
+def test_pack_verify_round_trip(dictionaries, tmp_path):
+    out = _pack(dictionaries, tmp_path / "dicts.mybpack", "--verify")
+    pack = dict_tool.MyBoardDictionaryPackReader.from_file(out)
+    assert pack.dictionary_ids == ["a", "b"]
+    for path in dictionaries:
+        source = dict_tool.MyBoardDictionaryReader.from_file(path)
+        view = pack.dictionary(source.meta["dictionaryId"])
+        assert dict_tool._reader_groups(view) == dict_tool._reader_groups(source)
+        for i in range(0, source.code_count, 7):
+            code = source.code_at(i).decode("utf-8")
+            assert view.candidates(code, limit=1000) == source.candidates(code, limit=1000)
+            assert view.candidates_by_prefix(code[:2], limit=1000) == source.candidates_by_prefix(code[:2], limit=1000)
+
+
+def test_pack_specs_cannot_override_computed_toc_fields(dictionaries, tmp_path):
+    spec = tmp_path / "a.json"
+    spec.write_text(json.dumps({"name": "A", "priority": 5, "packIndex": 9, "codeCount": 0, "source": "x"}), encoding="utf-8")
+    empty = tmp_path / "b.json"
+    empty.write_text("{}", encoding="utf-8")
+    out = _pack(dictionaries, tmp_path / "dicts.mybpack", "--specs", f"{spec},{empty}")
+    entry = dict_tool.MyBoardDictionaryPackReader.from_file(out).toc[0]
+    source = dict_tool.MyBoardDictionaryReader.from_file(dictionaries[0])
+    assert (entry["name"], entry["priority"]) == ("A", 5)
+    assert (entry["packIndex"], entry["source"]) == (0, "a.mybdict")
+    assert (entry["codeCount"], entry["entryCount"]) == (source.code_count, source.entry_count)
+
+
+def test_pack_queries_need_a_dictionary_id(dictionaries, tmp_path, capsys):
+    out = _pack(dictionaries, tmp_path / "dicts.mybpack")
+    with pytest.raises(SystemExit, match=r"--pack-dictionary <id> \(available: a, b\)"):
+        dict_tool.main(["lookup", "--input", str(out), "--code", "ni"])
+    with pytest.raises(SystemExit, match=r"no dictionary 'c' in pack"):
+        dict_tool.main(["lookup", "--input", str(out), "--pack-dictionary", "c"])
+    with pytest.raises(SystemExit, match=r"dictionary pack \(a, b\)"):
+        dict_tool.main(["analyze", "--input", str(out)])
+
+    code = dict_tool.MyBoardDictionaryReader.from_file(dictionaries[1]).code_at(0).decode("utf-8")
+    assert dict_tool.main(["lookup", "--input", str(out), "--pack-dictionary", "b", "--code", code]) == 0
+    assert capsys.readouterr().out.split() == dict_tool.MyBoardDictionaryReader.from_file(dictionaries[1]).candidates(code, limit=50)
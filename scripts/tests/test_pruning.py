@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import random
+
+import pytest
+
+import dict_tool
+from dict_tool import DictionaryEntry, EntryPruner, PruningPolicy
+
+# (word, code, weight, source); ties on weight are broken by code, word, then source.
+ROWS = [
+    ("你", "ni", 900, "a"),
+    ("泥", "ni", 300, "a"),
+    ("尼", "ni", 300, "b"),
+    ("拟", "ni", 50, "b"),
+    ("好", "hao", 800, "a"),
+    ("号", "hao", 300, "b"),
+    ("豪", "hao", 10, "a"),
+    ("我", "wo", 700, "b"),
+    ("窝", "wo", 300, "a"),
+    ("卧", "wo", 0, "a"),
+]
+
+
+def _labeled(rows=ROWS):
+    return [(DictionaryEntry(word, code, weight), source) for word, code, weight, source in rows]
+
+
+def _prune(rows=ROWS, **policy):
+    pruner = EntryPruner(PruningPolicy(**policy))
+    kept = [(e.word, source) for e, source in pruner.prune(_labeled(rows))]
+    dropped = {(e.word, source): reason for e, source, reason in pruner.dropped}
+    assert pruner.seen == len(rows) and pruner.kept == len(kept) == len(rows) - len(dropped)
+    return kept, dropped
+
+
+def _words(pairs):
+    return {word for word, _source in pairs}
+
+
+def test_min_weight():
+    kept, dropped = _prune(min_weight=50)
+    assert set(dropped.values()) == {"min_weight"}
+    assert _words(dropped) == {"豪", "卧"}
+    assert _words(kept) == {word for word, _code, _weight, _source in ROWS} - {"豪", "卧"}
+
+
+def test_source_quota_keeps_best_ranked_per_source():
+    kept, dropped = _prune(source_quotas={"a": 2})
+    assert {w for w, s in kept if s == "a"} == {"你", "好"}
+    assert {w for w, s in kept if s == "b"} == {"尼", "拟", "号", "我"}
+    assert set(dropped.values()) == {"source_quota"}
+
+
+def test_max_entries_per_code_and_tie_break():
+    kept, dropped = _prune(max_entries_per_code=2)
+    # 泥 and 尼 tie at 300 under "ni": the word decides (尼 < 泥 in code point order).
+    assert _words(kept) == {"你", "尼", "好", "号", "我", "窝"}
+    assert set(dropped) == {("泥", "a"), ("拟", "b"), ("豪", "a"), ("卧", "a")}
+    assert set(dropped.values()) == {"max_entries_per_code"}
+
+
+def test_min_weight_percentile():
+    # Weights sorted: 0 10 50 300 300 300 300 700 800 900; the 40th percentile is the 4th value (300).
+    kept, dropped = _prune(min_weight_percentile=40.0)
+    assert _words(dropped) == {"卧", "豪", "拟"}
+    assert set(dropped.values()) == {"min_weight_percentile"}
+
+
+def test_max_entries_keeps_ranked_prefix():
+    kept, dropped = _prune(max_entries=5)
+    # Rank: 你 900, 好 800, 我 700, then the 300s by code: 号 (hao) before 尼/泥 (ni) before 窝 (wo).
+    assert kept == [("你", "a"), ("好", "a"), ("我", "b"), ("号", "b"), ("尼", "b")]
+    assert set(dropped.values()) == {"max_entries"}
+
+
+def test_max_bytes_counts_code_once():
+    cost_word = dict_tool.MyBoardDictionaryReader.ENTRY_RECORD_SIZE + len("你".encode()) + 1
+    cost_code = dict_tool.MyBoardDictionaryReader.CODE_INDEX_RECORD_SIZE + len("ni") + 1
+    # 你 (new code ni) + 好 (new code hao) fit exactly; 我 would add a third code.
+    budget = 2 * cost_word + cost_code + dict_tool.MyBoardDictionaryReader.CODE_INDEX_RECORD_SIZE + len("hao") + 1
+    kept, dropped = _prune(max_bytes=budget)
+    assert kept == [("你", "a"), ("好", "a")]
+    assert set(dropped.values()) == {"max_bytes"}
+    kept, _ = _prune(max_bytes=budget - 1)
+    assert kept == [("你", "a")]
+
+
+def test_stage_order():
+    # min_weight drops 卧/豪 first; the quota then sees only a's remaining 你 好 泥 窝 and keeps 你 好;
+    # the per-code cap runs on the quota survivors, so 尼 (b) is kept under "ni" next to 你.
+    kept, dropped = _prune(min_weight=20, source_quotas={"a": 2}, max_entries_per_code=2, max_entries=5)
+    assert dropped[("卧", "a")] == dropped[("豪", "a")] == "min_weight"
+    assert dropped[("泥", "a")] == dropped[("窝", "a")] == "source_quota"
+    assert dropped[("拟", "b")] == "max_entries_per_code"
+    assert kept == [("你", "a"), ("好", "a"), ("我", "b"), ("号", "b"), ("尼", "b")]
+
+
+@pytest.mark.parametrize(
+    "policy",
+    [
+        {"min_weight": 20},
+        {"source_quotas": {"a": 2}},
+        {"max_entries_per_code": 1, "max_entries": 4},
+        {"min_weight_percentile": 50.0, "max_bytes": 60},
+    ],
+)
+def test_result_does_not_depend_on_input_order(policy):
+    expected = _prune(**policy)
+    rows = list(ROWS)
+    for seed in range(5):
+        random.Random(seed).shuffle(rows)
+        kept, dropped = _prune(rows, **policy)
+        assert sorted(kept) == sorted(expected[0]) and dropped == expected[1]
+
+
+def test_pruned_output_report(rime_dict, convert, tmp_path):
+    report = tmp_path / "pruned.tsv"
+    out = convert(rime_dict, "lite.mybdict", "--max-entries-per-code", "2", "--min-weight", "1", "--pruned-output", str(report))
+    full = dict_tool.MyBoardDictionaryReader.from_file(convert(rime_dict, "full.mybdict"))
+    lite = dict_tool.MyBoardDictionaryReader.from_file(out)
+
+    rows = [line.split("\t") for line in report.read_text(encoding="utf-8").splitlines()]
+    assert {r[4] for r in rows} == {"min_weight", "max_entries_per_code"}
+    assert all(int(r[2]) < 1 for r in rows if r[4] == "min_weight")
+    for i in range(lite.code_count):
+        _first, count = lite.code_record(i)
+        assert count <= 2
+
+    kept = sorted((code, word, w) for code, group in dict_tool._reader_groups(lite) for word, w in group)
+    pruned = sorted((r[1], r[0], int(r[2])) for r in rows)
+    everything = sorted((code, word, w) for code, group in dict_tool._reader_groups(full) for word, w in group)
+    assert sorted(kept + pruned) == everything
@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import json
+import zlib
+
+import pytest
+
+import dict_tool
+
+
+@pytest.mark.parametrize("shard_by", ["initial", "prefix2"])
+def test_sharded_lookup_matches_monolithic(rime_dict, convert, tmp_path, shard_by):
+    mono = dict_tool._ShardRouter.open(convert(rime_dict, "mono.mybdict"))
+    convert(rime_dict, tmp_path / "sharded" / "dict.mybdict", "--shard-by", shard_by)
+    index_path = tmp_path / "sharded" / "dict.shards.json"
+    sharded = dict_tool._ShardRouter.open(index_path)
+
+    index = json.loads(index_path.read_text(encoding="utf-8"))
+    assert len(index["shards"]) > 1
+    (reader,) = [r for _, r in mono.shards]
+    assert sum(s["codeCount"] for s in index["shards"]) == reader.code_count
+
+    codes = [reader.code_at(i).decode("utf-8") for i in range(reader.code_count)]
+    for code in codes:
+        assert sharded.candidates(code, limit=1000) == mono.candidates(code, limit=1000)
+
+    prefixes = {code[:n] for code in codes for n in (1, 2, 3)} | {"q", "zz"}
+    for prefix in sorted(prefixes):
+        assert sharded.candidates_by_prefix(prefix, limit=10_000) == mono.candidates_by_prefix(prefix, limit=10_000)
+        assert sharded.candidates_by_prefix(prefix, limit=7) == mono.candidates_by_prefix(prefix, limit=7)
+
+
+def test_shard_index_crc_matches_payload(rime_dict, convert, tmp_path):
+    convert(rime_dict, tmp_path / "dict.mybdict", "--shard-by", "initial")
+    index = json.loads((tmp_path / "dict.shards.json").read_text(encoding="utf-8"))
+    for shard in index["shards"]:
+        path = tmp_path / shard["file"]
+        payload, _, _ = dict_tool._read_mybdf(path.read_bytes())
+        assert shard["crc32Payload"] == zlib.crc32(payload)
+        assert shard["fileSize"] == path.stat().st_size
+
+
+def test_meta_output_asset_exists(rime_dict, convert, tmp_path):
+    out = convert(rime_dict, tmp_path / "dictionary" / "base.mybdict", "--meta-output", str(tmp_path / "base.json"))
+    spec = json.loads((tmp_path / "base.json").read_text(encoding="utf-8"))
+    assert (tmp_path / spec["assetPath"]).resolve() == out.resolve()
+    assert out.is_file()
+
+
+@pytest.mark.parametrize("command", ["convert", "convert-multi"])
+def test_meta_output_rejected_with_shards(rime_dict, tmp_path, command):
+    inputs = ["--input", str(rime_dict), "--format", "rime_dict_yaml"] if command == "convert" else ["--inputs", str(rime_dict)]
+    argv = [
+        command,
+        *inputs,
+        "--dictionary-id",
+        "test",
+        "--output",
+        str(tmp_path / "dictionary" / "base.mybdict"),
+        "--shard-by",
+        "initial",
+        "--meta-output",
+        str(tmp_path / "base.json"),
+    ]
+    with pytest.raises(SystemExit, match="--meta-output cannot be combined with --shard-by"):
+        dict_tool.main(argv)
+    assert not (tmp_path / "base.json").exists()
+    assert not (tmp_path / "dictionary").exists()
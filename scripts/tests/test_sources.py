@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import bz2
+import gzip
+import lzma
+import tarfile
+import zipfile
+
+import pytest
+
+import dict_tool
+
+MEMBER = "cn_dicts/test.dict.yaml"
+
+
+def _payload(path):
+    return dict_tool._read_mybdf(path.read_bytes())[0]
+
+
+def _make_tar(path, source, mode):
+    with tarfile.open(path, mode) as tf:
+        tf.add(source.parent / "README", arcname="README")
+        tf.add(source, arcname=MEMBER)
+    return path
+
+
+def _make_zip(path, source):
+    with zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("README", "readme\n")
+        zf.write(source, arcname=MEMBER)
+        zf.writestr(MEMBER + ".gz", gzip.compress(source.read_bytes()))
+    return path
+
+
+@pytest.fixture
+def sources(rime_dict, tmp_path):
+    """Plain source plus the same bytes behind every supported container, keyed by a short label."""
+    (tmp_path / "README").write_text("readme\n", encoding="utf-8")
+    data = rime_dict.read_bytes()
+    (tmp_path / "test.dict.yaml.gz").write_bytes(gzip.compress(data))
+    (tmp_path / "test.dict.yaml.xz").write_bytes(lzma.compress(data))
+    (tmp_path / "test.dict.yaml.bz2").write_bytes(bz2.compress(data))
+    return {
+        "gz": tmp_path / "test.dict.yaml.gz",
+        "xz": tmp_path / "test.dict.yaml.xz",
+        "bz2": tmp_path / "test.dict.yaml.bz2",
+        "tar": f"{_make_tar(tmp_path / 'bundle.tar', rime_dict, 'w')}::{MEMBER}",
+        "tar.gz": f"{_make_tar(tmp_path / 'bundle.tar.gz', rime_dict, 'w:gz')}::./{MEMBER}",
+        "tar.xz": f"{_make_tar(tmp_path / 'bundle.tar.xz', rime_dict, 'w:xz')}::{MEMBER}",
+        "zip": f"{_make_zip(tmp_path / 'bundle.zip', rime_dict)}::{MEMBER}",
+        "zip-member.gz": f"{tmp_path / 'bundle.zip'}::{MEMBER}.gz",
+    }
+
+
+def test_compressed_and_archive_inputs_match_plain_file(rime_dict, sources, convert, tmp_path):
+    expected = _payload(convert(rime_dict, "plain.mybdict"))
+    for label, source in sources.items():
+        assert _payload(convert(source, f"{label}.mybdict")) == expected, label
+
+
+def test_archive_inputs_are_opened_once(sources, convert, monkeypatch):
+    opened = []
+    open_source_text = dict_tool._open_source_text
+
+    def _counting(path):
+        opened.append(str(path))
+        return open_source_text(path)
+
+    monkeypatch.setattr(dict_tool, "_open_source_text", _counting)
+    for label in ("tar.gz", "tar.xz", "zip"):
+        opened.clear()
+        convert(sources[label], f"{label}.mybdict")
+        assert opened == [sources[label]], label
+
+
+def test_convert_multi_guesses_format_through_archives(rime_dict, sources, tmp_path):
+    out = tmp_path / "multi.mybdict"
+    argv = ["convert-multi", "--inputs", f"{sources['gz']},{sources['zip']}", "--dictionary-id", "test", "--output", str(out)]
+    assert dict_tool.main(argv) == 0
+    assert out.stat().st_size > 0
+
+
+@pytest.mark.parametrize(
+    ("source", "message"),
+    [
+        ("missing.dict.yaml", "Input not found"),
+        ("bundle.tar.gz::cn_dicts/missing.dict.yaml", "member not found"),
+        ("bundle.zip::cn_dicts/missing.dict.yaml", "member not found"),
+        ("bundle.tar.gz", "tar sources need a member"),
+        ("bundle.zip", "zip sources need a member"),
+        ("test.dict.yaml.gz::test.dict.yaml", "not a .tar/.zip bundle"),
+    ],
+)
+def test_unreadable_sources_fail_before_encoding(sources, tmp_path, source, message):
+    out = tmp_path / "out.mybdict"
+    common = ["--dictionary-id", "test", "--output", str(out)]
+    for argv in (
+        ["convert", "--input", str(tmp_path / source), "--format", "rime_dict_yaml", *common],
+        ["convert-multi", "--inputs", str(tmp_path / source), *common],
+    ):
+        with pytest.raises(SystemExit, match=message):
+            dict_tool.main(argv)
+        assert not out.exists()
@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import math
+import struct
+
+import pytest
+
+import dict_tool
+
+Builder = dict_tool.SwipeSignatureSectionBuilder
+
+
+def _parse_swipe(body) -> dict[tuple[str, str], list[tuple[int, str, int]]]:
+    """SWP1 body -> {(first, last): [(entry_index, signature, path_length_q8)]} in stored order."""
+    group_count, record_count, r0, r1 = struct.unpack_from("<IIII", body, 0)
+    assert (r0, r1) == (0, 0)
+    records_offset = 16 + group_count * 12
+    blob_offset = records_offset + record_count * 12
+    blob = bytes(body[blob_offset:])
+    assert blob.endswith(b"\0")
+    groups = {}
+    next_record = 0
+    for i in range(group_count):
+        first, last, reserved, first_record, count = struct.unpack_from("<BBHII", body, 16 + i * 12)
+        assert reserved == 0 and first_record == next_record
+        next_record += count
+        records = []
+        for r in range(first_record, first_record + count):
+            entry_index, sig_offset, length_q8, reserved = struct.unpack_from("<IIHH", body, records_offset + r * 12)
+            assert reserved == 0
+            records.append((entry_index, blob[sig_offset : blob.index(b"\0", sig_offset)].decode("ascii"), length_q8))
+        groups[(chr(first), chr(last))] = records
+    assert next_record == record_count
+    assert list(groups) == sorted(groups)
+    return groups
+
+
+@pytest.fixture
+def small_dict(tmp_path):
+    path = tmp_path / "swipe.dict.yaml"
+    rows = [("我", "wo", 500), ("窝", "wo", 300), ("啊啊", "a a", 100), ("中国", "zhong guo", 900), ("马", "ma", 40)]
+    lines = ["---", "name: swipe", "...", ""] + [f"{word}\t{code}\t{weight}" for word, code, weight in rows]
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return path
+
+
+def _convert_small(convert, source, layout):
+    # No derived single characters, so every entry is one of the rows above.
+    out = convert(source, "swipe.mybdict", "--swipe-layout", str(layout), "--single-chars-per-code", "0")
+    return dict_tool.MyBoardDictionaryReader.from_file(out)
+
+
+def test_known_signatures_and_path_lengths(small_dict, convert, qwerty_layout):
+    reader = _convert_small(convert, small_dict, qwerty_layout)
+    groups = _parse_swipe(reader.sections[Builder.tag])
+    by_word = {reader.entry(i)[0]: (group, sig, q8) for group, records in groups.items() for i, sig, q8 in records}
+
+    # qwerty row 0 has 10 columns, so one key width is 1/10 of the row: w is at x=1.5, o at x=8.5, both on y=0.5.
+    assert by_word["我"] == (("w", "o"), "wo", 7 * 256)
+    assert by_word["窝"] == by_word["我"]
+    # Repeated keys collapse: "aa" is a single tap on `a`, with no travel.
+    assert by_word["啊啊"] == (("a", "a"), "a", 0)
+    # Row 2 (`z`..`m`, 9 columns, starting one column in) and row 1 (`a`..`l`, 9 columns) on the same key unit.
+    m, a = ((7 + 0.5) / 9 * 10, 2.5), ((0 + 0.5) / 9 * 10, 1.5)
+    assert by_word["马"] == (("m", "a"), "ma", round(math.dist(m, a) * 256))
+    assert by_word["中国"][:2] == (("z", "o"), "zhonguo")
+    # Entries of one code share the interned signature; heavier entries come first within a group.
+    assert [reader.entry(i)[0] for i, _sig, _q8 in groups[("w", "o")]] == ["我", "窝"]
+
+
+def test_records_match_layout_key_centers(rime_dict, convert, qwerty_layout):
+    reader = dict_tool.MyBoardDictionaryReader.from_file(convert(rime_dict, "swipe.mybdict", "--swipe-layout", str(qwerty_layout)))
+    centers = dict_tool._load_key_centers(qwerty_layout)
+    groups = _parse_swipe(reader.sections[Builder.tag])
+
+    codes = {}
+    for i in range(reader.code_count):
+        first, count = reader.code_record(i)
+        for j in range(count):
+            codes[first + j] = reader.code_at(i).decode("utf-8")
+    seen = set()
+    for (first, last), records in groups.items():
+        weights = [reader.entry(i)[1] for i, _sig, _q8 in records]
+        assert weights == sorted(weights, reverse=True)
+        for index, sig, length_q8 in records:
+            assert sig == Builder.signature(codes[index])
+            assert (sig[0], sig[-1]) == (first, last)
+            points = [centers[ch] for ch in sig]
+            expected = sum(math.dist(p, q) for p, q in zip(points, points[1:]))
+            assert length_q8 == min(0xFFFF, round(expected * 256))
+            seen.add(index)
+    assert seen == set(codes)
+
+
+def test_candidates_swipe(small_dict, convert, qwerty_layout):
+    reader = _convert_small(convert, small_dict, qwerty_layout)
+    # A swipe from w to o passes over e, r, t, y, u and i; repeated samples on one key collapse.
+    assert reader.candidates_swipe("wwertyuiioo") == ["我", "窝"]
+    assert reader.candidates_swipe("wwertyuiioo", limit=1) == ["我"]
+    assert reader.candidates_swipe("zxcvbhgyuiopoiuhbnhgyuio") == ["中国"]
+    assert reader.candidates_swipe("wp") == []
+    with pytest.raises(ValueError, match="no SWP1 section"):
+        dict_tool.MyBoardDictionaryReader.from_file(convert(small_dict, "plain.mybdict")).candidates_swipe("wo")
@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import random
+
+import pytest
+
+import dict_tool
+
+
+@pytest.fixture
+def adjacency(qwerty_layout) -> dict[str, str]:
+    return dict_tool._load_key_adjacency(qwerty_layout)
+
+
+def _codes(reader: dict_tool.MyBoardDictionaryReader) -> list[str]:
+    return [reader.code_at(i).decode("utf-8") for i in range(reader.code_count)]
+
+
+def _substitution_typos(codes: list[str], adjacency: dict[str, str], *, count: int, seed: int = 11):
+    """(code, typo) pairs: one key replaced by a layout neighbor, positions spread over the whole code."""
+    rng = random.Random(seed)
+    out = []
+    while len(out) < count:
+        code = rng.choice(codes)
+        i = rng.randrange(len(code))
+        if adjacency.get(code[i]):
+            out.append((code, code[:i] + rng.choice(adjacency[code[i]]) + code[i + 1 :]))
+    return out
+
+
+def test_uncapped_index_recalls_every_adjacent_substitution(rime_dict, convert, qwerty_layout, adjacency):
+    reader = dict_tool.MyBoardDictionaryReader.from_file(
+        convert(rime_dict, "typo.mybdict", "--typo-layout", str(qwerty_layout), "--typo-fan-out", "0")
+    )
+    codes = _codes(reader)
+    for code, typo in _substitution_typos(codes, adjacency, count=300):
+        hits = {codes[i] for i, _ in reader.find_typo_code_indices(typo)}
+        assert code in hits, (code, typo)
+
+
+def test_capped_fan_out_covers_every_key_position(adjacency):
+    builder = dict_tool.TypoVariantSectionBuilder(adjacency, fan_out=16)
+    for code in ("zhongguoren", "shishishishi", "bababa", "ni"):
+        variants = builder.variants(code)
+        assert 0 < len(variants) <= 16
+        positions = {(edits[0] >> 8) & builder.MAX_EDIT_POSITION for _, _, edits in variants}
+        assert positions == set(range(min(len(code), 16)))
+
+
+def test_records_rebuild_the_generated_variants(rime_dict, convert, qwerty_layout, adjacency):
+    reader = dict_tool.MyBoardDictionaryReader.from_file(
+        convert(rime_dict, "typo.mybdict", "--typo-layout", str(qwerty_layout), "--typo-max-distance", "2", "--typo-fan-out", "24")
+    )
+    builder = dict_tool.TypoVariantSectionBuilder(adjacency, max_distance=2, fan_out=24)
+    codes = _codes(reader)
+    for index in range(0, len(codes), 17):
+        for variant, distance, edits in builder.variants(codes[index]):
+            assert builder.apply_edits(codes[index].encode(), edits).decode() == variant
+            assert (index, distance) in reader.find_typo_code_indices(variant)
+
+    body = reader.sections[builder.tag]
+    record_count, max_distance, record_size = reader._typo
+    assert (max_distance, record_size) == (2, 8)
+    assert len(body) == 16 + record_count * record_size
+
+
+def test_postings_are_closest_then_heaviest(rime_dict, convert, qwerty_layout, adjacency):
+    reader = dict_tool.MyBoardDictionaryReader.from_file(
+        convert(rime_dict, "typo.mybdict", "--typo-layout", str(qwerty_layout), "--typo-max-distance", "2")
+    )
+    builder = dict_tool.TypoVariantSectionBuilder(adjacency, max_distance=2)
+    typos = {v for code in _codes(reader)[::7] for v, _, _ in builder.variants(code)[:4]}
+    shared = 0
+    for typo in sorted(typos):
+        hits = reader.find_typo_code_indices(typo)
+        assert hits
+        keys = [(d, -reader.entry(reader.code_record(i)[0])[1], i) for i, d in hits]
+        assert keys == sorted(keys)
+        shared += len(hits) > 1
+    assert shared > 0
@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+import json
+import os
+import stat
+import zlib
+
+import pytest
+
+import dict_tool
+
+
+def _write(out, payload, **kwargs):
+    return dict_tool.MyBoardDictionaryFileV1Writer().write(
+        payload_uncompressed=payload,
+        out_path=out,
+        dict_version=(1, 0, 0),
+        meta={"dictionaryId": "test"},
+        languages=["zh-CN"],
+        **kwargs,
+    )
+
+
+@pytest.mark.parametrize("compression", ["zlib", "none"])
+def test_chunked_write_matches_single_buffer(tmp_path, monkeypatch, compression):
+    monkeypatch.setattr(dict_tool, "PAYLOAD_CHUNK_SIZE", 4096)
+    entries = [dict_tool.DictionaryEntry(f"w{i}", f"c{i % 997}", i) for i in range(5_000)]
+    writer = dict_tool.MyBoardDictPayloadV1Writer()
+    chunks = list(writer.iter_encode(entries))
+    payload = writer.encode(entries)
+    assert len(chunks) > 1 and b"".join(chunks) == payload
+
+    crc = _write(tmp_path / "chunked.mybdict", iter(chunks), compression=compression, hot_payload=payload[:4096])
+    _write(tmp_path / "single.mybdict", payload, compression=compression, hot_payload=payload[:4096])
+    assert crc == zlib.crc32(payload)
+    chunked = (tmp_path / "chunked.mybdict").read_bytes()
+    assert dict_tool._read_mybdf(chunked) == dict_tool._read_mybdf((tmp_path / "single.mybdict").read_bytes())
+    assert dict_tool._read_mybdf(chunked, hot=True)[0] == payload[:4096]
+
+
+def test_failed_write_keeps_previous_output(tmp_path):
+    out = tmp_path / "dict.mybdict"
+    _write(out, b"previous payload")
+    previous = out.read_bytes()
+
+    def _failing():
+        yield b"x" * (1 << 20)
+        raise RuntimeError("encoder failed")
+
+    with pytest.raises(RuntimeError, match="encoder failed"):
+        _write(out, _failing())
+    assert out.read_bytes() == previous
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["dict.mybdict"]
+
+
+@pytest.fixture
+def fsynced(monkeypatch):
+    """Records every fsync as (is_directory, (st_dev, st_ino)) of the synced fd, in call order."""
+    calls = []
+    fsync = os.fsync
+
+    def _recording(fd):
+        st = os.fstat(fd)
+        calls.append((stat.S_ISDIR(st.st_mode), (st.st_dev, st.st_ino)))
+        fsync(fd)
+
+    monkeypatch.setattr(os, "fsync", _recording)
+    return calls
+
+
+def _identity(path):
+    st = path.stat()
+    return (st.st_dev, st.st_ino)
+
+
+@pytest.mark.skipif(os.name != "posix", reason="directory fsync is POSIX only")
+def test_write_fsyncs_file_then_directory(tmp_path, fsynced):
+    out = tmp_path / "out" / "dict.mybdict"
+    _write(out, b"payload")
+    # The tmp file is renamed over `out`, so it keeps its inode.
+    assert fsynced == [(False, _identity(out)), (True, _identity(out.parent))]
+
+
+@pytest.mark.skipif(os.name != "posix", reason="directory fsync is POSIX only")
+def test_shard_index_is_fsynced_with_its_directory(rime_dict, convert, tmp_path, fsynced):
+    convert(rime_dict, tmp_path / "sharded" / "dict.mybdict", "--shard-by", "initial")
+    index_path = tmp_path / "sharded" / "dict.shards.json"
+    shard_count = len(json.loads(index_path.read_text(encoding="utf-8"))["shards"])
+    directory = (True, _identity(index_path.parent))
+    assert fsynced.count(directory) == shard_count + 1
+    assert fsynced[-2:] == [(False, _identity(index_path)), directory]